@@ -0,0 +1,170 @@
+"""
+admission.py — SLO-aware admission control and load shedding ahead of routing.
+
+Regions have finite serving capacity here (ADMISSION_REGION_SERVERS replicas,
+each simulated request standing for ADMISSION_TRAFFIC_SCALE real ones), and
+each region's backlog is tracked as a fluid queue refreshed every
+ADMISSION_BIN_S.  The queue estimate a bin is routed on is the backlog at its
+start, projected to mid-bin with the previous bin's work.  Without admission
+control every request is routed and served, however long the queue; when no
+region can meet the SLO, constrained_hybrid's only fallback is the lowest-RTT
+region.
+
+With admission control, each bin's requests are routed on RTT plus the
+current queue estimate of every region, and the predicted end-to-end latency
+at the chosen region (RTT + queue + inference + ADMISSION_JITTER_BUFFER_MS)
+is checked against the workload's slo_threshold_ms:
+
+  admit      the prediction meets the SLO
+  downgrade  it does not, but the workload has a cheaper stand-in
+             (ADMISSION_DOWNGRADE, e.g. BERT-large served by BERT-base) whose
+             re-routed prediction meets the original SLO
+  shed       neither does; the request is rejected at the edge
+
+The default scenario is NHPP arrivals (diurnal load and flash crowds,
+arrivals.py) at ADMISSION_REQUESTS_PER_HOUR, which overloads the regions the
+carbon-aware policies concentrate traffic on.  Goodput is the share of offered
+requests served within their SLO; peak hours are those at or above the
+ADMISSION_PEAK_QUANTILE of hourly offered load.
+
+Run from src/:  python admission.py
+Outputs: ../outputs/tables/admission_results.csv
+"""
+
+import numpy as np
+
+from config import (
+    SIMULATION_HOURS, RANDOM_SEED, REGIONS,
+    ADMISSION_REQUESTS_PER_HOUR, ADMISSION_TRAFFIC_SCALE, ADMISSION_REGION_SERVERS, ADMISSION_BIN_S,
+    ADMISSION_JITTER_BUFFER_MS, ADMISSION_DOWNGRADE, ADMISSION_PEAK_QUANTILE,
+)
+from arrivals import ARRIVAL_MODELS
+from experiment import (
+    experiment_dirs, experiment_kwargs, experiment_parser, sample_requests, served_latency, write_results,
+)
+from policies import get_policy_configs, select_regions_batch
+
+SERVED, DOWNGRADED, SHED = 0, 1, 2
+
+
+def route_with_admission(ptype, alpha, req_times, lats, cis, slo, inference_ms, downgrade_ms, servers,
+                         admission=True, traffic_scale=ADMISSION_TRAFFIC_SCALE, bin_s=ADMISSION_BIN_S):
+    """
+    Route requests (sorted by time) bin by bin against per-region fluid queues.
+    downgrade_ms is each request's inference time on its stand-in model (NaN
+    where there is none).  Returns (region, outcome, served inference ms,
+    realized queueing ms) per request; shed requests keep region -1.
+    """
+    n = len(req_times)
+    n_bins = int(req_times[-1] // bin_s) + 1 if n else 0
+    bounds = np.searchsorted(req_times, np.arange(n_bins + 1) * float(bin_s))
+    bounds[-1] = n
+    capacity_s = servers * float(bin_s)
+    backlog = np.zeros(len(servers))
+    last_work_s = np.zeros(len(servers))
+
+    idx = np.full(n, -1)
+    outcome = np.full(n, SERVED, dtype=np.int8)
+    served_ms = inference_ms.copy()
+    queue_ms = np.zeros(n)
+    for b in range(n_bins):
+        lo, hi = bounds[b], bounds[b + 1]
+        if lo == hi:
+            backlog = np.maximum(0, backlog - capacity_s)
+            last_work_s[:] = 0
+            continue
+        sl = slice(lo, hi)
+        rows = np.arange(hi - lo)
+        if not admission:
+            pick = select_regions_batch(ptype, lats[sl], cis[sl], alpha, slo[sl], inference_ms[sl])
+        else:
+            # Queue estimate at mid-bin, assuming the bin brings as much work as the last one
+            projected = np.maximum(0, backlog + (last_work_s - capacity_s) / 2)
+            view = lats[sl] + 1000 * projected / servers
+            pick = select_regions_batch(ptype, view, cis[sl], alpha, slo[sl], inference_ms[sl])
+            over = view[rows, pick] + inference_ms[sl] + ADMISSION_JITTER_BUFFER_MS > slo[sl]
+            alt = np.flatnonzero(over & ~np.isnan(downgrade_ms[sl]))
+            if len(alt):
+                alt_ms = downgrade_ms[sl][alt]
+                alt_pick = select_regions_batch(ptype, view[alt], cis[sl][alt], alpha, slo[sl][alt], alt_ms)
+                ok = view[alt, alt_pick] + alt_ms + ADMISSION_JITTER_BUFFER_MS <= slo[sl][alt]
+                pick[alt[ok]] = alt_pick[ok]
+                over[alt[ok]] = False
+                outcome[lo + alt[ok]] = DOWNGRADED
+                served_ms[lo + alt[ok]] = alt_ms[ok]
+            outcome[lo + np.flatnonzero(over)] = SHED
+            pick = np.where(over, -1, pick)
+
+        idx[sl] = pick
+        live = pick >= 0
+        work_s = np.bincount(pick[live], weights=served_ms[sl][live] * traffic_scale / 1000,
+                             minlength=len(servers))
+        after = np.maximum(0, backlog + work_s - capacity_s)
+        # Requests in the bin see the average of the backlog at its start and end
+        wait = 1000 * (backlog + after) / 2 / servers
+        queue_ms[sl] = np.where(live, wait[np.maximum(pick, 0)], 0)
+        backlog = after
+        last_work_s = work_s
+    return idx, outcome, served_ms, queue_ms
+
+
+def run_admission_experiment(output_dir=None, hours=SIMULATION_HOURS, rph=ADMISSION_REQUESTS_PER_HOUR,
+                             seed=RANDOM_SEED, request_log=None, output_format='csv',
+                             arrival_model='nhpp', traffic_scale=ADMISSION_TRAFFIC_SCALE):
+    """Every standard policy with and without the admission stage, on the same overload stream."""
+    output_dir = experiment_dirs(output_dir)
+    batch = sample_requests(hours, rph, seed, request_log, arrival_model=arrival_model, time_order=True)
+    req_times, req_hours, wl_codes, n = batch['req_times'], batch['req_hours'], batch['wl_codes'], batch['n']
+    lats, cis, slo, inference_ms = batch['lats'], batch['cis'], batch['slo'], batch['inference_ms']
+    table = batch['table']
+    servers = np.array([ADMISSION_REGION_SERVERS[r] for r in REGIONS], dtype=float)
+
+    # Stand-in inference times, drawn for every request so streams match across policies
+    stand_in = np.full(len(table.ids), -1)
+    for src, dst in ADMISSION_DOWNGRADE.items():
+        stand_in[table.codes[src]] = table.codes[dst]
+    alt_codes = stand_in[wl_codes]
+    downgrade_ms = np.where(alt_codes >= 0, table.sample_inference(np.maximum(alt_codes, 0),
+                                                                   np.random.default_rng(seed + 10)), np.nan)
+
+    offered = np.bincount(req_hours, weights=inference_ms, minlength=batch['hours'])
+    peak = (offered >= np.quantile(offered, ADMISSION_PEAK_QUANTILE))[req_hours]
+
+    rows = []
+    for label, ptype, alpha in get_policy_configs():
+        for mode in ('none', 'admission'):
+            idx, outcome, served_ms, queue_ms = route_with_admission(
+                ptype, alpha, req_times, lats, cis, slo, inference_ms, downgrade_ms, servers,
+                admission=mode == 'admission', traffic_scale=traffic_scale)
+            live = idx >= 0
+            rows_live = np.flatnonzero(live)
+            latencies = served_latency(batch, idx, served_ms)[live] + queue_ms[live]
+            good = np.zeros(n, dtype=bool)
+            good[rows_live] = latencies <= slo[live]
+            rows.append({
+                'Policy': label,
+                'Admission': mode,
+                'Goodput (%)': round(100 * good.mean(), 2),
+                'Peak-Hour Goodput (%)': round(100 * good[peak].mean(), 2),
+                'Shed Rate (%)': round(100 * np.mean(outcome == SHED), 2),
+                'Peak-Hour Shed Rate (%)': round(100 * np.mean(outcome[peak] == SHED), 2),
+                'Downgraded (%)': round(100 * np.mean(outcome == DOWNGRADED), 2),
+                'Served SLO Violation Rate (%)': round(100 * np.mean(latencies > slo[live]), 2) if live.any() else 0.0,
+                'Avg Latency (ms)': round(np.mean(latencies), 1) if live.any() else 0.0,
+                'P95 Latency (ms)': round(np.percentile(latencies, 95), 1) if live.any() else 0.0,
+                'Avg Queueing (ms)': round(np.mean(queue_ms[live]), 1) if live.any() else 0.0,
+                'Avg Carbon (gCO2eq/kWh)': round(np.mean(cis[rows_live, idx[live]]), 1) if live.any() else 0.0,
+            })
+
+    return write_results(rows, output_dir, 'admission_results', output_format)
+
+
+if __name__ == '__main__':
+    parser = experiment_parser(rph=ADMISSION_REQUESTS_PER_HOUR)
+    parser.add_argument('--arrivals', choices=ARRIVAL_MODELS, default='nhpp')
+    parser.add_argument('--traffic-scale', type=float, default=ADMISSION_TRAFFIC_SCALE,
+                        help='Real requests each simulated request stands for')
+    args = parser.parse_args()
+    df = run_admission_experiment(**experiment_kwargs(args), arrival_model=args.arrivals,
+                                  traffic_scale=args.traffic_scale)
+    print(df.to_string(index=False))
@@ -0,0 +1,161 @@
+"""
+arrivals.py — Non-stationary request arrivals: diurnal load, time zones and flash crowds.
+
+generate_requests emits exactly rph requests every hour with a fixed user mix.
+Here each user location u has its own arrival rate (requests/hour)
+
+    lambda_u(t) = rph * share_u * diurnal_u(t) * burst_u(t)
+    diurnal_u(t) = 1 + ARRIVAL_DIURNAL_AMPLITUDE * cos(2*pi * (local_hour_u(t) - ARRIVAL_PEAK_LOCAL_HOUR) / 24)
+
+with local_hour_u from USER_UTC_OFFSET_H (simulation hour 0 is 00:00 UTC), so
+the diurnal factor averages to 1 over a day.  Flash crowds arrive as a Poisson
+process (BURSTS_PER_DAY), each multiplying one location's rate by a lognormal
+peak that decays exponentially with BURST_DECAY_S.
+
+Arrivals are a non-homogeneous Poisson process, generated by inversion without
+any sort: the rate is piecewise constant on ARRIVAL_BIN_S bins, so the
+cumulative intensity is piecewise linear; unit-rate arrival points come out
+sorted from cumulative exponential gaps and map back to time with per-bin
+counts and np.repeat.  Each arrival's location is drawn from the locations' rate
+shares in its bin.
+
+Run from src/:  python arrivals.py
+Outputs: ../outputs/tables/arrival_results.csv
+         ../outputs/data/hourly_arrivals.csv
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    SIMULATION_HOURS, REQUESTS_PER_HOUR, RANDOM_SEED, REGIONS, USER_LOCATIONS, USER_DISTRIBUTION,
+    USER_UTC_OFFSET_H, ARRIVAL_DIURNAL_AMPLITUDE, ARRIVAL_PEAK_LOCAL_HOUR, ARRIVAL_BIN_S,
+    BURSTS_PER_DAY, BURST_MAGNITUDE_MEDIAN, BURST_MAGNITUDE_SIGMA, BURST_DECAY_S,
+)
+from policies import get_policy_configs, select_regions_batch
+
+ARRIVAL_MODELS = ('uniform', 'nhpp')
+
+
+def draw_bursts(hours, rng, bursts_per_day=BURSTS_PER_DAY):
+    """Flash crowds as a DataFrame: start_s, user location code, peak multiplier."""
+    n = rng.poisson(bursts_per_day * hours / 24)
+    shares = np.array([USER_DISTRIBUTION[u] for u in USER_LOCATIONS])
+    return pd.DataFrame({
+        'start_s': np.sort(rng.uniform(0, hours * 3600.0, n)),
+        'user_code': rng.choice(len(USER_LOCATIONS), size=n, p=shares / shares.sum()),
+        'magnitude': np.maximum(1.0, rng.lognormal(np.log(BURST_MAGNITUDE_MEDIAN), BURST_MAGNITUDE_SIGMA, n)),
+    })
+
+
+def arrival_rates(hours, rph, bursts=None, bin_s=ARRIVAL_BIN_S, amplitude=ARRIVAL_DIURNAL_AMPLITUDE):
+    """(bins, user locations) arrival rate in requests/hour, evaluated at bin midpoints."""
+    n_bins = int(np.ceil(hours * 3600 / bin_s))
+    mid_h = (np.arange(n_bins) + 0.5) * bin_s / 3600
+    offsets = np.array([USER_UTC_OFFSET_H[u] for u in USER_LOCATIONS])
+    shares = np.array([USER_DISTRIBUTION[u] for u in USER_LOCATIONS])
+    local_h = (mid_h[:, None] + offsets) % 24
+    rates = rph * shares * (1 + amplitude * np.cos(2 * np.pi * (local_h - ARRIVAL_PEAK_LOCAL_HOUR) / 24))
+    if bursts is not None and len(bursts):
+        dt = mid_h[:, None] * 3600 - bursts['start_s'].to_numpy()
+        decay = np.exp(-np.maximum(dt, 0) / BURST_DECAY_S)
+        boost = np.where(dt >= 0, (bursts['magnitude'].to_numpy() - 1) * decay, 0)
+        for u in range(len(USER_LOCATIONS)):
+            mask = bursts['user_code'].to_numpy() == u
+            rates[:, u] *= 1 + boost[:, mask].sum(axis=1)
+    return rates
+
+
+def generate_arrivals(hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOUR, seed=RANDOM_SEED,
+                      bursts_per_day=BURSTS_PER_DAY, bin_s=ARRIVAL_BIN_S):
+    """
+    Non-homogeneous Poisson arrivals: (req_times in seconds, sorted; user_codes;
+    bursts DataFrame).  rph is the mean hourly rate before bursts.
+    """
+    rng = np.random.default_rng(seed)
+    bursts = draw_bursts(hours, rng, bursts_per_day)
+    rates = arrival_rates(hours, rph, bursts, bin_s)
+    total = rates.sum(axis=1)
+    per_bin = total * bin_s / 3600
+    cum = np.r_[0.0, np.cumsum(per_bin)]
+
+    n = rng.poisson(cum[-1])
+    # n sorted uniforms on [0, cum[-1]) from normalized cumulative exponential gaps
+    unit = rng.standard_exponential(n + 1)
+    np.cumsum(unit, out=unit)
+    unit = unit[:-1] * (cum[-1] / unit[-1])
+    # unit is sorted, so per-bin counts come from one small searchsorted and every
+    # per-arrival bin quantity is a np.repeat instead of a gather
+    counts = np.diff(np.searchsorted(unit, cum))
+    counts[-1] += n - counts.sum()
+    req_times = unit
+    req_times -= np.repeat(cum[:-1], counts)
+    req_times *= np.repeat(bin_s / np.maximum(per_bin, 1e-300), counts)
+    req_times += np.repeat(np.arange(len(per_bin)) * float(bin_s), counts)
+
+    # Location by rate share within the bin: inverse CDF over the few locations
+    share_cdf = np.cumsum(rates / total[:, None], axis=1)
+    u = rng.random(n, dtype=np.float32)
+    user_codes = np.zeros(n, dtype=np.int8)
+    for k in range(len(USER_LOCATIONS) - 1):
+        user_codes += u > np.repeat(share_cdf[:, k].astype(np.float32), counts)
+    return req_times, user_codes, bursts
+
+
+def run_arrival_experiment(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOUR,
+                           seed=RANDOM_SEED, output_format='csv', bursts_per_day=BURSTS_PER_DAY):
+    """
+    Route the same policies on the stationary generate_requests stream and on
+    NHPP arrivals of the same mean rate; report peak-hour stress alongside the
+    usual metrics, and the generator's throughput.
+    """
+    # simulation (under experiment) imports this module
+    from experiment import experiment_dirs, policy_metrics, sample_requests, served_latency, write_results
+
+    output_dir = experiment_dirs(output_dir)
+    t0 = time.perf_counter()
+    generate_arrivals(hours, rph * 100, seed, bursts_per_day)
+    gen_s = time.perf_counter() - t0
+
+    rows = []
+    hourly = []
+    for model in ARRIVAL_MODELS:
+        batch = sample_requests(hours, rph, seed, arrival_model=model)
+        req_hours, user_codes, n = batch['req_hours'], batch['user_codes'], batch['n']
+        lats, cis, slo, inference_ms = batch['lats'], batch['cis'], batch['slo'], batch['inference_ms']
+        per_hour = np.bincount(req_hours, minlength=batch['hours'])
+
+        n_users = len(USER_LOCATIONS)
+        counts = np.bincount(req_hours * n_users + user_codes,
+                             minlength=batch['hours'] * n_users).reshape(-1, n_users)
+        hourly.append(pd.DataFrame(counts, columns=USER_LOCATIONS).assign(Arrivals=model)
+                      .rename_axis('hour').reset_index())
+
+        for label, ptype, alpha in get_policy_configs():
+            idx = select_regions_batch(ptype, lats, cis, alpha, slo, inference_ms)
+            latencies = served_latency(batch, idx)
+            region_hour = np.bincount(req_hours * len(REGIONS) + idx, minlength=batch['hours'] * len(REGIONS))
+            rows.append({
+                'Arrivals': model,
+                'Policy': label,
+                'Requests': n,
+                'Peak/Mean Hourly Load': round(per_hour.max() / per_hour.mean(), 2),
+                'Peak Region-Hour Requests': int(region_hour.max()),
+                **policy_metrics(batch, idx, latencies),
+                'Generator (M arrivals/s)': round(hours * rph * 100 / gen_s / 1e6, 1),
+            })
+
+    write_results(pd.concat(hourly, ignore_index=True), output_dir, 'hourly_arrivals', output_format, subdir='data')
+    return write_results(rows, output_dir, 'arrival_results', output_format)
+
+
+if __name__ == '__main__':
+    from experiment import experiment_kwargs, experiment_parser
+
+    parser = experiment_parser(request_log=False)
+    parser.add_argument('--bursts-per-day', type=float, default=BURSTS_PER_DAY)
+    args = parser.parse_args()
+    df = run_arrival_experiment(**experiment_kwargs(args), bursts_per_day=args.bursts_per_day)
+    print(df.to_string(index=False))
@@ -0,0 +1,237 @@
+"""
+autoscaler.py — Per-region replica autoscaling under each routing policy.
+
+Regions used to have unlimited capacity.  Here each region runs a number of
+replicas, set every AUTOSCALE_INTERVAL_S from forecast demand for the traffic
+the active routing policy sends there (each simulated request standing for
+AUTOSCALE_TRAFFIC_SCALE real ones; the experiment samples
+AUTOSCALE_REQUESTS_PER_HOUR by default so that per-region, per-interval
+demand is not dominated by sampling noise).  Demand is the busy time the routed
+requests need (their inference time).  The forecast routes the previous
+interval's requests, and those of the same interval a day earlier, with the
+policy under the coming interval's carbon signal (grid forecasts are published
+ahead), and takes the larger per region, so capacity follows the policy when
+the carbon ranking flips.
+
+Autoscalers:
+
+  static        peak provisioning: every interval gets the reactive autoscaler's
+                largest replica count for that region over the whole run
+  reactive      ceil(forecast busy time / (interval * AUTOSCALE_TARGET_UTILIZATION))
+  slo           the fewest replicas whose predicted mean queueing delay stays
+                within AUTOSCALE_WAIT_BUDGET_MS
+  carbon-aware  the replica counts with the least emissions that keep each
+                interval's mean queueing delay, over all its forecast requests,
+                within AUTOSCALE_WAIT_BUDGET_MS: headroom goes where it cuts
+                the most waiting per gram of idle emissions, so dirty regions
+                run hotter and clean ones absorb the slack
+
+Counts are clipped to AUTOSCALE_MIN_REPLICAS / AUTOSCALE_MAX_REPLICAS.  Added
+replicas serve only after AUTOSCALE_SCALE_UP_DELAY_S but draw idle power while
+booting.  Removed replicas go away at once.  Queueing delay per region and
+interval uses the Sakasegawa M/M/c approximation at the realized utilization,
+plus the mean backlog wait when demand exceeds capacity.  It is added to every
+request's latency.
+
+Energy is replica time at REPLICA_IDLE_POWER_W plus busy time at the extra
+(REPLICA_BUSY_POWER_W - idle) power.  Emissions use the region's carbon
+intensity at each interval's midpoint.
+
+Run from src/:  python autoscaler.py
+Outputs: ../outputs/tables/autoscale_results.csv
+         ../outputs/tables/autoscale_regions.csv
+"""
+
+import numpy as np
+
+from config import (
+    SIMULATION_HOURS, RANDOM_SEED, REGIONS,
+    AUTOSCALE_INTERVAL_S, AUTOSCALE_REQUESTS_PER_HOUR, AUTOSCALE_TRAFFIC_SCALE, AUTOSCALE_MIN_REPLICAS, AUTOSCALE_MAX_REPLICAS,
+    AUTOSCALE_SCALE_UP_DELAY_S, AUTOSCALE_TARGET_UTILIZATION, AUTOSCALE_WAIT_BUDGET_MS,
+    REPLICA_IDLE_POWER_W, REPLICA_BUSY_POWER_W,
+)
+from experiment import (
+    experiment_dirs, experiment_kwargs, experiment_parser, latency_metrics, sample_requests, served_latency,
+    write_results,
+)
+from policies import get_policy_configs, select_regions_batch
+
+AUTOSCALERS = ('static', 'reactive', 'slo', 'carbon-aware')
+MAX_RHO = 0.99      # utilization at which the steady-state queueing formula is capped
+
+
+def queueing_delay_ms(busy_s, replicas, interval_s, service_ms):
+    """
+    Mean queueing delay (ms) for busy_s of work on `replicas` servers over an
+    interval: Sakasegawa's M/M/c approximation, plus the mean wait of the
+    backlog that builds up when demand exceeds capacity.
+    """
+    c = np.maximum(replicas, 1e-9)
+    rho = busy_s / (c * interval_s)
+    capped = np.minimum(rho, MAX_RHO)
+    wait = service_ms * capped ** (np.sqrt(2 * (c + 1)) - 1) / (c * (1 - capped))
+    backlog_s = np.maximum(busy_s - c * interval_s, 0) / c
+    return wait + 500 * backlog_s
+
+
+def routed_demand(cell_idx, k, weights, shift, n_intervals, n_regions):
+    """(intervals, regions) sums of weights, with each request counted `shift` intervals after its own."""
+    target = k + shift
+    keep = target < n_intervals
+    cell = target[keep] * n_regions + cell_idx[keep]
+    return np.bincount(cell, weights=weights[keep], minlength=n_intervals * n_regions).reshape(n_intervals, n_regions)
+
+
+def min_emission_replicas(replicas, busy_fc, service_fc, carbon, demand, interval_s=AUTOSCALE_INTERVAL_S):
+    """
+    Grow replicas until every interval's demand-weighted mean queueing delay is
+    within AUTOSCALE_WAIT_BUDGET_MS, at the least emissions.  Busy energy does not
+    depend on the replica count, so each added replica costs idle power at its
+    region's carbon intensity; adding the one with the largest weighted wait
+    reduction per unit of that cost is optimal while the delay is convex in the
+    replica count, as the M/M/c delay is.
+    """
+    replicas = replicas.copy()
+    rows = np.arange(len(replicas))
+    budget = AUTOSCALE_WAIT_BUDGET_MS * demand.sum(axis=1)
+    wait = demand * queueing_delay_ms(busy_fc, replicas, interval_s, service_fc)
+    short = wait.sum(axis=1) > budget
+    while short.any():
+        up_wait = demand * queueing_delay_ms(busy_fc, replicas + 1, interval_s, service_fc)
+        gain = np.where(replicas < AUTOSCALE_MAX_REPLICAS, (wait - up_wait) / carbon, -np.inf)
+        best = gain.argmax(axis=1)
+        short &= gain[rows, best] > 0
+        replicas[rows[short], best[short]] += 1
+        wait[rows[short], best[short]] = up_wait[rows[short], best[short]]
+        short &= wait.sum(axis=1) > budget
+    return replicas
+
+
+def plan_replicas(autoscaler, busy_fc, service_fc, carbon, interval_s=AUTOSCALE_INTERVAL_S, demand_fc=None):
+    """
+    (intervals, regions) replica counts from forecast busy seconds and mean service
+    time (ms).  demand_fc (forecast request counts, default busy_fc) weights each
+    region's queueing delay in the carbon-aware autoscaler's per-interval mean.
+    """
+    floor = np.array([AUTOSCALE_MIN_REPLICAS[r] for r in REGIONS])
+    reactive = np.ceil(busy_fc / (interval_s * AUTOSCALE_TARGET_UTILIZATION))
+    if autoscaler == 'reactive':
+        replicas = reactive
+    elif autoscaler == 'static':
+        replicas = np.broadcast_to(reactive.max(axis=0), reactive.shape)
+    elif autoscaler == 'slo':
+        # Grow every cell that still misses its budget; at most one step per replica needed
+        replicas = np.maximum(np.ceil(busy_fc / (interval_s * MAX_RHO)), floor)
+        short = queueing_delay_ms(busy_fc, replicas, interval_s, service_fc) > AUTOSCALE_WAIT_BUDGET_MS
+        while short.any():
+            replicas = np.where(short, replicas + 1, replicas)
+            short &= (queueing_delay_ms(busy_fc, replicas, interval_s, service_fc) > AUTOSCALE_WAIT_BUDGET_MS) \
+                & (replicas < AUTOSCALE_MAX_REPLICAS)
+    elif autoscaler == 'carbon-aware':
+        replicas = np.maximum(np.ceil(busy_fc / (interval_s * MAX_RHO)), floor)
+        replicas = min_emission_replicas(replicas, busy_fc, service_fc, carbon,
+                                         busy_fc if demand_fc is None else demand_fc, interval_s)
+    else:
+        raise ValueError(f"Unknown autoscaler '{autoscaler}', expected one of {AUTOSCALERS}")
+    return np.clip(replicas, floor, AUTOSCALE_MAX_REPLICAS)
+
+
+def effective_replicas(replicas, interval_s=AUTOSCALE_INTERVAL_S, delay_s=AUTOSCALE_SCALE_UP_DELAY_S):
+    """Time-averaged serving replicas per interval when added replicas boot for delay_s."""
+    prev = np.vstack([replicas[:1], replicas[:-1]])
+    delay = min(delay_s, interval_s)
+    return (np.minimum(prev, replicas) * delay + replicas * (interval_s - delay)) / interval_s
+
+
+def run_autoscale_experiment(output_dir=None, hours=SIMULATION_HOURS, rph=AUTOSCALE_REQUESTS_PER_HOUR,
+                             seed=RANDOM_SEED, request_log=None, output_format='csv',
+                             autoscalers=AUTOSCALERS, traffic_scale=AUTOSCALE_TRAFFIC_SCALE):
+    """Route with every standard policy, then size each region's replicas with every autoscaler."""
+    output_dir = experiment_dirs(output_dir)
+    batch = sample_requests(hours, rph, seed, request_log)
+    req_times, n = batch['req_times'], batch['n']
+    lats, cis, slo, inference_ms = batch['lats'], batch['cis'], batch['slo'], batch['inference_ms']
+    interval_s = AUTOSCALE_INTERVAL_S
+    n_intervals = int(np.ceil(batch['hours'] * 3600 / interval_s))
+    per_day = int(round(86400 / interval_s))
+    n_regions = len(REGIONS)
+    carbon = batch['carbon'].at((np.arange(n_intervals) + 0.5) * interval_s)
+    k = np.minimum(req_times // interval_s, n_intervals - 1).astype(int)
+
+    rows, region_rows = [], []
+    for label, ptype, alpha in get_policy_configs():
+        idx = select_regions_batch(ptype, lats, cis, alpha, slo, inference_ms)
+        size = n_intervals * n_regions
+        scaled_ms = inference_ms * traffic_scale
+        ones = np.full(n, float(traffic_scale))
+        busy = np.bincount(k * n_regions + idx, weights=scaled_ms / 1000, minlength=size).reshape(n_intervals, n_regions)
+        counts = np.bincount(k * n_regions + idx, weights=ones, minlength=size).reshape(n_intervals, n_regions)
+
+        # Where the policy would send recent traffic under the coming carbon signal
+        fc_busy, fc_counts = [], []
+        for shift in (1, per_day):
+            cis_ahead = batch['carbon'].at(req_times + shift * interval_s)
+            ahead = idx if ptype == 'latency_first' else select_regions_batch(
+                ptype, lats, cis_ahead, alpha, slo, inference_ms)
+            fc_busy.append(routed_demand(ahead, k, scaled_ms / 1000, shift, n_intervals, n_regions))
+            fc_counts.append(routed_demand(ahead, k, ones, shift, n_intervals, n_regions))
+        pick = fc_busy[1] > fc_busy[0]
+        busy_fc = np.where(pick, fc_busy[1], fc_busy[0])
+        counts_fc = np.where(pick, fc_counts[1], fc_counts[0])
+        # The first interval is provisioned for its actual demand
+        busy_fc[0], counts_fc[0] = busy[0], counts[0]
+
+        mean_service = inference_ms.mean()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            service = np.where(counts > 0, 1000 * busy / counts, mean_service)
+            service_fc = np.where(counts_fc > 0, 1000 * busy_fc / counts_fc, mean_service)
+
+        base = served_latency(batch, idx)
+        for autoscaler in autoscalers:
+            replicas = plan_replicas(autoscaler, busy_fc, service_fc, carbon, interval_s, counts_fc)
+            serving = effective_replicas(replicas, interval_s)
+            wait = queueing_delay_ms(busy, serving, interval_s, service)
+            latencies = base + wait[k, idx]
+
+            replica_h = replicas * interval_s / 3600
+            energy_kwh = (replica_h * REPLICA_IDLE_POWER_W
+                          + busy / 3600 * (REPLICA_BUSY_POWER_W - REPLICA_IDLE_POWER_W)) / 1000
+            idle_kwh = np.maximum(replica_h - busy / 3600, 0) * REPLICA_IDLE_POWER_W / 1000
+            emissions_kg = energy_kwh * carbon / 1000
+            util = busy.sum(axis=0) / np.maximum(serving.sum(axis=0) * interval_s, 1e-9)
+            for r, region in enumerate(REGIONS):
+                region_rows.append({
+                    'Policy': label,
+                    'Autoscaler': autoscaler,
+                    'Region': region,
+                    'Replica-Hours': round(replica_h[:, r].sum(), 1),
+                    'Peak Replicas': int(replicas[:, r].max()),
+                    'Utilization (%)': round(100 * util[r], 1),
+                    'Energy (kWh)': round(energy_kwh[:, r].sum(), 1),
+                    'Emissions (kgCO2eq)': round(emissions_kg[:, r].sum(), 1),
+                })
+            rows.append({
+                'Policy': label,
+                'Autoscaler': autoscaler,
+                'Replica-Hours': round(replica_h.sum(), 1),
+                'Utilization (%)': round(100 * busy.sum() / (serving.sum() * interval_s), 1),
+                'Idle Energy (kWh)': round(idle_kwh.sum(), 1),
+                'Energy (kWh)': round(energy_kwh.sum(), 1),
+                'Emissions (kgCO2eq)': round(emissions_kg.sum(), 1),
+                'Avg Queueing (ms)': round(np.mean(wait[k, idx]), 2),
+                **latency_metrics(latencies, slo, percentiles=()),
+            })
+
+    write_results(region_rows, output_dir, 'autoscale_regions', output_format)
+    return write_results(rows, output_dir, 'autoscale_results', output_format)
+
+
+if __name__ == '__main__':
+    parser = experiment_parser(rph=AUTOSCALE_REQUESTS_PER_HOUR)
+    parser.add_argument('--autoscalers', nargs='+', choices=AUTOSCALERS, default=list(AUTOSCALERS))
+    parser.add_argument('--traffic-scale', type=float, default=AUTOSCALE_TRAFFIC_SCALE,
+                        help='Real requests each simulated request stands for')
+    args = parser.parse_args()
+    df = run_autoscale_experiment(**experiment_kwargs(args), autoscalers=args.autoscalers,
+                                  traffic_scale=args.traffic_scale)
+    print(df.to_string(index=False))
@@ -0,0 +1,245 @@
+"""
+cache.py — Per-region inference response caches.
+
+Every request used to pay full inference time and carbon, although much of
+the BERT classification and ResNet-50 similarity traffic repeats inputs.  Each
+request now carries a key drawn from a per-workload Zipf popularity model
+(CACHE_KEY_SPACE keys, exponent CACHE_ZIPF_EXPONENT), and each region keeps a
+response cache of CACHE_CAPACITY entries with LRU or LFU eviction.  A hit is
+served in CACHE_HIT_MS instead of the inference time, and its inference
+energy, and therefore its inference carbon, is saved.
+
+Cache-aware routing tracks, per region and workload, the popularity mass of
+the keys that region holds: the hit probability h of a new request of that
+workload.  Each carbon-aware policy then optimizes its own objective in
+expectation over hits (cache_aware_region):
+
+  Carbon-First        lowest expected inference carbon (1 - h) * inference * intensity
+  Hybrid (alpha)      the usual normalized score, with latency lowered by the
+                      expected time a hit saves and intensity weighted by (1 - h)
+  Constrained Hybrid  the SLO check on expected response time
+                      (RTT + (1 - h) * inference + h * CACHE_HIT_MS), then the
+                      lowest expected inference carbon among eligible regions
+
+With every cache cold (h = 0) each reduces to the cache-blind policy.
+Latency-First ignores carbon and stays cache-blind.  Rerouted reports how
+often cache awareness changes a request's region.
+
+Savings are relative to the same policy without caches: latency saved per
+request, compute (inference ms) saved, and inference carbon saved (inference
+ms weighted by the serving region's carbon intensity).  The carbon saving is
+split into its two sources: routing (the intensity of the regions traffic is
+served from, as if every request ran inference) and cache hits (the inference
+carbon hits avoided there).
+
+Run from src/:  python cache.py
+Outputs: ../outputs/tables/cache_results.csv
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from config import (
+    SIMULATION_HOURS, REQUESTS_PER_HOUR, RANDOM_SEED, REGIONS, WORKLOADS,
+    LATENCY_GLOBAL_MIN, LATENCY_GLOBAL_MAX, CARBON_GLOBAL_MIN, CARBON_GLOBAL_MAX,
+    CACHE_CAPACITY, CACHE_KEY_SPACE, CACHE_ZIPF_EXPONENT, CACHE_HIT_MS,
+)
+from experiment import (
+    experiment_dirs, experiment_kwargs, experiment_parser, policy_metrics, sample_requests, served_latency,
+    write_results,
+)
+from policies import get_policy_configs, select_regions_batch
+
+CACHE_EVICTIONS = ('lru', 'lfu')
+
+
+def zipf_popularity(n_keys, exponent):
+    """Normalized Zipf probabilities of keys 0..n_keys-1 (key 0 most popular)."""
+    weights = 1.0 / np.arange(1, n_keys + 1) ** exponent
+    return weights / weights.sum()
+
+
+def sample_keys(wl_codes, rng, popularity):
+    """Per-request key within its workload's key space, by inverse CDF of the Zipf popularity."""
+    u = rng.random(len(wl_codes))
+    keys = np.zeros(len(wl_codes), dtype=np.int64)
+    for w, p in enumerate(popularity):
+        mask = wl_codes == w
+        keys[mask] = np.minimum(np.searchsorted(np.cumsum(p), u[mask], side='right'), len(p) - 1)
+    return keys
+
+
+class ResponseCache:
+    """Fixed-capacity response cache with LRU or O(1) LFU eviction (LRU among equal counts)."""
+
+    def __init__(self, capacity=CACHE_CAPACITY, eviction='lru'):
+        if eviction not in CACHE_EVICTIONS:
+            raise ValueError(f"Unknown cache eviction '{eviction}', expected one of {CACHE_EVICTIONS}")
+        self.capacity = capacity
+        self.eviction = eviction
+        self.entries = OrderedDict()        # lru: key -> None, oldest first
+        self.freq = {}                      # lfu: key -> access count
+        self.buckets = {}                   # lfu: count -> OrderedDict of keys, oldest first
+        self.min_freq = 0
+
+    def __contains__(self, key):
+        return key in (self.entries if self.eviction == 'lru' else self.freq)
+
+    def _bump(self, key):
+        f = self.freq[key]
+        del self.buckets[f][key]
+        if not self.buckets[f]:
+            del self.buckets[f]
+            if self.min_freq == f:
+                self.min_freq = f + 1
+        self.freq[key] = f + 1
+        self.buckets.setdefault(f + 1, OrderedDict())[key] = None
+
+    def lookup(self, key):
+        """True on a hit (refreshing the entry), False on a miss."""
+        if key not in self:
+            return False
+        if self.eviction == 'lru':
+            self.entries.move_to_end(key)
+        else:
+            self._bump(key)
+        return True
+
+    def insert(self, key):
+        """Cache a missed key; returns the evicted key, or None."""
+        if self.capacity <= 0:
+            return key
+        evicted = None
+        if self.eviction == 'lru':
+            if len(self.entries) >= self.capacity:
+                evicted, _ = self.entries.popitem(last=False)
+            self.entries[key] = None
+            return evicted
+        if len(self.freq) >= self.capacity:
+            evicted, _ = self.buckets[self.min_freq].popitem(last=False)
+            if not self.buckets[self.min_freq]:
+                del self.buckets[self.min_freq]
+            del self.freq[evicted]
+        self.freq[key] = 1
+        self.buckets.setdefault(1, OrderedDict())[key] = None
+        self.min_freq = 1
+        return evicted
+
+
+def cache_aware_region(ptype, alpha, lats, cis, slo_threshold, inference_ms, h, jitter_buffer=9):
+    """
+    One request's region under a policy's objective taken in expectation over
+    cache hits, given per-region hit probabilities h; h = 0 gives select_region.
+    """
+    saved_ms = h * (inference_ms - CACHE_HIT_MS)
+    exp_carbon = (1 - h) * inference_ms * cis
+    if ptype == 'carbon_first':
+        return np.argmin(exp_carbon)
+    if ptype == 'hybrid':
+        norm_l = np.clip((lats - saved_ms - LATENCY_GLOBAL_MIN) / (LATENCY_GLOBAL_MAX - LATENCY_GLOBAL_MIN), 0, 1)
+        norm_c = np.clip(((1 - h) * cis - CARBON_GLOBAL_MIN) / (CARBON_GLOBAL_MAX - CARBON_GLOBAL_MIN), 0, 1)
+        return np.argmin(alpha * norm_l + (1 - alpha) * norm_c)
+    if ptype == 'constrained':
+        exp_lat = lats + inference_ms - saved_ms
+        eligible = exp_lat + jitter_buffer <= slo_threshold
+        if eligible.any():
+            return np.argmin(np.where(eligible, exp_carbon, np.inf))
+        return np.argmin(exp_lat)
+    raise ValueError(f"No cache-aware objective for policy type: {ptype}")
+
+
+def simulate_caches(ptype, alpha, lats, cis, slo, inference_ms, wl_codes, keys, popularity,
+                    eviction='lru', capacity=CACHE_CAPACITY, cache_aware=False):
+    """
+    Route and serve requests in arrival order against per-region caches.
+    Returns (region index, hit mask) per request.  Cache-blind routing is the
+    policy's batch choice; cache-aware routing decides each request on the
+    hit probabilities of the caches as they stand when it arrives.
+    """
+    n = len(wl_codes)
+    n_workloads = len(popularity)
+    caches = [ResponseCache(capacity, eviction) for _ in REGIONS]
+    # Popularity mass of each region's cached keys per workload: the hit probability of a new request
+    cached_mass = np.zeros((len(REGIONS), n_workloads))
+    idx = select_regions_batch(ptype, lats, cis, alpha, slo, inference_ms)
+    hit = np.zeros(n, dtype=bool)
+    wl_list, key_list = np.asarray(wl_codes).tolist(), np.asarray(keys).tolist()
+    for i in range(n):
+        w, k = wl_list[i], key_list[i]
+        if cache_aware:
+            idx[i] = cache_aware_region(ptype, alpha, lats[i], cis[i], slo[i], inference_ms[i], cached_mass[:, w])
+        r = idx[i]
+        key = w * (1 << 40) + k
+        if caches[r].lookup(key):
+            hit[i] = True
+            continue
+        evicted = caches[r].insert(key)
+        cached_mass[r, w] += popularity[w][k]
+        if evicted is not None:
+            ew, ek = divmod(evicted, 1 << 40)
+            cached_mass[r, ew] -= popularity[ew][ek]
+    return idx, hit
+
+
+def run_cache_experiment(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOUR,
+                         seed=RANDOM_SEED, request_log=None, output_format='csv',
+                         evictions=CACHE_EVICTIONS, capacity=CACHE_CAPACITY):
+    """
+    Every standard policy without caches, then with per-region caches under each
+    eviction rule, cache-blind and (for the carbon-aware policies) cache-aware.
+    """
+    output_dir = experiment_dirs(output_dir)
+    batch = sample_requests(hours, rph, seed, request_log, time_order=True)
+    wl_codes, rows_n = batch['wl_codes'], batch['rows']
+    lats, cis, slo, inference_ms = batch['lats'], batch['cis'], batch['slo'], batch['inference_ms']
+    table = batch['table']
+    popularity = [zipf_popularity(CACHE_KEY_SPACE[wid], CACHE_ZIPF_EXPONENT[wid]) for wid in table.ids]
+    keys = sample_keys(wl_codes, np.random.default_rng(seed + 11), popularity)
+
+    rows = []
+    for label, ptype, alpha in get_policy_configs():
+        base_idx = select_regions_batch(ptype, lats, cis, alpha, slo, inference_ms)
+        base_lat = served_latency(batch, base_idx)
+        base_compute = inference_ms.sum()
+        base_carbon = (inference_ms * cis[rows_n, base_idx]).sum()
+        routings = ['cache-blind'] if ptype == 'latency_first' else ['cache-blind', 'cache-aware']
+        for eviction in evictions:
+            for routing in routings:
+                idx, hit = simulate_caches(ptype, alpha, lats, cis, slo, inference_ms, wl_codes, keys,
+                                           popularity, eviction, capacity, routing == 'cache-aware')
+                served_ms = np.where(hit, CACHE_HIT_MS, inference_ms)
+                latencies = served_latency(batch, idx, served_ms)
+                compute = np.where(hit, 0.0, inference_ms)
+                routed_carbon = inference_ms * cis[rows_n, idx]
+                row = {
+                    'Policy': label,
+                    'Eviction': eviction,
+                    'Routing': routing,
+                    'Hit Rate (%)': round(100 * hit.mean(), 2),
+                    'Rerouted (%)': round(100 * np.mean(idx != base_idx), 2),
+                }
+                for w, wid in enumerate(table.ids):
+                    mask = wl_codes == w
+                    row[f'{WORKLOADS[wid]["model"]} Hit Rate (%)'] = round(100 * hit[mask].mean(), 2) \
+                        if mask.any() else 0.0
+                row.update({
+                    **policy_metrics(batch, idx, latencies),
+                    'Latency Saved (ms)': round(np.mean(base_lat) - np.mean(latencies), 1),
+                    'Compute Saved (%)': round(100 * (1 - compute.sum() / base_compute), 1),
+                    'Routing Carbon Saved (%)': round(100 * (1 - routed_carbon.sum() / base_carbon), 1),
+                    'Cache Carbon Saved (%)': round(100 * routed_carbon[hit].sum() / base_carbon, 1),
+                    'Inference Carbon Saved (%)': round(100 * (1 - routed_carbon[~hit].sum() / base_carbon), 1),
+                })
+                rows.append(row)
+
+    return write_results(rows, output_dir, 'cache_results', output_format)
+
+
+if __name__ == '__main__':
+    parser = experiment_parser()
+    parser.add_argument('--evictions', nargs='+', choices=CACHE_EVICTIONS, default=list(CACHE_EVICTIONS))
+    parser.add_argument('--capacity', type=int, default=CACHE_CAPACITY, help='Cache entries per region')
+    args = parser.parse_args()
+    df = run_cache_experiment(**experiment_kwargs(args), evictions=args.evictions, capacity=args.capacity)
+    print(df.to_string(index=False))
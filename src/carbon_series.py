@@ -0,0 +1,263 @@
+"""
+carbon_series.py — Arbitrary-resolution carbon intensity series with O(1) lookups.
+
+The simulator looks carbon up as ci_arr[req_hours], so intensity is constant
+within each hour.  Grid signals arrive every 5-15 minutes.  CarbonSeries holds
+per-region intensity on a fixed-step grid (any step, in seconds) and looks up
+request timestamps by direct integer bucketing,
+
+    bucket = floor((t - start_s) / step_s)
+
+which is one vectorized pass over the request times.  Irregularly timestamped
+samples are put on such a grid once, with the step set to the GCD of their
+offsets, so each grid bucket maps to exactly one source interval.  Optional
+linear interpolation treats every value as the mean of its interval, centred
+on the interval's midpoint.  resample() converts between resolutions, so hourly
+traces from generate_carbon_traces keep working unchanged.
+
+Run from src/:  python carbon_series.py
+Outputs: ../outputs/tables/carbon_resolution_results.csv
+"""
+
+import time
+from math import gcd
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    REGIONS, SIMULATION_HOURS, REQUESTS_PER_HOUR, RANDOM_SEED,
+    CARBON_SUBHOURLY_STEP_S, CARBON_SUBHOURLY_NOISE, CARBON_SUBHOURLY_AR,
+    CARBON_RESOLUTIONS_S, CARBON_MAX_GRID_BUCKETS,
+)
+from policies import get_policy_configs, select_regions_batch
+from storage import read_table
+
+RESAMPLE_METHODS = ('mean', 'ffill', 'interpolate')
+
+
+class CarbonSeries:
+    """Per-region carbon intensity on a fixed-step grid starting at start_s."""
+
+    def __init__(self, values, step_s=3600, start_s=0.0, regions=REGIONS):
+        self.values = np.asarray(values, dtype=float)
+        if self.values.ndim != 2 or self.values.shape[1] != len(regions):
+            raise ValueError(f"Carbon series values must be (steps, {len(regions)}), got {self.values.shape}")
+        if step_s <= 0:
+            raise ValueError(f"Carbon series step must be positive, got {step_s}")
+        self.step_s = float(step_s)
+        self.start_s = float(start_s)
+        self.regions = list(regions)
+
+    @classmethod
+    def from_hourly(cls, carbon_df, start_s=0.0):
+        """Wrap an hourly trace (generate_carbon_traces output) without copying its layout."""
+        return cls(carbon_df[REGIONS].to_numpy(), 3600, start_s)
+
+    @classmethod
+    def from_samples(cls, times_s, values, regions=REGIONS, max_buckets=CARBON_MAX_GRID_BUCKETS):
+        """
+        Irregular samples (value i holds from times_s[i] until times_s[i + 1]) put on
+        a fixed grid whose step is the GCD of the integer-second offsets.  The
+        interval index is computed once here; lookups stay integer bucketing.
+        """
+        times_s = np.asarray(times_s, dtype=float)
+        values = np.asarray(values, dtype=float)
+        order = np.argsort(times_s, kind='stable')
+        times_s, values = times_s[order], values[order]
+        offsets = np.round(times_s - times_s[0]).astype(np.int64)
+        if len(offsets) > 1 and (np.diff(offsets) <= 0).any():
+            raise ValueError("Carbon samples must have distinct whole-second timestamps")
+        diffs = np.diff(offsets)
+        step = int(reduce(gcd, diffs.tolist(), 0)) or 3600
+        # Last sample holds for the typical sample spacing
+        span = int(offsets[-1] + (np.median(diffs) if len(diffs) else step))
+        n_buckets = -(-span // step)
+        if n_buckets > max_buckets:
+            raise ValueError(f"Carbon samples need {n_buckets} grid buckets at a {step}s step "
+                             f"(limit {max_buckets}); resample them first")
+        interval = np.searchsorted(offsets, np.arange(n_buckets) * step, side='right') - 1
+        return cls(values[interval], step, times_s[0], regions)
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def end_s(self):
+        return self.start_s + len(self) * self.step_s
+
+    def bucket(self, times_s):
+        """Grid bucket per timestamp; times outside the series clamp to its ends."""
+        idx = np.floor((np.asarray(times_s, dtype=float) - self.start_s) / self.step_s).astype(np.int64)
+        return np.clip(idx, 0, len(self) - 1)
+
+    def at(self, times_s, interpolate=False):
+        """(len(times_s), regions) carbon intensity at each timestamp."""
+        if not interpolate:
+            return self.values[self.bucket(times_s)]
+        pos = (np.asarray(times_s, dtype=float) - self.start_s) / self.step_s - 0.5
+        lo = np.clip(np.floor(pos).astype(np.int64), 0, len(self) - 1)
+        hi = np.minimum(lo + 1, len(self) - 1)
+        frac = np.clip(pos - lo, 0.0, 1.0)[:, None]
+        return self.values[lo] * (1 - frac) + self.values[hi] * frac
+
+    def lookup_rows(self, times_s, interpolate=False):
+        """
+        (table, row index) so that table[idx[i]] is request i's carbon vector.
+        Without interpolation the table is the series itself and idx the buckets,
+        so per-request loops pay one integer index and no (N, regions) copy.
+        """
+        if not interpolate:
+            return self.values, self.bucket(times_s)
+        return self.at(times_s, interpolate=True), np.arange(len(times_s))
+
+    def to_frame(self):
+        df = pd.DataFrame(self.values, columns=self.regions)
+        df.insert(0, 'timestamp', self.start_s + np.arange(len(self)) * self.step_s)
+        return df
+
+
+def resample(series, step_s, how='mean'):
+    """
+    The series on a new step over the same span.  'mean' averages the source
+    buckets starting inside each new bucket (falls back to 'ffill' where the new
+    step is finer); 'ffill' holds each value; 'interpolate' samples the linear
+    interpolation at each new bucket's midpoint.
+    """
+    if how not in RESAMPLE_METHODS:
+        raise ValueError(f"Unknown resample method '{how}', expected one of {RESAMPLE_METHODS}")
+    n = int(np.ceil((series.end_s - series.start_s) / step_s - 1e-9))
+    mids = series.start_s + (np.arange(n) + 0.5) * step_s
+    if how == 'interpolate':
+        return CarbonSeries(series.at(mids, interpolate=True), step_s, series.start_s, series.regions)
+    if how == 'ffill' or step_s <= series.step_s:
+        return CarbonSeries(series.at(mids), step_s, series.start_s, series.regions)
+    src_starts = np.arange(len(series)) * series.step_s
+    target = np.minimum((src_starts // step_s).astype(np.int64), n - 1)
+    counts = np.bincount(target, minlength=n)
+    sums = np.stack([np.bincount(target, weights=series.values[:, r], minlength=n)
+                     for r in range(series.values.shape[1])], axis=1)
+    return CarbonSeries(sums / np.maximum(counts, 1)[:, None], step_s, series.start_s, series.regions)
+
+
+def load_carbon_series(path):
+    """
+    Read a carbon table (any storage backend) with a 'timestamp' column, as epoch
+    seconds or ISO-8601 strings, and one column per region.
+    """
+    df = read_table(path)
+    missing = [c for c in ['timestamp'] + REGIONS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Carbon series {path} is missing columns {missing}")
+    ts = df['timestamp']
+    if not pd.api.types.is_numeric_dtype(ts):
+        ts = pd.to_datetime(ts, utc=True, format='ISO8601').dt.as_unit('ns').astype('int64') / 1e9
+    return CarbonSeries.from_samples(ts.to_numpy(dtype=float), df[REGIONS].to_numpy(dtype=float))
+
+
+def align_to_run(series, origin_s=None):
+    """
+    The series on the run's clock, where t=0 is the epoch time origin_s (default:
+    the series' own start).  Shifting by the run origin rather than the series'
+    first sample keeps it aligned with request times taken from the same origin.
+    """
+    if origin_s is None:
+        origin_s = series.start_s
+    return CarbonSeries(series.values, series.step_s, series.start_s - origin_s, series.regions)
+
+
+def generate_subhourly_carbon_traces(hours=SIMULATION_HOURS, step_s=CARBON_SUBHOURLY_STEP_S,
+                                     seed=RANDOM_SEED):
+    """
+    The hourly generate_carbon_traces signal interpolated to step_s, with AR(1)
+    multiplicative noise for the intra-hour movement the hourly trace averages out.
+    """
+    from simulation import generate_carbon_traces   # simulation imports this module
+
+    hourly = CarbonSeries.from_hourly(generate_carbon_traces(hours, seed=seed))
+    fine = resample(hourly, step_s, 'interpolate')
+    rng = np.random.default_rng(seed + 6)
+    shocks = rng.normal(0, CARBON_SUBHOURLY_NOISE * np.sqrt(1 - CARBON_SUBHOURLY_AR ** 2), fine.values.shape)
+    noise = np.empty_like(shocks)
+    noise[0] = shocks[0]
+    for k in range(1, len(noise)):
+        noise[k] = CARBON_SUBHOURLY_AR * noise[k - 1] + shocks[k]
+    return CarbonSeries(np.maximum(5, fine.values * (1 + noise)), step_s)
+
+
+def run_carbon_resolution_experiment(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOUR,
+                                     seed=RANDOM_SEED, request_log=None, output_format='csv',
+                                     carbon_series=None, resolutions=CARBON_RESOLUTIONS_S):
+    """
+    Route with the carbon signal seen at each resolution (with and without
+    interpolation) and score every decision against the finest signal at the
+    request's timestamp.  Decisions Changed compares with routing on that
+    finest signal directly.
+    """
+    # simulation (under experiment) imports this module
+    from experiment import experiment_dirs, latency_metrics, sample_requests, served_latency, write_results
+
+    output_dir = experiment_dirs(output_dir)
+    batch = sample_requests(hours, rph, seed, request_log, carbon_series=carbon_series)
+    req_times, n, rows_n = batch['req_times'], batch['n'], batch['rows']
+    lats, slo, inference_ms = batch['lats'], batch['slo'], batch['inference_ms']
+    if carbon_series is None:
+        truth = generate_subhourly_carbon_traces(batch['hours'], seed=seed)
+    else:
+        truth = batch['carbon']
+    true_cis = truth.at(req_times)
+    labels = {label: (ptype, alpha) for label, ptype, alpha in get_policy_configs()}
+
+    compared = [label for label in labels if label != 'Latency-First']
+    finest = {}
+    for label in compared:
+        ptype, alpha = labels[label]
+        finest[label] = select_regions_batch(ptype, lats, true_cis, alpha, slo, inference_ms)
+
+    views = []
+    for step in sorted(resolutions, reverse=True):
+        view = truth if step == truth.step_s else resample(truth, step, 'mean')
+        views.append((view, False))
+        views.append((view, True))
+
+    rows = []
+    for view, interpolate in views:
+        t0 = time.perf_counter()
+        seen_cis = view.at(req_times, interpolate=interpolate)
+        lookup_ns = 1e9 * (time.perf_counter() - t0) / n
+        signal_error = np.mean(np.abs(seen_cis - true_cis))
+        base_idx = select_regions_batch('latency_first', lats, seen_cis, None, slo, inference_ms)
+        base_carbon = np.mean(true_cis[rows_n, base_idx])
+        for label in compared:
+            ptype, alpha = labels[label]
+            idx = select_regions_batch(ptype, lats, seen_cis, alpha, slo, inference_ms)
+            latencies = served_latency(batch, idx)
+            carbon = np.mean(true_cis[rows_n, idx])
+            rows.append({
+                'Policy': label,
+                'Carbon Resolution (min)': round(view.step_s / 60, 2),
+                'Interpolated': interpolate,
+                **latency_metrics(latencies, slo, percentiles=()),
+                'Avg Carbon (gCO2eq/kWh)': round(carbon, 2),
+                'Carbon Reduction': round(100 * (1 - carbon / base_carbon), 2),
+                'Signal Error (gCO2eq/kWh)': round(signal_error, 2),
+                'Decisions Changed (%)': round(100 * np.mean(idx != finest[label]), 2),
+                'Lookup (ns/request)': round(lookup_ns, 1),
+            })
+
+    return write_results(rows, output_dir, 'carbon_resolution_results', output_format)
+
+
+if __name__ == '__main__':
+    from experiment import experiment_kwargs, experiment_parser
+
+    parser = experiment_parser()
+    parser.add_argument('--carbon-series', default=None,
+                        help='Carbon table with a timestamp column (default: synthetic 5-minute series)')
+    parser.add_argument('--resolutions', type=int, nargs='+', default=CARBON_RESOLUTIONS_S,
+                        help='Routing signal resolutions to compare, in seconds')
+    args = parser.parse_args()
+    df = run_carbon_resolution_experiment(**experiment_kwargs(args), carbon_series=args.carbon_series,
+                                          resolutions=args.resolutions)
+    print(df.to_string(index=False))
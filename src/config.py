@@ -10,6 +10,12 @@ WORKLOADS = {
         "slo_threshold_ms": 100,
         "probability": 0.60,
         "description": "Real-time text classification",
+        "cold_start_ms": 1800,
+        "model_memory_gb": 0.45,
+        "request_kb_median": 2,
+        "request_kb_sigma": 0.5,
+        "response_kb_median": 0.5,
+        "response_kb_sigma": 0.3,
     },
     "bert_large": {
         "name": "BERT-large Question Answering",
@@ -19,6 +25,12 @@ WORKLOADS = {
         "slo_threshold_ms": 150,
         "probability": 0.30,
         "description": "Q&A system",
+        "cold_start_ms": 4200,
+        "model_memory_gb": 1.35,
+        "request_kb_median": 6,
+        "request_kb_sigma": 0.6,
+        "response_kb_median": 1,
+        "response_kb_sigma": 0.3,
     },
     "resnet50": {
         "name": "ResNet-50 Image Embedding",
@@ -28,6 +40,12 @@ WORKLOADS = {
         "slo_threshold_ms": 80,
         "probability": 0.10,
         "description": "Image similarity search",
+        "cold_start_ms": 900,
+        "model_memory_gb": 0.10,
+        "request_kb_median": 300,
+        "request_kb_sigma": 0.5,
+        "response_kb_median": 8,
+        "response_kb_sigma": 0.05,
     },
 }
 
@@ -56,6 +74,17 @@ LATENCY_DATA = {
 
 LATENCY_MATRIX = pd.DataFrame(LATENCY_DATA, index=USER_LOCATIONS)
 
+# Uncontended per-flow throughput (Mbps) for each user location -> region path
+PATH_BANDWIDTH_DATA = {
+    'US-East':    [1000, 400,  150, 60],
+    'US-West':    [400,  1000, 100, 80],
+    'EU-West':    [150,  100,  800, 70],
+    'EU-North':   [130,  90,   500, 60],
+    'Singapore':  [60,   80,   70,  1000],
+}
+
+PATH_BANDWIDTH_MATRIX = pd.DataFrame(PATH_BANDWIDTH_DATA, index=USER_LOCATIONS)
+
 SIMULATION_HOURS = 168
 REQUESTS_PER_HOUR = 200
 
@@ -81,6 +110,141 @@ CARBON_GLOBAL_MAX = 450       # Approx max: Singapore(367) x 1.2 diurnal amplitu
 NETWORK_JITTER_MEAN = 0
 NETWORK_JITTER_STD = 3
 
+# Warm-pool / cold-start model (warm_pool.py)
+# Accelerator memory reserved for models.  All three models (1.9 GB) fit in the large regions; the
+# smaller US-West and Singapore pools hold BERT-base + BERT-large but not ResNet-50 too, so they evict
+REGION_MODEL_MEMORY_GB = {'US-East': 2.0, 'US-West': 1.85, 'EU-West': 2.0, 'EU-North': 2.0, 'Singapore': 1.85}
+WARM_POOL_EVICTION = 'ttl'     # 'lru' = evict only under memory pressure, 'ttl' = also unload idle models
+WARM_POOL_TTL_S = 1800         # idle time before a model is unloaded under 'ttl'
+WARM_POOL_TRAFFIC_SCALE = 50   # real requests each simulated request stands for (idle gaps shrink by this)
+PLACEMENT_MIN_CARBON_GAIN = 100  # gCO2eq/kWh a cold region must save to justify a model load
+
+# Straggler / hedged-request model (hedging.py)
+STRAGGLER_PROBABILITY = 0.02     # fraction of executions hit by a slow server
+STRAGGLER_MIN_SLOWDOWN = 2.0     # straggler inference time x MIN_SLOWDOWN x (1 + Lomax(shape))
+STRAGGLER_PARETO_SHAPE = 1.5
+HEDGE_DELAY_VALUES = [0, 10, 25, 50]   # ms of slack past the expected response before duplicating
+HEDGE_DEADLINE_QUANTILE = 0.95         # inference-time quantile the router expects a response by
+
+# Path-specific network latency model (network.py)
+PATH_JITTER_DISTRIBUTION = 'lognormal'   # 'lognormal' or 'pareto' tail on top of the base RTT
+PATH_JITTER_RTT_FRACTION = 0.04          # jitter scale as a fraction of the path RTT
+PATH_JITTER_MIN_MS = 1.0                 # jitter scale floor for intra-region hops
+PATH_JITTER_LOGNORMAL_SIGMA = 0.9
+PATH_JITTER_PARETO_SHAPE = 2.5
+CONGESTION_EPISODE_PROB = 0.03           # chance a path is congested in a given hour
+CONGESTION_RTT_INFLATION = 0.5           # extra RTT fraction while congested
+PATH_BUFFER_QUANTILE = 0.99              # quantile used to size per-path SLO buffers
+
+# Feedback-controlled hybrid alpha (adaptive_alpha.py)
+ADAPTIVE_ALPHA_TARGET_VIOLATION = 0.01   # per-workload SLO-violation budget (fraction)
+ADAPTIVE_ALPHA_INITIAL = 0.7
+ADAPTIVE_ALPHA_KP = 1.5                  # alpha change per unit of violation-rate error
+ADAPTIVE_ALPHA_KI = 0.3                  # integral gain, applied once per interval
+ADAPTIVE_ALPHA_INTERVAL_HOURS = 1
+
+# Live latency telemetry (telemetry.py)
+TELEMETRY_EWMA_ALPHA = 0.02          # per-sample EWMA weight for path latency estimates
+TELEMETRY_TAIL_QUANTILE = 0.99       # tail latency tracked per path
+TELEMETRY_PROBES_PER_PATH = 10       # synthetic probes per path per hour keeping idle paths fresh
+
+# Concurrent router core benchmark (router.py)
+ROUTER_BENCH_THREADS = [1, 2, 4, 8]
+ROUTER_BENCH_BATCH = 4096            # requests per routing call in batch mode
+ROUTER_CARBON_UPDATE_HZ = 200        # carbon snapshot swaps per second during the benchmark
+
+# Sub-hourly carbon signals (carbon_series.py)
+CARBON_SUBHOURLY_STEP_S = 300        # synthetic grid-signal resolution (5 minutes)
+CARBON_SUBHOURLY_NOISE = 0.08        # stationary std of the multiplicative intra-hour noise
+CARBON_SUBHOURLY_AR = 0.9            # AR(1) coefficient of that noise per step
+CARBON_RESOLUTIONS_S = [3600, 900, 300]  # routing-signal resolutions compared
+CARBON_MAX_GRID_BUCKETS = 50_000_000     # cap for putting irregular samples on a grid
+
+# Payload transfer and link contention (transfer.py)
+REGION_LINK_CAPACITY_GBPS = {        # ingress capacity available to inference traffic
+    'US-East': 40, 'US-West': 20, 'EU-West': 20, 'EU-North': 10, 'Singapore': 10,
+}
+CONTINENT_OF = {                     # user locations and regions -> continent
+    'US-East': 'NA', 'US-West': 'NA', 'EU': 'EU', 'EU-West': 'EU', 'EU-North': 'EU',
+    'Asia': 'Asia', 'Singapore': 'Asia',
+}
+TCP_INIT_CWND_KB = 14.6              # 10 segments; larger payloads pay extra slow-start RTTs
+TRANSFER_TRAFFIC_SCALE = 400_000     # real requests each simulated request stands for on a link
+LINK_MIN_FREE_SHARE = 0.02           # floor on the free link share when a link is saturated
+
+# Non-stationary arrivals (arrivals.py)
+USER_UTC_OFFSET_H = {'US-East': -5, 'US-West': -8, 'EU': 1, 'Asia': 8}  # simulation hour 0 = 00:00 UTC
+ARRIVAL_DIURNAL_AMPLITUDE = 0.6      # rate swing around each location's daily mean
+ARRIVAL_PEAK_LOCAL_HOUR = 14         # local hour of peak traffic
+ARRIVAL_BIN_S = 60                   # rate resolution; the rate is constant within a bin
+BURSTS_PER_DAY = 1.0                 # flash crowds per day (Poisson), each hitting one location
+BURST_MAGNITUDE_MEDIAN = 4.0         # peak rate multiplier, lognormal around this median
+BURST_MAGNITUDE_SIGMA = 0.5
+BURST_DECAY_S = 900                  # exponential decay time constant of a burst
+
+# Fault injection and failover (faults.py)
+FAULT_SCHEDULE = [                   # kind: outage (severity unused), capacity (fraction of
+    # requests rejected), latency (ms added); times in simulation hours
+    {'region': 'EU-North', 'start_h': 30, 'end_h': 33, 'kind': 'outage', 'severity': 1.0},
+    {'region': 'EU-North', 'start_h': 80, 'end_h': 86, 'kind': 'capacity', 'severity': 0.6},
+    {'region': 'US-West', 'start_h': 120, 'end_h': 124, 'kind': 'latency', 'severity': 80.0},
+]
+FAULT_BIN_S = 10                     # resolution of the compiled fault and health grids
+FAULT_TIMEOUT_MS = 1000              # latency of a request sent to a region that cannot serve it
+FAULT_DETECTION_S = 60               # health checks notice an impairment after this long
+FAULT_HOLDDOWN_S = 300               # a recovered region stays drained this long before re-admission
+FAULT_UNHEALTHY_REJECT = 0.5         # rejected share at or above which a region is marked unhealthy
+
+# Carbon-aware autoscaling (autoscaler.py)
+AUTOSCALE_INTERVAL_S = 900           # scaling decision interval
+AUTOSCALE_REQUESTS_PER_HOUR = 5000   # default sample rate, so interval x region counts are not mostly noise
+AUTOSCALE_TRAFFIC_SCALE = 400        # real requests each simulated request stands for
+AUTOSCALE_MIN_REPLICAS = {r: 1 for r in REGIONS}  # floor kept in every region
+AUTOSCALE_MAX_REPLICAS = 1000        # per-region ceiling
+AUTOSCALE_SCALE_UP_DELAY_S = 300     # boot time before an added replica serves traffic
+AUTOSCALE_TARGET_UTILIZATION = 0.6   # reactive autoscaler's utilization target
+AUTOSCALE_WAIT_BUDGET_MS = 2.0       # mean queueing delay the SLO-driven autoscalers plan for
+REPLICA_IDLE_POWER_W = 150           # replica power draw when idle (or booting)
+REPLICA_BUSY_POWER_W = 400           # replica power draw while serving
+
+# Hourly metric cubes (timeseries.py)
+TIMESERIES_QUANTILES = [0.5, 0.95, 0.99]  # latency quantiles per hour x region x workload cell
+TIMESERIES_FORMAT = 'npz'            # compressed backend for data/hourly_metrics
+
+# Admission control and load shedding (admission.py)
+ADMISSION_REQUESTS_PER_HOUR = 5000   # default sample rate of the (NHPP) overload scenario
+ADMISSION_TRAFFIC_SCALE = 50         # real requests each simulated request stands for
+ADMISSION_REGION_SERVERS = {         # serving replicas per region (fixed; see autoscaler.py for sizing)
+    'US-East': 3, 'US-West': 2, 'EU-West': 2, 'EU-North': 3, 'Singapore': 2,
+}
+ADMISSION_BIN_S = 60                 # queue estimates are refreshed once per bin
+ADMISSION_JITTER_BUFFER_MS = 9       # same allowance as constrained_hybrid's jitter_buffer
+ADMISSION_DOWNGRADE = {'bert_large': 'bert_base'}  # cheaper model that may serve a request instead of shedding it
+ADMISSION_PEAK_QUANTILE = 0.9        # hours at or above this offered-load quantile count as peak hours
+
+# Response caches (cache.py)
+CACHE_CAPACITY = 2000                # cached responses per region, all workloads together
+CACHE_KEY_SPACE = {'bert_base': 100_000, 'bert_large': 1_000_000, 'resnet50': 50_000}
+CACHE_ZIPF_EXPONENT = {'bert_base': 1.1, 'bert_large': 0.8, 'resnet50': 1.2}  # key popularity skew
+CACHE_HIT_MS = 2                     # lookup and response time of a cache hit
+
+# Checkpoint / resume (simulation.py)
+SIMULATION_CHECKPOINT_EVERY = 500_000  # requests per policy between checkpoints; None disables
+
+# Sharded sweeps (sweep.py)
+SWEEP_LEASE_S = 600                  # a running item with no heartbeat for this long is re-queued
+SWEEP_HEARTBEAT_S = 30               # worker heartbeat interval while an item runs
+SWEEP_MAX_ATTEMPTS = 3               # claims per item before it is marked failed
+
+# Variance-reduction study (variance.py)
+VR_REPLICATIONS = 40                 # independent replications per sampling mode
+VR_CONFIDENCE_Z = 1.96               # 95% two-sided
+VR_TARGET_HALF_WIDTH = {             # CI half-width targets for policy-difference estimators
+    'Avg Latency (ms)': 0.5,
+    'SLO Violation Rate (%)': 0.25,
+    'Avg Carbon (gCO2eq/kWh)': 0.5,
+}
+
 def get_workload_list():
     return list(WORKLOADS.keys())
 
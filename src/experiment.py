@@ -0,0 +1,131 @@
+"""
+experiment.py — Shared harness for the vectorized policy experiments.
+
+The feature experiments (adaptive alpha, payload transfer, faults, autoscaling,
+admission control, response caches, ...) evaluate the standard policies on
+run_simulation's request stream with pre-drawn samples and
+select_regions_batch.  The steps they have in common live here:
+
+  experiment_dirs    the output directory (default ../outputs) with tables/ and data/
+  sample_requests    prepare_inputs plus one bulk draw of inference times, SLOs
+                     and network jitter from default_rng(seed), optionally in
+                     arrival order, and each request's latency / carbon rows
+  served_latency     RTT + inference + jitter at the chosen regions, floored at 1 ms
+  policy_metrics     the latency, SLO and carbon columns most tables report
+  write_results      rows -> table in any storage backend, optionally with
+                     Carbon Reduction against a baseline policy
+  experiment_parser  the command-line flags every experiment takes
+
+so each experiment module only holds how it routes and what it measures.
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import SIMULATION_HOURS, REQUESTS_PER_HOUR, RANDOM_SEED, NETWORK_JITTER_MEAN, NETWORK_JITTER_STD
+from simulation import prepare_inputs
+from storage import TABLE_FORMATS, write_table
+from workload_table import WorkloadTable
+
+PER_REQUEST_INPUTS = ('req_times', 'req_hours', 'user_codes', 'wl_codes')
+
+
+def experiment_dirs(output_dir=None):
+    """output_dir (default ../outputs) with its tables/ and data/ subdirectories created."""
+    if output_dir is None:
+        output_dir = str(Path(__file__).parent.parent / 'outputs')
+    os.makedirs(f'{output_dir}/tables', exist_ok=True)
+    os.makedirs(f'{output_dir}/data', exist_ok=True)
+    return output_dir
+
+
+def sample_requests(hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOUR, seed=RANDOM_SEED, request_log=None,
+                    arrival_model='uniform', time_order=False, carbon_series=None):
+    """
+    prepare_inputs extended with the per-request samples every experiment shares:
+    table (WorkloadTable), inference_ms, slo and jitter drawn in that order from
+    default_rng(seed), lats / cis (N, regions) from the latency table and hourly
+    carbon, rows (arange(N)) and n.  With time_order the per-request inputs are
+    sorted by arrival time first, for experiments that replay state in order.
+    """
+    batch = prepare_inputs(hours, rph, seed, request_log, carbon_series, arrival_model)
+    if time_order:
+        order = np.argsort(batch['req_times'], kind='stable')
+        for key in PER_REQUEST_INPUTS:
+            batch[key] = np.asarray(batch[key])[order]
+    batch['req_times'] = np.asarray(batch['req_times'], dtype=float)
+    n = len(batch['req_hours'])
+    table = WorkloadTable()
+    rng = np.random.default_rng(seed)
+    inference_ms, slo = table.sample(batch['wl_codes'], rng)
+    batch.update({
+        'table': table,
+        'inference_ms': inference_ms,
+        'slo': slo,
+        'jitter': np.maximum(0, rng.normal(NETWORK_JITTER_MEAN, NETWORK_JITTER_STD, n)),
+        'lats': batch['lat_lookup'][batch['user_codes']].astype(float),
+        'cis': batch['ci_arr'][batch['req_hours']],
+        'rows': np.arange(n),
+        'n': n,
+    })
+    return batch
+
+
+def served_latency(batch, idx, served_ms=None):
+    """End-to-end latency at regions idx; served_ms replaces the sampled inference time."""
+    served_ms = batch['inference_ms'] if served_ms is None else served_ms
+    return np.maximum(1.0, batch['lats'][batch['rows'], idx] + served_ms + batch['jitter'])
+
+
+def latency_metrics(latencies, slo, percentiles=(95,)):
+    """Avg, P<q> and SLO violation columns for one policy's latencies."""
+    metrics = {'Avg Latency (ms)': round(np.mean(latencies), 1)}
+    for q in percentiles:
+        metrics[f'P{q} Latency (ms)'] = round(np.percentile(latencies, q), 1)
+    metrics['SLO Violation Rate (%)'] = round(100 * np.mean(latencies > slo), 2)
+    return metrics
+
+
+def policy_metrics(batch, idx, latencies, percentiles=(95,)):
+    """latency_metrics plus the mean carbon intensity at the chosen regions."""
+    metrics = latency_metrics(latencies, batch['slo'], percentiles)
+    metrics['Avg Carbon (gCO2eq/kWh)'] = round(np.mean(batch['cis'][batch['rows'], idx]), 1)
+    return metrics
+
+
+def write_results(rows, output_dir, name, output_format='csv', baseline=None, subdir='tables'):
+    """
+    Write result rows to {output_dir}/{subdir}/{name} and return the DataFrame.
+    With baseline (a Policy label), a Carbon Reduction column is added against it.
+    """
+    df = pd.DataFrame(rows)
+    if baseline is not None:
+        ref = df.loc[df['Policy'] == baseline, 'Avg Carbon (gCO2eq/kWh)'].iloc[0]
+        df['Carbon Reduction'] = (100 * (1 - df['Avg Carbon (gCO2eq/kWh)'] / ref)).round(1)
+    write_table(df, f'{output_dir}/{subdir}/{name}', output_format)
+    return df
+
+
+def experiment_parser(rph=REQUESTS_PER_HOUR, request_log=True):
+    """ArgumentParser with the flags every experiment takes; see experiment_kwargs."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sim-hours', type=int, default=SIMULATION_HOURS)
+    parser.add_argument('--reqs-per-hour', type=int, default=rph)
+    parser.add_argument('--seed', type=int, default=RANDOM_SEED)
+    if request_log:
+        parser.add_argument('--request-log', default=None)
+    parser.add_argument('--output-format', choices=TABLE_FORMATS, default='csv')
+    return parser
+
+
+def experiment_kwargs(args):
+    """The shared run_*_experiment keyword arguments from experiment_parser's flags."""
+    kwargs = {'hours': args.sim_hours, 'rph': args.reqs_per_hour, 'seed': args.seed,
+              'output_format': args.output_format}
+    if hasattr(args, 'request_log'):
+        kwargs['request_log'] = args.request_log
+    return kwargs
@@ -0,0 +1,196 @@
+"""
+faults.py — Region fault injection and health-aware failover.
+
+Every region used to be healthy for the whole run, so nothing showed what
+happens when the region the carbon-aware policies prefer (EU-North) degrades.
+A fault schedule (FAULT_SCHEDULE, or a list of dicts with region, start_h,
+end_h, kind, severity) describes incidents per region and time window:
+
+  outage    the region serves nothing; every request routed there fails
+  capacity  partial capacity loss: a `severity` share of requests is rejected
+  latency   `severity` ms added to every request served there
+
+Incidents are compiled once into (FAULT_BIN_S bins, regions) grids of rejected
+share and added latency, so injection is a gather per request: a rejected
+request costs FAULT_TIMEOUT_MS and counts as an SLO violation.
+
+Health checks see the same grids with a delay.  A region is marked unhealthy
+once it has rejected at least FAULT_UNHEALTHY_REJECT of requests for
+FAULT_DETECTION_S, and stays drained for FAULT_HOLDDOWN_S after it recovers;
+latency inflation shows up in the routers' latency view after FAULT_DETECTION_S.
+Health-aware policies route on that view through select_regions_batch(healthy=...),
+failing over to the best healthy region; health-blind ones keep the static view.
+
+Per incident, time-to-recover is the time from its start to the last request
+the incident hurt (failed, or an SLO violation on the inflated region).
+
+Run from src/:  python faults.py
+Outputs: ../outputs/tables/fault_results.csv
+         ../outputs/tables/fault_incidents.csv
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config import (
+    SIMULATION_HOURS, REQUESTS_PER_HOUR, RANDOM_SEED, REGIONS,
+    FAULT_SCHEDULE, FAULT_BIN_S, FAULT_TIMEOUT_MS, FAULT_DETECTION_S, FAULT_HOLDDOWN_S,
+    FAULT_UNHEALTHY_REJECT,
+)
+from experiment import (
+    experiment_dirs, experiment_kwargs, experiment_parser, latency_metrics, sample_requests, served_latency,
+    write_results,
+)
+from policies import get_policy_configs, select_regions_batch
+
+FAULT_KINDS = ('outage', 'capacity', 'latency')
+
+
+def _trailing(x, window, how):
+    """how (np.min / np.max) over the trailing window + 1 bins of each column, zero-padded."""
+    padded = np.concatenate([np.zeros((window, x.shape[1]), dtype=x.dtype), x])
+    return how(sliding_window_view(padded, window + 1, axis=0), axis=-1)
+
+
+class FaultSchedule:
+    """Incidents compiled to (bins, regions) grids of rejected share and added latency."""
+
+    def __init__(self, incidents=FAULT_SCHEDULE, hours=SIMULATION_HOURS, bin_s=FAULT_BIN_S):
+        self.incidents = pd.DataFrame(list(incidents), columns=['region', 'start_h', 'end_h', 'kind', 'severity'])
+        unknown = set(self.incidents['kind']) - set(FAULT_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown fault kind(s) {sorted(unknown)}, expected one of {FAULT_KINDS}")
+        unknown = set(self.incidents['region']) - set(REGIONS)
+        if unknown:
+            raise ValueError(f"Unknown fault region(s) {sorted(unknown)}")
+        if (self.incidents['end_h'] <= self.incidents['start_h']).any():
+            raise ValueError("Every incident needs end_h > start_h")
+
+        self.bin_s = bin_s
+        self.n_bins = int(np.ceil(hours * 3600 / bin_s))
+        self.reject = np.zeros((self.n_bins, len(REGIONS)))
+        self.extra_ms = np.zeros((self.n_bins, len(REGIONS)))
+        for inc in self.incidents.itertuples():
+            r = REGIONS.index(inc.region)
+            b0, b1 = int(inc.start_h * 3600 // bin_s), int(np.ceil(inc.end_h * 3600 / bin_s))
+            if inc.kind == 'latency':
+                self.extra_ms[b0:b1, r] += inc.severity
+            else:
+                share = 1.0 if inc.kind == 'outage' else float(np.clip(inc.severity, 0, 1))
+                self.reject[b0:b1, r] = np.maximum(self.reject[b0:b1, r], share)
+
+    def bucket(self, times):
+        """Grid bin of each time in seconds."""
+        return np.minimum(np.asarray(times) // self.bin_s, self.n_bins - 1).astype(int)
+
+    def inject(self, req_times, regions, latencies, u):
+        """
+        Apply the faults to routed requests: (latencies, failed).  u holds one
+        uniform per request deciding rejection under partial capacity loss.
+        """
+        b = self.bucket(req_times)
+        failed = u < self.reject[b, regions]
+        return np.where(failed, float(FAULT_TIMEOUT_MS), latencies + self.extra_ms[b, regions]), failed
+
+    def health_view(self, detection_s=FAULT_DETECTION_S, holddown_s=FAULT_HOLDDOWN_S):
+        """
+        (unhealthy, observed extra latency) grids as the health checks see them:
+        impairments sustained for detection_s, with a holddown_s drain after recovery.
+        """
+        d = int(round(detection_s / self.bin_s))
+        h = int(round(holddown_s / self.bin_s))
+        detected = _trailing(self.reject >= FAULT_UNHEALTHY_REJECT, d, np.min)
+        unhealthy = _trailing(detected, h, np.max)
+        return unhealthy, _trailing(self.extra_ms, d, np.min)
+
+
+def incident_recovery(schedule, req_times, idx, hurt):
+    """Per incident: (requests routed to the region during it, hurt requests, time-to-recover in s)."""
+    out = []
+    for inc in schedule.incidents.itertuples():
+        start, end = inc.start_h * 3600.0, inc.end_h * 3600.0
+        during = (req_times >= start) & (req_times < end) & (idx == REGIONS.index(inc.region))
+        hit = during & hurt
+        ttr = req_times[hit].max() - start if hit.any() else 0.0
+        out.append((int(during.sum()), int(hit.sum()), ttr))
+    return out
+
+
+def run_fault_experiment(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOUR,
+                         seed=RANDOM_SEED, request_log=None, output_format='csv',
+                         schedule=FAULT_SCHEDULE, detection_s=FAULT_DETECTION_S,
+                         holddown_s=FAULT_HOLDDOWN_S):
+    """
+    Route every standard policy health-blind and health-aware under the fault
+    schedule, and once without faults as the carbon reference.
+    """
+    output_dir = experiment_dirs(output_dir)
+    batch = sample_requests(hours, rph, seed, request_log)
+    req_times, n = batch['req_times'], batch['n']
+    lats, cis, slo, inference_ms = batch['lats'], batch['cis'], batch['slo'], batch['inference_ms']
+    faults = FaultSchedule(schedule, batch['hours'])
+    unhealthy, seen_extra = faults.health_view(detection_s, holddown_s)
+    u_reject = np.random.default_rng(seed + 9).random(n)
+    rows_n = batch['rows']
+    b = faults.bucket(req_times)
+    in_incident = np.zeros(n, dtype=bool)
+    for inc in faults.incidents.itertuples():
+        in_incident |= (req_times >= inc.start_h * 3600.0) & (req_times < inc.end_h * 3600.0)
+
+    rows, incident_rows = [], []
+    for label, ptype, alpha in get_policy_configs():
+        ref_idx = select_regions_batch(ptype, lats, cis, alpha, slo, inference_ms)
+        ref_carbon = cis[rows_n, ref_idx]
+        for mode in ('health-blind', 'health-aware'):
+            if mode == 'health-aware':
+                idx = select_regions_batch(ptype, lats + seen_extra[b], cis, alpha, slo, inference_ms,
+                                           healthy=~unhealthy[b])
+            else:
+                idx = ref_idx
+            latencies, failed = faults.inject(req_times, idx, served_latency(batch, idx), u_reject)
+            violated = latencies > slo
+            hurt = failed | (violated & (faults.extra_ms[b, idx] > 0))
+            carbon = cis[rows_n, idx]
+
+            recovery = incident_recovery(faults, req_times, idx, hurt)
+            for inc, (routed, hit, ttr) in zip(faults.incidents.itertuples(), recovery):
+                incident_rows.append({
+                    'Policy': label,
+                    'Mode': mode,
+                    'Region': inc.region,
+                    'Kind': inc.kind,
+                    'Start Hour': inc.start_h,
+                    'Duration (min)': round(60 * (inc.end_h - inc.start_h), 1),
+                    'Requests Routed There': routed,
+                    'Requests Hurt': hit,
+                    'Time to Recover (min)': round(ttr / 60, 1),
+                })
+            rows.append({
+                'Policy': label,
+                'Mode': mode,
+                **latency_metrics(latencies, slo, percentiles=()),
+                'Incident SLO Violation Rate (%)': round(100 * np.mean(violated[in_incident]), 2)
+                if in_incident.any() else 0.0,
+                'Failed Requests (%)': round(100 * np.mean(failed), 3),
+                'Mean Time to Recover (min)': round(np.mean([ttr for _, _, ttr in recovery]) / 60, 1)
+                if recovery else 0.0,
+                'Avg Carbon (gCO2eq/kWh)': round(np.mean(carbon), 1),
+                # Carbon of the failover itself: incident-window traffic against the fault-free run
+                'Incident Carbon Impact (%)': round(100 * (np.mean(carbon[in_incident])
+                                                           / np.mean(ref_carbon[in_incident]) - 1), 1)
+                if in_incident.any() else 0.0,
+            })
+
+    write_results(incident_rows, output_dir, 'fault_incidents', output_format)
+    return write_results(rows, output_dir, 'fault_results', output_format)
+
+
+if __name__ == '__main__':
+    parser = experiment_parser()
+    parser.add_argument('--detection-s', type=float, default=FAULT_DETECTION_S)
+    parser.add_argument('--holddown-s', type=float, default=FAULT_HOLDDOWN_S)
+    args = parser.parse_args()
+    df = run_fault_experiment(**experiment_kwargs(args), detection_s=args.detection_s,
+                              holddown_s=args.holddown_s)
+    print(df.to_string(index=False))
@@ -0,0 +1,139 @@
+"""
+hedging.py — Hedged-request routing on top of Constrained Hybrid.
+
+The base simulation has no stragglers, so tail latency is just the chosen
+region's RTT.  Here every execution can straggle (probability
+STRAGGLER_PROBABILITY, heavy-tailed slowdown), and the hedged policy sends each
+request to the lowest-carbon feasible region.  Its deadline is the response
+time the router can expect before sending it, RTT plus the workload's
+HEDGE_DEADLINE_QUANTILE inference time, plus the hedge delay; if no response
+has arrived by then, a duplicate goes to the fastest region and the first
+answer wins.  Requests whose primary is already the fastest region have no
+region to hedge to and are never duplicated; Hedgeable (%) reports the share
+that do.
+
+Duplicates run to completion, so their inference time is charged as extra
+compute, and their carbon is added at the hedge region's intensity.  Effective
+carbon is the compute-weighted intensity of all executions per unit of primary
+compute, so it equals the plain average when nothing is hedged.
+
+Run from src/:  python hedging.py
+Outputs: ../outputs/tables/hedging_results.csv
+"""
+
+import numpy as np
+
+from config import (
+    SIMULATION_HOURS, REQUESTS_PER_HOUR, RANDOM_SEED,
+    NETWORK_JITTER_MEAN, NETWORK_JITTER_STD, HEDGE_DELAY_VALUES, HEDGE_DEADLINE_QUANTILE,
+    STRAGGLER_PROBABILITY, STRAGGLER_MIN_SLOWDOWN, STRAGGLER_PARETO_SHAPE,
+)
+from experiment import (
+    experiment_dirs, experiment_kwargs, experiment_parser, latency_metrics, sample_requests, write_results,
+)
+from policies import latency_first, hedged_constrained_hybrid
+
+
+def sample_straggler_factors(rng, n):
+    """Per-execution inference slowdown: 1.0, or a heavy-tailed factor for stragglers."""
+    slow = rng.random(n) < STRAGGLER_PROBABILITY
+    factors = np.ones(n)
+    factors[slow] = STRAGGLER_MIN_SLOWDOWN * (1 + rng.pareto(STRAGGLER_PARETO_SHAPE, slow.sum()))
+    return factors
+
+
+def _summarize(label, delay, latencies, slo, carbon, compute, primary_compute, hedgeable, hedged, hedge_won):
+    n = len(latencies)
+    return {
+        'Policy': label,
+        'Hedge Delay (ms)': delay,
+        'Hedgeable (%)': round(100 * hedgeable.sum() / n, 2),
+        'Hedge Rate (%)': round(100 * hedged.sum() / n, 2),
+        'Hedge Win Rate (%)': round(100 * hedge_won.sum() / n, 2),
+        **latency_metrics(latencies, slo, percentiles=(95, 99)),
+        'Compute Overhead (%)': round(100 * (compute.sum() / primary_compute.sum() - 1), 2),
+        'Effective Carbon (gCO2eq/kWh)': round(carbon.sum() / primary_compute.sum(), 1),
+    }
+
+
+def run_hedging_experiment(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOUR,
+                           seed=RANDOM_SEED, request_log=None, output_format='csv',
+                           hedge_delays=HEDGE_DELAY_VALUES, deadline_quantile=HEDGE_DEADLINE_QUANTILE):
+    output_dir = experiment_dirs(output_dir)
+    batch = sample_requests(hours, rph, seed, request_log)
+    wl_codes, n, table = batch['wl_codes'], batch['n'], batch['table']
+    lats_all, cis_all, slo = batch['lats'], batch['cis'], batch['slo']
+    inference_all, jitter = batch['inference_ms'], batch['jitter']
+
+    # Straggler and duplicate samples come from their own stream, drawn once, so
+    # every hedge delay is evaluated on exactly the same random outcomes
+    hedge_rng = np.random.default_rng(seed + 1)
+    primary_slow = sample_straggler_factors(hedge_rng, n)
+    hedge_slow = sample_straggler_factors(hedge_rng, n)
+    hedge_inf = table.sample_inference(wl_codes, hedge_rng) * hedge_slow
+    hedge_jitter = np.maximum(0, hedge_rng.normal(NETWORK_JITTER_MEAN, NETWORK_JITTER_STD, n))
+
+    # The router only knows the workload's inference-time distribution, not this request's draw
+    expected_inf = table.inference_quantile(wl_codes, deadline_quantile)
+    rows = []
+    baseline_carbon = None
+    for label, ptype in [('Latency-First', 'latency_first'), ('Constrained Hybrid', 'constrained')]:
+        primary_lat = np.zeros(n)
+        expected_lat = np.zeros(n)
+        primary_inf = np.zeros(n)
+        primary_ci = np.zeros(n)
+        hedge_lat = np.full(n, np.inf)
+        hedge_ci = np.zeros(n)
+        hedgeable = np.zeros(n, dtype=bool)
+
+        for i in range(n):
+            lats = lats_all[i]
+            cis = cis_all[i]
+            inference_ms = inference_all[i]
+            if ptype == 'latency_first':
+                idx, hedge_idx = latency_first(lats, cis), None
+            else:
+                idx, hedge_idx = hedged_constrained_hybrid(lats, cis, slo[i], inference_ms)
+            primary_inf[i] = inference_ms * primary_slow[i]
+            primary_lat[i] = max(1.0, lats[idx] + primary_inf[i] + jitter[i])
+            expected_lat[i] = lats[idx] + expected_inf[i]
+            primary_ci[i] = cis[idx]
+            if hedge_idx is not None:
+                hedgeable[i] = True
+                hedge_lat[i] = max(1.0, lats[hedge_idx] + hedge_inf[i] + hedge_jitter[i])
+                hedge_ci[i] = cis[hedge_idx]
+
+        no_hedge = np.zeros(n, dtype=bool)
+        primary_carbon = primary_ci * primary_inf
+        rows.append(_summarize(label, None, primary_lat, slo, primary_carbon, primary_inf,
+                               primary_inf, hedgeable, no_hedge, no_hedge))
+        if ptype == 'latency_first':
+            baseline_carbon = rows[-1]['Effective Carbon (gCO2eq/kWh)']
+            continue
+
+        # Every hedge delay is a vectorized replay of the same primary / duplicate outcomes
+        for delay in hedge_delays:
+            deadline = expected_lat + delay
+            hedged = hedgeable & (primary_lat > deadline)
+            hedge_done = deadline + hedge_lat
+            latencies = np.where(hedged, np.minimum(primary_lat, hedge_done), primary_lat)
+            hedge_won = hedged & (hedge_done < primary_lat)
+            compute = primary_inf + np.where(hedged, hedge_inf, 0.0)
+            carbon = primary_carbon + np.where(hedged, hedge_ci * hedge_inf, 0.0)
+            rows.append(_summarize(f'Hedged Constrained Hybrid (d={delay}ms)', delay, latencies,
+                                   slo, carbon, compute, primary_inf, hedgeable, hedged, hedge_won))
+
+    for row in rows:
+        row['Carbon Reduction'] = round(100 * (1 - row['Effective Carbon (gCO2eq/kWh)'] / baseline_carbon), 1)
+    return write_results(rows, output_dir, 'hedging_results', output_format)
+
+
+if __name__ == '__main__':
+    parser = experiment_parser()
+    parser.add_argument('--hedge-delays', type=float, nargs='+', default=HEDGE_DELAY_VALUES)
+    parser.add_argument('--deadline-quantile', type=float, default=HEDGE_DEADLINE_QUANTILE,
+                        help='Inference-time quantile of the expected response before hedging')
+    args = parser.parse_args()
+    df = run_hedging_experiment(**experiment_kwargs(args), hedge_delays=args.hedge_delays,
+                                deadline_quantile=args.deadline_quantile)
+    print(df.to_string(index=False))
@@ -0,0 +1,157 @@
+"""
+ingest.py — Streaming ingestion of recorded request logs for replay.
+
+A request log is a JSONL file with one request per line:
+
+    {"timestamp": "2026-02-27T13:04:11Z", "user_location": "EU", "workload": "bert_base"}
+
+`timestamp` may be an ISO-8601 string or epoch seconds; `user_location` must be
+one of USER_LOCATIONS and `workload` one of the WORKLOADS keys.
+
+The log is parsed in fixed-size byte blocks into compact typed arrays (float64 epoch
+seconds, int8 user / workload codes), so multi-gigabyte logs never have to be
+held as Python objects.  The first replay converts the log into a binary cache
+directory next to it (one .npy per column plus a manifest.json); later replays
+memory-map that cache directly and skip JSON parsing entirely.
+
+Run from src/:  python ingest.py path/to/requests.jsonl
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import USER_LOCATIONS, get_workload_list
+
+DEFAULT_BLOCK_BYTES = 16 << 20
+CACHE_SUFFIX = '.cache'
+CACHE_VERSION = 1
+
+
+def _parse_block(body, user_map, workload_map, line_no):
+    # One json.loads over the whole block keeps parsing in C; per-line loads is ~3x slower
+    lines = [ln for ln in body.split(b'\n') if ln.strip()]
+    try:
+        recs = json.loads(b'[' + b','.join(lines) + b']')
+        raw_ts = [r['timestamp'] for r in recs]
+        users = np.fromiter((user_map[r['user_location']] for r in recs), np.int8, len(recs))
+        wls = np.fromiter((workload_map[r['workload']] for r in recs), np.int8, len(recs))
+    except KeyError as e:
+        raise ValueError(f"Request log block starting at line {line_no}: missing field "
+                         f"or unknown user_location/workload {e}") from None
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Malformed JSON in request log block starting at line {line_no}: {e}") from None
+
+    if raw_ts and isinstance(raw_ts[0], str):
+        times = pd.to_datetime(raw_ts, utc=True, format='ISO8601').as_unit('ns').asi8 / 1e9
+    else:
+        times = np.asarray(raw_ts, dtype=np.float64)
+    return times, users, wls, len(lines)
+
+
+def iter_request_chunks(path, block_bytes=DEFAULT_BLOCK_BYTES):
+    """Yield (times, user_codes, workload_codes) arrays for each block of the log."""
+    user_map = {ul: i for i, ul in enumerate(USER_LOCATIONS)}
+    workload_map = {wid: i for i, wid in enumerate(get_workload_list())}
+    line_no = 1
+    tail = b''
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(block_bytes)
+            if not block:
+                break
+            block = tail + block
+            cut = block.rfind(b'\n') + 1
+            body, tail = block[:cut], block[cut:]
+            if not body:
+                continue
+            times, users, wls, n = _parse_block(body, user_map, workload_map, line_no)
+            line_no += n
+            yield times, users, wls
+    if tail.strip():
+        times, users, wls, _ = _parse_block(tail, user_map, workload_map, line_no)
+        yield times, users, wls
+
+
+def _cache_dir(path):
+    path = Path(path)
+    return path.with_name(path.name + CACHE_SUFFIX)
+
+
+def _source_signature(path):
+    st = os.stat(path)
+    return {
+        'version': CACHE_VERSION,
+        'source_size': st.st_size,
+        'source_mtime_ns': st.st_mtime_ns,
+        'user_locations': list(USER_LOCATIONS),
+        'workloads': get_workload_list(),
+    }
+
+
+def convert_request_log(path, cache_dir=None, block_bytes=DEFAULT_BLOCK_BYTES):
+    """Parse a JSONL log once and write its columnar binary cache. Returns the cache dir."""
+    cache_dir = Path(cache_dir) if cache_dir is not None else _cache_dir(path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    times, users, wls = [], [], []
+    for t, u, w in iter_request_chunks(path, block_bytes=block_bytes):
+        times.append(t)
+        users.append(u)
+        wls.append(w)
+    empty_f, empty_i = np.zeros(0), np.zeros(0, dtype=np.int8)
+    columns = {
+        'times': np.concatenate(times) if times else empty_f,
+        'user_codes': np.concatenate(users) if users else empty_i,
+        'workload_codes': np.concatenate(wls) if wls else empty_i,
+    }
+    for name, arr in columns.items():
+        np.save(cache_dir / f'{name}.npy', arr)
+
+    manifest = _source_signature(path)
+    manifest['num_requests'] = int(len(columns['times']))
+    manifest['columns'] = {name: str(arr.dtype) for name, arr in columns.items()}
+    # Manifest goes last so a half-written cache is never mistaken for a valid one
+    (cache_dir / 'manifest.json').write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    return cache_dir
+
+
+def _cache_is_valid(path, cache_dir):
+    manifest_path = cache_dir / 'manifest.json'
+    if not manifest_path.exists():
+        return False
+    manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+    sig = _source_signature(path)
+    return all(manifest.get(k) == v for k, v in sig.items())
+
+
+def load_request_log(path, use_cache=True, block_bytes=DEFAULT_BLOCK_BYTES):
+    """
+    Load a JSONL request log as (times, user_codes, workload_codes).
+    Codes index into USER_LOCATIONS and get_workload_list().  With use_cache the
+    binary cache is (re)built when missing or stale and returned memory-mapped.
+    """
+    if not use_cache:
+        chunks = list(iter_request_chunks(path, block_bytes=block_bytes))
+        if not chunks:
+            return np.zeros(0), np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.int8)
+        return tuple(np.concatenate(cols) for cols in zip(*chunks))
+
+    cache_dir = _cache_dir(path)
+    if not _cache_is_valid(path, cache_dir):
+        convert_request_log(path, cache_dir=cache_dir, block_bytes=block_bytes)
+    return tuple(np.load(cache_dir / f'{name}.npy', mmap_mode='r')
+                 for name in ('times', 'user_codes', 'workload_codes'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('log', help='JSONL request log to convert')
+    parser.add_argument('--block-mb', type=int, default=DEFAULT_BLOCK_BYTES >> 20)
+    args = parser.parse_args()
+    out = convert_request_log(args.log, block_bytes=args.block_mb << 20)
+    print(f"[OK] Wrote request cache to {out}")
@@ -11,6 +11,8 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import seaborn as sns
 
+from storage import find_table, read_table
+
 
 logging.basicConfig(
     level=logging.INFO,
@@ -91,9 +93,9 @@ def plot_regional_carbon_latency(output_dir: Path) -> None:
 
 
 # ─── Figure 2: Trade-off Pareto Curve ────────────────────────────────────────
-def plot_tradeoff_curve(input_csv: Path, output_dir: Path) -> None:
-    logger.info(f"Generating Figure 2 (Pareto tradeoff) from {input_csv}...")
-    df = pd.read_csv(input_csv, encoding='utf-8')
+def plot_tradeoff_curve(input_path: Path, output_dir: Path) -> None:
+    logger.info(f"Generating Figure 2 (Pareto tradeoff) from {input_path}...")
+    df = read_table(input_path)
 
     fig, ax = plt.subplots(figsize=(10, 7))
     ax.axhspan(0, 5, alpha=0.08, color='green', zorder=0)
@@ -129,9 +131,9 @@ def plot_tradeoff_curve(input_csv: Path, output_dir: Path) -> None:
 
 
 # ─── Figure 3: Request Routing Distribution ──────────────────────────────────
-def plot_routing_distribution(input_csv: Path, output_dir: Path) -> None:
-    logger.info(f"Generating Figure 3: Routing distribution from {input_csv}...")
-    df = pd.read_csv(input_csv, encoding='utf-8')
+def plot_routing_distribution(input_path: Path, output_dir: Path) -> None:
+    logger.info(f"Generating Figure 3: Routing distribution from {input_path}...")
+    df = read_table(input_path)
     regions = ['US-East', 'US-West', 'EU-West', 'EU-North', 'Singapore']
     region_cols = [c for c in df.columns if c in regions]
 
@@ -182,9 +184,9 @@ def plot_routing_distribution(input_csv: Path, output_dir: Path) -> None:
 
 
 # ─── Figure 4: Per-Workload SLO Violations ───────────────────────────────────
-def plot_workload_slo_violations(input_csv: Path, output_dir: Path) -> None:
-    logger.info(f"Generating Figure 4: Workload SLO violation chart from {input_csv}...")
-    df = pd.read_csv(input_csv, encoding='utf-8')
+def plot_workload_slo_violations(input_path: Path, output_dir: Path) -> None:
+    logger.info(f"Generating Figure 4: Workload SLO violation chart from {input_path}...")
+    df = read_table(input_path)
 
     fig, ax = plt.subplots(figsize=(12, 6))
     # FIX 4: pass POLICY_COLORS dict (not a list) — seaborn >= 0.12 requires dict with hue
@@ -216,9 +218,9 @@ def plot_workload_slo_violations(input_csv: Path, output_dir: Path) -> None:
 
 
 # ─── Figure 5: Carbon Traces ──────────────────────────────────────────────────
-def plot_carbon_traces(input_csv: Path, output_dir: Path) -> None:
-    logger.info(f"Generating Figure 5: Carbon traces from {input_csv}...")
-    df = pd.read_csv(input_csv, index_col='hour', encoding='utf-8')
+def plot_carbon_traces(input_path: Path, output_dir: Path) -> None:
+    logger.info(f"Generating Figure 5: Carbon traces from {input_path}...")
+    df = read_table(input_path, index_col='hour')
 
     fig, ax = plt.subplots(figsize=(12, 5))
     for region in df.columns:
@@ -241,14 +243,14 @@ def plot_carbon_traces(input_csv: Path, output_dir: Path) -> None:
     logger.info(f"Saved Figure 5 to {out_path}")
     
 # ─── Prior Work Comparison Table (PNG) ────────────────────────────────────────
-def render_prior_work_comparison(results_csv: Path, output_dir: Path) -> None:
+def render_prior_work_comparison(results_path: Path, output_dir: Path) -> None:
     """
     Renders a styled comparison table: This Work vs CASPER, CASA, Microsoft, Google.
     Recommended by out_pdf2.txt §4.6.
     """
     logger.info("Generating prior work comparison table...")
 
-    df_sim = pd.read_csv(results_csv)
+    df_sim = read_table(results_path)
     # Best hybrid: α=0.7 has the best SLO + carbon balance
     hybrid_07 = df_sim[df_sim['Policy'] == 'Hybrid (α=0.7)'].iloc[0]
     constrained = df_sim[df_sim['Policy'] == 'Constrained Hybrid'].iloc[0]
@@ -335,15 +337,16 @@ def main():
     base_dir = Path(__file__).parent.parent
     output_dir = base_dir / 'outputs'
 
-    trace_path    = output_dir / 'data'   / 'carbon_intensity_traces.csv'
-    results_path  = output_dir / 'tables' / 'simulation_results.csv'
-    workload_path = output_dir / 'tables' / 'per_workload_results.csv'
+    # find_table picks up whichever backend (csv / npz / parquet) was written last
+    trace_path    = find_table(output_dir / 'data'   / 'carbon_intensity_traces')
+    results_path  = find_table(output_dir / 'tables' / 'simulation_results')
+    workload_path = find_table(output_dir / 'tables' / 'per_workload_results')
     graphs_dir    = output_dir / 'graphs'
 
     # Figure 1: Regional comparison (static data from config)
     plot_regional_carbon_latency(graphs_dir)
 
-    if results_path.exists():
+    if results_path is not None:
         # Figure 2: Enhanced Pareto tradeoff curve
         plot_tradeoff_curve(results_path, graphs_dir)
         # Figure 3: Routing distribution
@@ -351,19 +354,19 @@ def main():
         # Prior Work Comparison Table
         render_prior_work_comparison(results_path, graphs_dir)
     else:
-        logger.warning(f"Results file {results_path} not found. Run simulation first.")
+        logger.warning("Results table not found. Run simulation first.")
 
-    if workload_path.exists():
+    if workload_path is not None:
         # Figure 4: Per-workload SLO violations
         plot_workload_slo_violations(workload_path, graphs_dir)
     else:
-        logger.warning(f"Workload file {workload_path} not found. Run simulation first.")
+        logger.warning("Workload table not found. Run simulation first.")
 
-    if trace_path.exists():
+    if trace_path is not None:
         # Figure 5: Carbon intensity traces
         plot_carbon_traces(trace_path, graphs_dir)
     else:
-        logger.warning(f"Trace file {trace_path} not found. Run simulation first.")
+        logger.warning("Trace table not found. Run simulation first.")
 
 
 if __name__ == '__main__':
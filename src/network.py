@@ -0,0 +1,109 @@
+"""
+network.py — Path-specific, heavy-tailed network latency.
+
+The base simulation adds one global N(0, 3) jitter clipped at zero to every path.
+Here each (user location, region) path gets its own excess-latency distribution
+on top of its RTT:
+
+  jitter     scale * LogNormal(0, sigma)  or  scale * Lomax(shape), where
+             scale = max(PATH_JITTER_MIN_MS, PATH_JITTER_RTT_FRACTION * RTT)
+  congestion each path is congested in a given hour with probability
+             CONGESTION_EPISODE_PROB, adding CONGESTION_RTT_INFLATION * RTT
+
+All sampling is vectorized over the request arrays.  The Path-Quantile
+Constrained Hybrid policy sizes its SLO buffer from each path's
+PATH_BUFFER_QUANTILE excess latency instead of the fixed 9 ms.
+
+Run from src/:  python network.py
+Outputs: ../outputs/tables/network_model_results.csv
+"""
+
+import numpy as np
+
+from config import (
+    SIMULATION_HOURS, REQUESTS_PER_HOUR, RANDOM_SEED,
+    PATH_JITTER_DISTRIBUTION, PATH_JITTER_RTT_FRACTION, PATH_JITTER_MIN_MS,
+    PATH_JITTER_LOGNORMAL_SIGMA, PATH_JITTER_PARETO_SHAPE,
+    CONGESTION_EPISODE_PROB, CONGESTION_RTT_INFLATION, PATH_BUFFER_QUANTILE,
+)
+from experiment import (
+    experiment_dirs, experiment_kwargs, experiment_parser, policy_metrics, sample_requests, write_results,
+)
+from policies import get_policy_configs, select_regions_batch
+
+
+class PathLatencyModel:
+    """Excess-latency distributions for every (user location, region) path."""
+
+    def __init__(self, rtt, hours, seed=RANDOM_SEED, distribution=PATH_JITTER_DISTRIBUTION):
+        if distribution not in ('lognormal', 'pareto'):
+            raise ValueError(f"Unknown path jitter distribution: {distribution}")
+        self.rtt = np.asarray(rtt, dtype=float)
+        self.distribution = distribution
+        self.scale = np.maximum(PATH_JITTER_MIN_MS, PATH_JITTER_RTT_FRACTION * self.rtt)
+        # Congestion episodes are fixed per (hour, user, region) for the whole run
+        episode_rng = np.random.default_rng(seed + 2)
+        self.congested = episode_rng.random((hours,) + self.rtt.shape) < CONGESTION_EPISODE_PROB
+        self.congestion_ms = CONGESTION_RTT_INFLATION * self.rtt
+
+    def _draw_tail(self, rng, size):
+        if self.distribution == 'lognormal':
+            return rng.lognormal(0.0, PATH_JITTER_LOGNORMAL_SIGMA, size)
+        return rng.pareto(PATH_JITTER_PARETO_SHAPE, size)
+
+    def sample_excess(self, rng, user_codes, region_idx, req_hours):
+        """Excess latency over RTT (ms) for each request's chosen path, in one bulk draw."""
+        tail = self._draw_tail(rng, len(region_idx))
+        excess = self.scale[user_codes, region_idx] * tail
+        congested = self.congested[req_hours, user_codes, region_idx]
+        return excess + np.where(congested, self.congestion_ms[user_codes, region_idx], 0.0)
+
+    def sample(self, rng, user_codes, region_idx, req_hours):
+        """End-to-end network latency (RTT + excess) for each request's chosen path."""
+        return self.rtt[user_codes, region_idx] + self.sample_excess(rng, user_codes, region_idx, req_hours)
+
+    def quantile_buffers(self, q=PATH_BUFFER_QUANTILE, samples=100_000, seed=RANDOM_SEED):
+        """(users x regions) matrix of the q-quantile excess latency, congestion included."""
+        rng = np.random.default_rng(seed + 3)
+        unit = self._draw_tail(rng, samples)
+        congested = rng.random(samples) < CONGESTION_EPISODE_PROB
+        # Monte Carlo over shared unit draws, broadcast across all paths at once
+        excess = self.scale[..., None] * unit + self.congestion_ms[..., None] * congested
+        return np.quantile(excess, q, axis=-1)
+
+
+def run_network_experiment(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOUR,
+                           seed=RANDOM_SEED, request_log=None, output_format='csv',
+                           distribution=PATH_JITTER_DISTRIBUTION, quantile=PATH_BUFFER_QUANTILE):
+    output_dir = experiment_dirs(output_dir)
+    # Inference times are drawn once and shared by every policy; the path model replaces the jitter
+    batch = sample_requests(hours, rph, seed, request_log)
+    req_hours, user_codes = batch['req_hours'], batch['user_codes']
+    lats, cis, slo, inference_ms = batch['lats'], batch['cis'], batch['slo'], batch['inference_ms']
+
+    model = PathLatencyModel(batch['lat_lookup'], batch['hours'], seed=seed, distribution=distribution)
+    path_buffers = model.quantile_buffers(quantile, seed=seed)
+
+    policy_configs = [(label, ptype, alpha, 9) for label, ptype, alpha in get_policy_configs()]
+    policy_configs.append(('Path-Quantile Constrained Hybrid', 'constrained', None,
+                           path_buffers[user_codes]))
+
+    rows = []
+    for label, ptype, alpha, buffer in policy_configs:
+        idx = select_regions_batch(ptype, lats, cis, alpha, slo, inference_ms, jitter_buffer=buffer)
+        # Same network stream per policy: request i always gets the same unit tail draw
+        net_rng = np.random.default_rng(seed + 4)
+        network = model.sample(net_rng, user_codes, idx, req_hours)
+        latencies = np.maximum(1.0, network + inference_ms)
+        rows.append({'Policy': label, **policy_metrics(batch, idx, latencies, percentiles=(95, 99))})
+
+    return write_results(rows, output_dir, 'network_model_results', output_format, baseline='Latency-First')
+
+
+if __name__ == '__main__':
+    parser = experiment_parser()
+    parser.add_argument('--distribution', choices=('lognormal', 'pareto'), default=PATH_JITTER_DISTRIBUTION)
+    parser.add_argument('--quantile', type=float, default=PATH_BUFFER_QUANTILE)
+    args = parser.parse_args()
+    df = run_network_experiment(**experiment_kwargs(args), distribution=args.distribution, quantile=args.quantile)
+    print(df.to_string(index=False))
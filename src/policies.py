@@ -1,7 +1,8 @@
 import numpy as np
 from config import (
     LATENCY_GLOBAL_MIN, LATENCY_GLOBAL_MAX,
-    CARBON_GLOBAL_MIN, CARBON_GLOBAL_MAX
+    CARBON_GLOBAL_MIN, CARBON_GLOBAL_MAX,
+    HYBRID_ALPHA_VALUES, PLACEMENT_MIN_CARBON_GAIN,
 )
 
 
@@ -40,8 +41,9 @@ def hybrid_policy(lats, cis, alpha, **kwargs):
     scores = alpha * norm_l + (1 - alpha) * norm_c
     return np.argmin(scores)
 
-def constrained_hybrid(lats, cis, slo_threshold, inference_ms, jitter_buffer=9, **kwargs):
-    total_lats = lats + inference_ms + jitter_buffer
+def constrained_hybrid(lats, cis, slo_threshold, inference_ms, jitter_buffer=9, transfer_ms=0, **kwargs):
+    # transfer_ms: per-region payload transfer time estimate (transfer.py); 0 ignores payloads
+    total_lats = lats + inference_ms + transfer_ms + jitter_buffer
     eligible = total_lats <= slo_threshold
     if eligible.any():
         masked_ci = np.where(eligible, cis, 1e9)
@@ -49,3 +51,109 @@ def constrained_hybrid(lats, cis, slo_threshold, inference_ms, jitter_buffer=9,
     else:
         return np.argmin(lats)
 
+
+
+def placement_aware_hybrid(lats, cis, slo_threshold, inference_ms, warm, cold_start_ms=0, jitter_buffer=9,
+                           min_carbon_gain=PLACEMENT_MIN_CARBON_GAIN, **kwargs):
+    """
+    Constrained hybrid over a warm-pool mask (regions whose model is loaded).
+    Cold regions pay cold_start_ms on top of their latency in the SLO check.
+    Returns (region, prewarm): requests go to the lowest-carbon eligible region,
+    warm ones first; with nothing eligible, the nearest warm region serves (the
+    nearest region if none is warm).  prewarm names a cold region that would be
+    eligible once loaded, for a background load: the lowest-carbon one when no
+    warm region is eligible, otherwise only if it beats the choice by at least
+    min_carbon_gain (else None).
+    """
+    warm_lats = lats + inference_ms + jitter_buffer
+    eligible = warm_lats + np.where(warm, 0, cold_start_ms) <= slo_threshold
+    warm_ok = eligible & warm
+    cold_ok = eligible & ~warm
+    # A background load keeps the cold start off the request path
+    loadable = (warm_lats <= slo_threshold) & ~warm
+    best_cold = np.argmin(np.where(loadable, cis, 1e9)) if loadable.any() else None
+    if warm_ok.any():
+        idx = np.argmin(np.where(warm_ok, cis, 1e9))
+        if best_cold is not None and cis[best_cold] > cis[idx] - min_carbon_gain:
+            best_cold = None
+        return idx, best_cold
+    if cold_ok.any():
+        return np.argmin(np.where(cold_ok, cis, 1e9)), None
+    if warm.any():
+        return np.argmin(np.where(warm, lats, np.inf)), best_cold
+    return np.argmin(lats), None
+
+
+def hedged_constrained_hybrid(lats, cis, slo_threshold, inference_ms, jitter_buffer=9, **kwargs):
+    """
+    Hedging on top of constrained_hybrid. Returns (primary, hedge): the primary is
+    the constrained-hybrid choice, the hedge is the lowest-latency region that a
+    duplicate is sent to if the primary has not answered by the deadline. Only a
+    region strictly faster than the primary can win the race back, so the hedge
+    is None when the primary is already the lowest-latency region.
+    """
+    primary = constrained_hybrid(lats, cis, slo_threshold, inference_ms, jitter_buffer)
+    faster = lats < lats[primary]
+    if not faster.any():
+        return primary, None
+    return primary, np.argmin(np.where(faster, lats, np.inf))
+
+
+def get_policy_configs(alpha_values=None):
+    """(label, policy type, alpha) for every policy in the standard comparison."""
+    configs = [
+        ('Latency-First', 'latency_first', None),
+        ('Carbon-First', 'carbon_first', None),
+    ]
+    for alpha in HYBRID_ALPHA_VALUES if alpha_values is None else alpha_values:
+        # FIX 1: use \u03b1 (single backslash) so α renders correctly in the CSV
+        configs.append((f'Hybrid (\u03b1={alpha})', 'hybrid', alpha))
+    configs.append(('Constrained Hybrid', 'constrained', None))
+    return configs
+
+
+def select_region(ptype, lats, cis, alpha, slo_threshold, inference_ms, transfer_ms=0):
+    """Dispatch one routing decision for the standard policy types."""
+    if ptype == 'latency_first':
+        return latency_first(lats, cis)
+    elif ptype == 'carbon_first':
+        return carbon_first(lats, cis)
+    elif ptype == 'hybrid':
+        return hybrid_policy(lats, cis, alpha)
+    elif ptype == 'constrained':
+        return constrained_hybrid(lats, cis, slo_threshold, inference_ms, transfer_ms=transfer_ms)
+    raise ValueError(f"Unknown policy type: {ptype}")
+
+
+def select_regions_batch(ptype, lats, cis, alpha, slo_threshold, inference_ms, jitter_buffer=9, transfer_ms=0,
+                         healthy=None):
+    """
+    Vectorized select_region for N requests at once: lats / cis are (N, R),
+    slo_threshold and inference_ms are (N,), jitter_buffer and transfer_ms are
+    scalars or (N, R).
+    Ties resolve to the lowest region index, exactly like the per-request policies.
+
+    healthy, an (N, R) bool mask, fails traffic over: unhealthy regions are never
+    chosen, unless every region is unhealthy for a request.
+    """
+    if healthy is not None:
+        healthy = healthy | ~healthy.any(axis=1, keepdims=True)
+        lats = np.where(healthy, lats, np.inf)
+        cis = np.where(healthy, cis, np.inf)
+    if ptype == 'latency_first':
+        return np.argmin(lats, axis=1)
+    elif ptype == 'carbon_first':
+        return np.argmin(cis, axis=1)
+    elif ptype == 'hybrid':
+        norm_l = np.clip((lats - LATENCY_GLOBAL_MIN) / (LATENCY_GLOBAL_MAX - LATENCY_GLOBAL_MIN), 0, 1)
+        norm_c = np.clip((cis - CARBON_GLOBAL_MIN) / (CARBON_GLOBAL_MAX - CARBON_GLOBAL_MIN), 0, 1)
+        score = alpha * norm_l + (1 - alpha) * norm_c
+        if healthy is not None:
+            score = np.where(healthy, score, np.inf)
+        return np.argmin(score, axis=1)
+    elif ptype == 'constrained':
+        total_lats = lats + inference_ms[:, None] + transfer_ms + jitter_buffer
+        eligible = total_lats <= slo_threshold[:, None]
+        masked_ci = np.where(eligible, cis, 1e9)
+        return np.where(eligible.any(axis=1), np.argmin(masked_ci, axis=1), np.argmin(lats, axis=1))
+    raise ValueError(f"Unknown policy type: {ptype}")
@@ -18,6 +18,8 @@ from matplotlib.patches import FancyBboxPatch
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 from pathlib import Path
 
+from storage import find_table, read_table
+
 # ── shared style ────────────────────────────────────────────────────────────
 plt.rcParams.update({
     "font.family":    "DejaVu Sans",
@@ -52,14 +54,20 @@ OUT = Path("../outputs/graphs/premium")
 OUT.mkdir(parents=True, exist_ok=True)
 
 # ── helpers ─────────────────────────────────────────────────────────────────
+def _table(stem):
+    path = find_table(Path(stem))
+    if path is None:
+        raise FileNotFoundError(f"No table found for {stem}.* — run simulation.py first")
+    return path
+
 def load_results():
-    return pd.read_csv("../outputs/tables/simulation_results.csv")
+    return read_table(_table("../outputs/tables/simulation_results"))
 
 def load_traces():
-    return pd.read_csv("../outputs/data/carbon_intensity_traces.csv", index_col="hour")
+    return read_table(_table("../outputs/data/carbon_intensity_traces"), index_col="hour")
 
 def load_workloads():
-    return pd.read_csv("../outputs/tables/per_workload_results.csv")
+    return read_table(_table("../outputs/tables/per_workload_results"))
 
 
 # ── Figure A: Carbon Intensity Heatmap ──────────────────────────────────────
@@ -200,11 +208,11 @@ def fig_latency_cdf():
     from config import (REGIONS, LATENCY_MATRIX, BASE_CARBON_INTENSITY,
                         SIMULATION_HOURS, REQUESTS_PER_HOUR, RANDOM_SEED,
                         USER_DISTRIBUTION, get_workload_list,
-                        get_workload_probabilities, sample_inference_time,
-                        get_slo_threshold, HYBRID_ALPHA_VALUES,
+                        get_workload_probabilities, get_slo_threshold, HYBRID_ALPHA_VALUES,
                         CARBON_DIURNAL_AMPLITUDE, CARBON_RANDOM_NOISE_RANGE,
                         NETWORK_JITTER_MEAN, NETWORK_JITTER_STD)
     from policies import latency_first, carbon_first, hybrid_policy, constrained_hybrid
+    from workload_table import WorkloadTable
 
     np.random.seed(RANDOM_SEED)
     hours = SIMULATION_HOURS
@@ -243,10 +251,16 @@ def fig_latency_cdf():
         policy_configs.append((f"Hybrid (α={a})", "hybrid", a))
     policy_configs.append(("Constrained Hybrid", "constrained", None))
 
+    table = WorkloadTable()
+    wl_codes = table.encode(req_wls)
     rng = np.random.default_rng(RANDOM_SEED)
     all_lats = {}
 
     for label, ptype, alpha in policy_configs:
+        # One (inference, jitter) pair of standard normals per request, same stream as a per-request draw
+        z = rng.standard_normal((total, 2))
+        infs = table.inference_from_normals(wl_codes, z[:, 0])
+        jits = np.maximum(0, NETWORK_JITTER_MEAN + NETWORK_JITTER_STD * z[:, 1])
         lats = np.zeros(total)
         for i in range(total):
             h  = req_hours[i]
@@ -254,14 +268,13 @@ def fig_latency_cdf():
             wid = req_wls[i]
             net = lat_lookup[ul]
             cis = ci_arr[h]
-            inf = sample_inference_time(wid, rng=rng)
+            inf = infs[i]
             slo = get_slo_threshold(wid)
             if   ptype == "latency_first": idx = latency_first(net, cis)
             elif ptype == "carbon_first":  idx = carbon_first(net, cis)
             elif ptype == "hybrid":        idx = hybrid_policy(net, cis, alpha)
             else:                          idx = constrained_hybrid(net, cis, slo, inf)
-            jit = max(0, rng.normal(NETWORK_JITTER_MEAN, NETWORK_JITTER_STD))
-            lats[i] = max(1.0, net[idx] + inf + jit)
+            lats[i] = max(1.0, net[idx] + inf + jits[i])
         all_lats[label] = np.sort(lats)
 
     fig, ax = plt.subplots(figsize=(11, 6))
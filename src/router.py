@@ -0,0 +1,188 @@
+"""
+router.py — Concurrent router core with RCU-style carbon snapshot swaps.
+
+The policies in policies.py are pure functions of (lats, cis), so routing calls
+can run concurrently as long as the carbon vector they read never changes under
+them.  RouterCore keeps all decision inputs in one immutable RouterState
+(version, carbon vector, latency table, policy parameters):
+
+  readers  route() / route_batch() read self._state once and use only that
+           object, so every decision sees one consistent state without locks.
+  writers  update_carbon() / update_latency() copy the state, change one field
+           and publish it by a single reference assignment (read-copy-update).
+           A lock serializes writers only; readers never block.
+
+RouterCore.serve() fans batches out over a thread pool.  benchmark_router()
+measures decisions/sec against thread count while a background thread keeps
+swapping carbon snapshots.
+
+Run from src/:  python router.py
+Outputs: ../outputs/tables/router_benchmark.csv
+"""
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    RANDOM_SEED, ROUTER_BENCH_THREADS, ROUTER_BENCH_BATCH, ROUTER_CARBON_UPDATE_HZ,
+)
+from policies import select_region, select_regions_batch
+from simulation import prepare_inputs
+from snapshots import frozen_array
+from storage import TABLE_FORMATS, write_table
+from workload_table import WorkloadTable
+
+
+class RouterState(NamedTuple):
+    version: int
+    carbon: np.ndarray        # (regions,) current carbon intensity, read-only
+    latency: np.ndarray       # (users, regions) RTT table, read-only
+    ptype: str
+    alpha: Optional[float]
+
+
+class RouterCore:
+    """Routing front-end over an atomically swapped RouterState."""
+
+    def __init__(self, latency, carbon, ptype='constrained', alpha=None, telemetry=None):
+        self._state = RouterState(0, frozen_array(carbon), frozen_array(latency), ptype, alpha)
+        self._write_lock = threading.Lock()
+        self.telemetry = telemetry
+        self.slo = WorkloadTable().slo_ms
+
+    def state(self):
+        return self._state
+
+    def _swap(self, **changes):
+        with self._write_lock:
+            old = self._state
+            self._state = old._replace(version=old.version + 1, **changes)
+            return self._state
+
+    def update_carbon(self, carbon):
+        return self._swap(carbon=frozen_array(carbon))
+
+    def update_latency(self, latency):
+        return self._swap(latency=frozen_array(latency))
+
+    def sync_telemetry(self):
+        """Pull the latest telemetry.LatencyTelemetry mean matrix into the router state."""
+        if self.telemetry is not None:
+            return self.update_latency(self.telemetry.snapshot().mean)
+        return self._state
+
+    def route(self, user_code, workload_code, inference_ms):
+        """One decision; returns (region index, state version used)."""
+        st = self._state
+        idx = select_region(st.ptype, st.latency[user_code], st.carbon, st.alpha,
+                            self.slo[workload_code], inference_ms)
+        return idx, st.version
+
+    def route_batch(self, user_codes, workload_codes, inference_ms):
+        """Vectorized decisions for a batch; every request sees the same state version."""
+        st = self._state
+        lats = st.latency[user_codes]
+        cis = np.broadcast_to(st.carbon, lats.shape)
+        idx = select_regions_batch(st.ptype, lats, cis, st.alpha, self.slo[workload_codes], inference_ms)
+        return idx, st.version
+
+    def serve(self, user_codes, workload_codes, inference_ms, n_threads=4,
+              batch_size=ROUTER_BENCH_BATCH, batched=True, executor=None):
+        """Route all requests on a thread pool; returns the region index per request."""
+        n = len(user_codes)
+        out = np.empty(n, dtype=int)
+
+        def work(lo):
+            hi = min(lo + batch_size, n)
+            if batched:
+                out[lo:hi] = self.route_batch(user_codes[lo:hi], workload_codes[lo:hi],
+                                              inference_ms[lo:hi])[0]
+            else:
+                for i in range(lo, hi):
+                    out[i] = self.route(user_codes[i], workload_codes[i], inference_ms[i])[0]
+
+        pool = executor or ThreadPoolExecutor(max_workers=n_threads)
+        try:
+            list(pool.map(work, range(0, n, batch_size)))
+        finally:
+            if executor is None:
+                pool.shutdown()
+        return out
+
+
+def benchmark_router(output_dir=None, n_requests=2_000_000, thread_counts=ROUTER_BENCH_THREADS,
+                     batch_size=ROUTER_BENCH_BATCH, update_hz=ROUTER_CARBON_UPDATE_HZ,
+                     seed=RANDOM_SEED, output_format='csv', scalar_requests=40_000):
+    if output_dir is None:
+        output_dir = str(Path(__file__).parent.parent / 'outputs')
+    os.makedirs(f'{output_dir}/tables', exist_ok=True)
+
+    inputs = prepare_inputs(seed=seed)
+    ci_arr, lat_lookup = inputs['ci_arr'], inputs['lat_lookup']
+    rng = np.random.default_rng(seed)
+    reps = -(-n_requests // len(inputs['user_codes']))
+    user_codes = np.tile(inputs['user_codes'], reps)[:n_requests]
+    wl_codes = np.tile(inputs['wl_codes'], reps)[:n_requests]
+    inference_ms = WorkloadTable().sample_inference(wl_codes, rng)
+
+    rows = []
+    for mode, batched, n in [('batch', True, n_requests), ('scalar', False, scalar_requests)]:
+        for threads in thread_counts:
+            router = RouterCore(lat_lookup, ci_arr[0])
+            stop = threading.Event()
+
+            def updater():
+                # Replays the hourly trace as fast carbon updates while routing runs
+                h = 0
+                while not stop.is_set():
+                    h = (h + 1) % len(ci_arr)
+                    router.update_carbon(ci_arr[h])
+                    stop.wait(1.0 / update_hz)
+
+            upd = threading.Thread(target=updater, daemon=True)
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                upd.start()
+                t0 = time.perf_counter()
+                router.serve(user_codes[:n], wl_codes[:n], inference_ms[:n], batch_size=batch_size,
+                             batched=batched, executor=pool)
+                elapsed = time.perf_counter() - t0
+                stop.set()
+                upd.join()
+            rows.append({
+                'Mode': mode,
+                'Threads': threads,
+                'Requests': n,
+                'Seconds': round(elapsed, 3),
+                'Decisions/s': round(n / elapsed),
+                'Carbon Swaps': router.state().version,
+            })
+
+    bench_df = pd.DataFrame(rows)
+    base = bench_df.groupby('Mode')['Decisions/s'].transform('first')
+    bench_df['Speedup vs 1 Thread'] = (bench_df['Decisions/s'] / base).round(2)
+    write_table(bench_df, f'{output_dir}/tables/router_benchmark', output_format)
+    return bench_df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2_000_000)
+    parser.add_argument('--threads', type=int, nargs='+', default=ROUTER_BENCH_THREADS)
+    parser.add_argument('--batch-size', type=int, default=ROUTER_BENCH_BATCH)
+    parser.add_argument('--update-hz', type=float, default=ROUTER_CARBON_UPDATE_HZ)
+    parser.add_argument('--seed', type=int, default=RANDOM_SEED)
+    parser.add_argument('--output-format', choices=TABLE_FORMATS, default='csv')
+    args = parser.parse_args()
+    df = benchmark_router(n_requests=args.requests, thread_counts=args.threads,
+                          batch_size=args.batch_size, update_hz=args.update_hz,
+                          seed=args.seed, output_format=args.output_format)
+    print(f"[i] {os.cpu_count()} CPU(s) available")
+    print(df.to_string(index=False))
@@ -1,10 +1,18 @@
 import numpy as np
 import pandas as pd
 import os
+import io
+import json
 import argparse
 from pathlib import Path
 from config import *
-from policies import latency_first, carbon_first, hybrid_policy, constrained_hybrid
+from policies import get_policy_configs, select_region
+from ingest import load_request_log
+from arrivals import ARRIVAL_MODELS, generate_arrivals
+from workload_table import WorkloadTable
+from carbon_series import CarbonSeries, align_to_run, load_carbon_series, resample
+from storage import TABLE_FORMATS, write_table
+from timeseries import metric_cube, write_metric_cubes
 
 
 def generate_carbon_traces(hours, seed=RANDOM_SEED):
@@ -35,39 +43,194 @@ def generate_requests(hours, rph, seed=RANDOM_SEED):
     return req_hours, req_users, req_workloads
 
 
-def run_simulation(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOUR, seed=RANDOM_SEED):
+def load_replay_requests(request_log, origin_s=None):
+    """
+    Replay a recorded JSONL log: returns (req_times, req_hours, user_codes, workload_codes, hours,
+    origin_s).  req_times are seconds since the epoch time origin_s (default: the
+    first request); an origin_s later than the first request moves back to it.
+    """
+    times, user_codes, wl_codes = load_request_log(request_log)
+    if len(times) == 0:
+        raise ValueError(f"Request log {request_log} contains no requests")
+    start = float(times.min())
+    origin_s = start if origin_s is None else min(float(origin_s), start)
+    req_times = np.asarray(times - origin_s, dtype=np.float64)
+    req_hours = (req_times // 3600).astype(int)
+    return req_times, req_hours, user_codes, wl_codes, int(req_hours.max()) + 1, origin_s
+
+
+def prepare_inputs(hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOUR, seed=RANDOM_SEED, request_log=None,
+                   carbon_series=None, arrival_model='uniform'):
+    """
+    Build the shared simulation inputs as a dict: per-request arrays (req_times in
+    seconds from the start, req_hours, user_codes, wl_codes), the carbon trace
+    (carbon_df / ci_arr hourly, plus `carbon` as a CarbonSeries at full
+    resolution), the user x region latency table and the run length.
+
+    carbon_series (a path or CarbonSeries) replaces the synthetic hourly trace,
+    and carbon_df holds its hourly means for the hour-indexed experiments.  Its
+    first sample is t=0 of the run; a replayed request log keeps its absolute
+    timestamps on the same clock (t=0 moves back to the log's first request if
+    that comes earlier), so each request meets the carbon of its own time.
+
+    arrival_model 'nhpp' replaces the fixed rph-per-hour stream with
+    arrivals.generate_arrivals (diurnal, time-zone-shifted, bursty; mean rate rph).
+    """
+    if arrival_model not in ARRIVAL_MODELS:
+        raise ValueError(f"Unknown arrival model '{arrival_model}', expected one of {ARRIVAL_MODELS}")
+    if carbon_series is not None and not isinstance(carbon_series, CarbonSeries):
+        carbon_series = load_carbon_series(carbon_series)
+    origin_s = carbon_series.start_s if carbon_series is not None else None
+    if request_log is not None:
+        req_times, req_hours, user_codes, wl_codes, hours, origin_s = load_replay_requests(request_log,
+                                                                                           origin_s)
+    elif arrival_model == 'nhpp':
+        req_times, user_codes, _ = generate_arrivals(hours, rph, seed)
+        req_hours = np.minimum(req_times // 3600, hours - 1).astype(int)
+        wl_codes = WorkloadTable().sample_workloads(len(req_times), np.random.default_rng(seed + 7))
+    else:
+        req_hours, req_users, req_workloads = generate_requests(hours, rph, seed=seed)
+        user_codes = pd.Categorical(req_users, categories=USER_LOCATIONS).codes
+        wl_codes = pd.Categorical(req_workloads, categories=get_workload_list()).codes
+        # Synthetic requests are spread evenly across their hour
+        req_times = req_hours * 3600.0 + (np.arange(len(req_hours)) % rph) * (3600.0 / rph)
+
+    if carbon_series is None:
+        carbon_df = generate_carbon_traces(hours, seed=seed)
+        carbon = CarbonSeries.from_hourly(carbon_df)
+    else:
+        carbon = align_to_run(carbon_series, origin_s)
+        hourly = resample(carbon, 3600, 'mean')
+        carbon_df = pd.DataFrame(hourly.at(np.arange(hours) * 3600.0 + 1800), columns=REGIONS)
+    lat_lookup = np.array([[LATENCY_MATRIX.loc[ul, r] for r in REGIONS] for ul in USER_LOCATIONS])
+    return {
+        'req_times': req_times,
+        'req_hours': req_hours,
+        'user_codes': user_codes,
+        'wl_codes': wl_codes,
+        'carbon_df': carbon_df,
+        'ci_arr': carbon_df.values,
+        'carbon': carbon,
+        'lat_lookup': lat_lookup,
+        'hours': hours,
+    }
+
+
+def checkpoint_path(output_dir):
+    return f'{output_dir}/checkpoints/simulation.ckpt.npz'
+
+
+def save_checkpoint(path, meta, arrays):
+    """
+    Write meta (JSON-able) and the per-request arrays as one .npz, atomically:
+    the file is written beside the target and renamed over it, so a crash
+    mid-write leaves the previous checkpoint intact.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    buf = io.BytesIO()
+    np.savez(buf, meta=np.array(json.dumps(meta)), **arrays)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(buf.getvalue())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path, fingerprint):
+    """(meta, arrays) from a checkpoint, or None if there is none; refuses a different run."""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as ckpt:
+        meta = json.loads(str(ckpt['meta']))
+        arrays = {k: ckpt[k] for k in ckpt.files if k != 'meta'}
+    if meta['fingerprint'] != fingerprint:
+        raise ValueError(f"Checkpoint {path} was written by a different run "
+                         f"({meta['fingerprint']} != {fingerprint}); delete it to start over")
+    return meta, arrays
+
+
+def run_simulation(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOUR, seed=RANDOM_SEED,
+                   request_log=None, output_format='csv', checkpoint_every=SIMULATION_CHECKPOINT_EVERY,
+                   resume=False, carbon_series=None, interpolate_carbon=False, alpha_values=None,
+                   arrival_model='uniform', metric_cubes=True, cancel=None, payload_transfer=False):
+    """
+    Run every policy over the request stream.  Completed policies and the
+    in-progress policy's arrays, counters and stream position are
+    checkpointed every checkpoint_every requests and after each policy; with
+    resume=True the run continues from the last checkpoint and produces the same
+    outputs as an uninterrupted run.  The checkpoint is removed on success.
+    cancel (a threading.Event) stops the run with InterruptedError at the next
+    checkpoint after it is set, leaving that checkpoint to resume from.
+
+    Carbon is looked up per request timestamp from inputs['carbon'], so a
+    sub-hourly carbon_series is used at full resolution (optionally with linear
+    interpolation); the default hourly trace gives the same values as before.
+
+    With payload_transfer, each request also pays the time to move its sampled
+    request/response payloads (transfer.TransferModel: slow-start round trips
+    plus payload over the path's rate, with each region link shared by that
+    hour's routed traffic), added to its end-to-end latency after routing.
+    The Constrained Hybrid plans with the expected transfer to every region
+    (median payloads over the previous hour's link utilization) in its SLO check.
+
+    With metric_cubes, each policy's requests are also reduced to hour x region x
+    workload metrics (timeseries.metric_cube), written to data/hourly_metrics.
+    """
     if output_dir is None:
         output_dir = str(Path(__file__).parent.parent / 'outputs')
     os.makedirs(f'{output_dir}/tables', exist_ok=True)
     os.makedirs(f'{output_dir}/data', exist_ok=True)
 
-    carbon_df = generate_carbon_traces(hours, seed=seed)
-    ci_arr = carbon_df.values
-
-    req_hours, req_users, req_workloads = generate_requests(hours, rph, seed=seed)
+    inputs = prepare_inputs(hours, rph, seed, request_log, carbon_series, arrival_model)
+    req_hours, user_codes, wl_codes = inputs['req_hours'], inputs['user_codes'], inputs['wl_codes']
+    carbon_df, lat_lookup = inputs['carbon_df'], inputs['lat_lookup']
+    ci_rows, ci_idx = inputs['carbon'].lookup_rows(inputs['req_times'], interpolate_carbon)
     total_requests = len(req_hours)
+    workload_ids = get_workload_list()
+    table = WorkloadTable()
+    slo_ms = table.slo(wl_codes)
+    # Every policy sees the same inference time and jitter per request (FIX 2: fair comparison).
+    # Request i used to draw both from a per-policy default_rng(seed), inference first, so the
+    # stream is the rows of one (N, 2) block of standard normals, mapped through WorkloadTable.
+    z = np.random.default_rng(seed).standard_normal((total_requests, 2))
+    inference_all = table.inference_from_normals(wl_codes, z[:, 0])
+    jitter_all = np.maximum(0, NETWORK_JITTER_MEAN + NETWORK_JITTER_STD * z[:, 1])
 
-    lat_lookup = {}
-    for ul in USER_LOCATIONS:
-        lat_lookup[ul] = np.array([LATENCY_MATRIX.loc[ul, r] for r in REGIONS])
+    policy_configs = get_policy_configs(alpha_values)
+    if payload_transfer:
+        # transfer -> experiment -> simulation, so imported here rather than at module level
+        from transfer import TransferModel
+        transfer_model = TransferModel(lat_lookup)
+        median_kb = (table.request_kb_median, table.response_kb_median)
+        request_kb, response_kb = table.sample_payloads(wl_codes, np.random.default_rng(seed + 8))
 
-    policy_configs = [
-        ('Latency-First', 'latency_first', None),
-        ('Carbon-First', 'carbon_first', None),
-    ]
-    for alpha in HYBRID_ALPHA_VALUES:
-        # FIX 1: use \u03b1 (single backslash) so α renders correctly in the CSV
-        policy_configs.append((f'Hybrid (\u03b1={alpha})', 'hybrid', alpha))
-    policy_configs.append(('Constrained Hybrid', 'constrained', None))
+    ckpt_path = checkpoint_path(output_dir)
+    fingerprint = {
+        'hours': inputs['hours'], 'rph': rph, 'seed': seed, 'total_requests': total_requests,
+        'request_log': None if request_log is None else os.path.abspath(request_log),
+        'carbon_series': carbon_series if carbon_series is None or isinstance(carbon_series, str)
+        else f'{type(carbon_series).__name__}({len(carbon_series)}x{carbon_series.step_s:g}s)',
+        'interpolate_carbon': interpolate_carbon,
+        'arrival_model': arrival_model,
+        'metric_cubes': metric_cubes,
+        'payload_transfer': payload_transfer,
+        'policies': [label for label, _, _ in policy_configs],
+    }
+    ckpt = load_checkpoint(ckpt_path, fingerprint) if resume else None
+    if resume:
+        print(f"[i] Resuming from {ckpt_path}" if ckpt else f"[i] No checkpoint at {ckpt_path}; starting fresh")
 
-    results = {}
-    detailed_results = {}
+    results = dict(ckpt[0]['results']) if ckpt else {}
+    detailed_results = dict(ckpt[0]['detailed_results']) if ckpt else {}
+    cubes = {}
+    for p, (label, _, _) in enumerate(policy_configs):
+        if ckpt and f'cube_{p}' in ckpt[1]:
+            cubes[label] = ckpt[1][f'cube_{p}']
 
     for label, ptype, alpha in policy_configs:
-        # FIX 2: reset RNG at the start of EACH policy so all policies get
-        # identical inference time and jitter samples — fair comparison
-        rng = np.random.default_rng(seed)
-
+        if label in results:
+            continue
         latencies = np.zeros(total_requests)
         carbons_out = np.zeros(total_requests)
         inference_times = np.zeros(total_requests)
@@ -77,31 +240,71 @@ def run_simulation(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOU
         total_slo_violations = 0
         region_counts = np.zeros(len(REGIONS), dtype=int)
 
-        for i in range(total_requests):
-            h = req_hours[i]
-            ul = req_users[i]
-            wid = req_workloads[i]
-            lats = lat_lookup[ul]
-            cis = ci_arr[h]
-            inference_ms = sample_inference_time(wid, rng=rng)
+        start = 0
+        if ckpt and ckpt[0]['policy'] == label:
+            meta, arrays = ckpt
+            start = meta['position']
+            latencies[:start] = arrays['latencies']
+            carbons_out[:start] = arrays['carbons']
+            inference_times[:start] = arrays['inference_times']
+            region_selections[:start] = arrays['region_selections']
+            total_slo_violations = meta['total_slo_violations']
+            region_counts[:] = meta['region_counts']
+            for w, wid in enumerate(workload_ids):
+                workload_stats[wid]['count'] = meta['workload_counts'][w]
+                workload_stats[wid]['slo_violations'] = meta['workload_slo_violations'][w]
+                workload_stats[wid]['latencies'] = latencies[:start][wl_codes[:start] == w].tolist()
+
+        def checkpoint(position):
+            meta = {
+                'fingerprint': fingerprint,
+                'results': results,
+                'detailed_results': detailed_results,
+                'policy': label if position is not None else None,
+                'position': position,
+            }
+            # Completed policies' cubes, keyed by position since labels are not safe member names
+            arrays = {f'cube_{p}': cubes[lbl] for p, (lbl, _, _) in enumerate(policy_configs) if lbl in cubes}
+            if position is not None:
+                meta.update({
+                    'total_slo_violations': total_slo_violations,
+                    'region_counts': region_counts.tolist(),
+                    'workload_counts': [workload_stats[wid]['count'] for wid in workload_ids],
+                    'workload_slo_violations': [workload_stats[wid]['slo_violations'] for wid in workload_ids],
+                })
+                arrays.update({
+                    'latencies': latencies[:position],
+                    'carbons': carbons_out[:position],
+                    'inference_times': inference_times[:position],
+                    'region_selections': region_selections[:position],
+                })
+            save_checkpoint(ckpt_path, meta, arrays)
+
+        plan_transfer = payload_transfer and ptype == 'constrained'
+        plan_hour, expected_transfer = None, None
+        for i in range(start, total_requests):
+            wid = workload_ids[wl_codes[i]]
+            lats = lat_lookup[user_codes[i]]
+            cis = ci_rows[ci_idx[i]]
+            inference_ms = inference_all[i]
             inference_times[i] = inference_ms
-            slo_threshold = get_slo_threshold(wid)
-
-            if ptype == 'latency_first':
-                idx = latency_first(lats, cis)
-            elif ptype == 'carbon_first':
-                idx = carbon_first(lats, cis)
-            elif ptype == 'hybrid':
-                idx = hybrid_policy(lats, cis, alpha)
-            elif ptype == 'constrained':
-                idx = constrained_hybrid(lats, cis, slo_threshold, inference_ms)
-            else:
-                raise ValueError(f"Unknown policy type: {ptype}")
+            slo_threshold = slo_ms[i]
+
+            transfer_ms = 0
+            if plan_transfer:
+                if req_hours[i] != plan_hour:
+                    # Plan on the link utilization of the previous hour's requests routed so far
+                    plan_hour = req_hours[i]
+                    prev = np.flatnonzero(req_hours[:i] == plan_hour - 1)
+                    rho = transfer_model.utilization(region_selections[prev], request_kb[prev] + response_kb[prev])
+                    expected_transfer = transfer_model.expected_transfer_table(*median_kb, rho)
+                transfer_ms = expected_transfer[wl_codes[i], user_codes[i]]
+
+            idx = select_region(ptype, lats, cis, alpha, slo_threshold, inference_ms, transfer_ms)
 
             region_selections[i] = idx
             net_lat = lats[idx]
-            jitter = max(0, rng.normal(NETWORK_JITTER_MEAN, NETWORK_JITTER_STD))
-            total_lat = max(1.0, net_lat + inference_ms + jitter)
+            total_lat = max(1.0, net_lat + inference_ms + jitter_all[i])
             latencies[i] = total_lat
             carbons_out[i] = cis[idx]
             region_counts[idx] += 1
@@ -112,6 +315,23 @@ def run_simulation(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOU
             workload_stats[wid]['count'] += 1
             workload_stats[wid]['latencies'].append(total_lat)
 
+            if checkpoint_every and (i + 1) % checkpoint_every == 0 and i + 1 < total_requests:
+                checkpoint(i + 1)
+                if cancel is not None and cancel.is_set():
+                    raise InterruptedError(f"Run cancelled at request {i + 1} of '{label}'")
+
+        if payload_transfer:
+            # Link utilization depends on the whole hour's routing, so transfer is added once it is known
+            transfer = transfer_model.hourly_transfer_ms(req_hours, user_codes, region_selections,
+                                                         request_kb, response_kb)
+            latencies += transfer
+            violated = latencies > slo_ms
+            total_slo_violations = int(violated.sum())
+            for w, wid in enumerate(workload_ids):
+                mask = wl_codes == w
+                workload_stats[wid]['latencies'] = latencies[mask].tolist()
+                workload_stats[wid]['slo_violations'] = int(violated[mask].sum())
+
         results[label] = {
             'avg_latency': round(np.mean(latencies), 1),
             'p95_latency': round(np.percentile(latencies, 95), 1),
@@ -120,6 +340,8 @@ def run_simulation(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOU
             'avg_inference_time': round(np.mean(inference_times), 1),
             'region_dist': {REGIONS[j]: int(region_counts[j]) for j in range(len(REGIONS))},
         }
+        if payload_transfer:
+            results[label]['avg_transfer'] = round(np.mean(transfer), 1)
         detailed_results[label] = {}
         for wid, stats in workload_stats.items():
             if stats['count'] > 0:
@@ -130,6 +352,13 @@ def run_simulation(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOU
                     'slo_violation_pct': 100 * stats['slo_violations'] / stats['count'],
                     'slo_threshold': get_slo_threshold(wid),
                 }
+        if metric_cubes:
+            cubes[label] = metric_cube(req_hours, region_selections, wl_codes, latencies, slo_ms,
+                                       carbons_out, inputs['hours'])
+        if checkpoint_every:
+            checkpoint(None)
+            if cancel is not None and cancel.is_set():
+                raise InterruptedError(f"Run cancelled after '{label}'")
 
     baseline_carbon = results['Latency-First']['avg_carbon']
     for label, res in results.items():
@@ -148,15 +377,18 @@ def run_simulation(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOU
             'Avg Carbon (gCO2eq/kWh)': res['avg_carbon'],
             'Carbon Reduction': res['carbon_reduction'],
         }
+        if 'avg_transfer' in res:
+            row['Avg Transfer (ms)'] = res['avg_transfer']
         for region, count in res['region_dist'].items():
             row[region] = count
         rows.append(row)
 
     results_df = pd.DataFrame(rows)
     # FIX 3: write CSV with explicit utf-8 encoding so α character is preserved
-    results_df.to_csv(f'{output_dir}/tables/simulation_results.csv', index=False, encoding='utf-8')
-    carbon_df.to_csv(f'{output_dir}/data/carbon_intensity_traces.csv', index_label='hour')
-    LATENCY_MATRIX.to_csv(f'{output_dir}/data/latency_matrix.csv')
+    write_table(results_df, f'{output_dir}/tables/simulation_results', output_format)
+    write_table(carbon_df, f'{output_dir}/data/carbon_intensity_traces', output_format,
+                index=True, index_label='hour')
+    write_table(LATENCY_MATRIX, f'{output_dir}/data/latency_matrix', output_format, index=True)
 
     workload_rows = []
     for policy, wl_data in detailed_results.items():
@@ -173,8 +405,14 @@ def run_simulation(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOU
             })
     workload_df = pd.DataFrame(workload_rows)
     # FIX 3 (same): explicit utf-8 for workload CSV too
-    workload_df.to_csv(f'{output_dir}/tables/per_workload_results.csv', index=False, encoding='utf-8')
+    write_table(workload_df, f'{output_dir}/tables/per_workload_results', output_format)
+    if metric_cubes:
+        write_metric_cubes(cubes, output_dir)
 
+    if os.path.exists(ckpt_path):
+        os.remove(ckpt_path)
+        if not os.listdir(os.path.dirname(ckpt_path)):
+            os.rmdir(os.path.dirname(ckpt_path))
     return results_df, carbon_df, detailed_results
 
 
@@ -183,5 +421,28 @@ if __name__ == '__main__':
     parser.add_argument('--sim-hours', type=int, default=SIMULATION_HOURS)
     parser.add_argument('--reqs-per-hour', type=int, default=REQUESTS_PER_HOUR)
     parser.add_argument('--seed', type=int, default=RANDOM_SEED)
+    parser.add_argument('--request-log', default=None,
+                        help='Replay a JSONL request log instead of synthesizing requests')
+    parser.add_argument('--output-format', choices=TABLE_FORMATS, default='csv',
+                        help='Table backend for results and traces (csv is human-readable)')
+    parser.add_argument('--checkpoint-every', type=int, default=SIMULATION_CHECKPOINT_EVERY,
+                        help='Requests per policy between checkpoints (0 disables)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue from the last checkpoint in outputs/checkpoints/')
+    parser.add_argument('--carbon-series', default=None,
+                        help='Carbon table with a timestamp column, at any resolution')
+    parser.add_argument('--interpolate-carbon', action='store_true',
+                        help='Interpolate the carbon series linearly between samples')
+    parser.add_argument('--arrivals', choices=ARRIVAL_MODELS, default='uniform',
+                        help='uniform: rph every hour; nhpp: diurnal, time-zone-shifted, bursty arrivals')
+    parser.add_argument('--no-metric-cubes', action='store_true',
+                        help='Skip the hour x region x workload metrics in data/hourly_metrics')
+    parser.add_argument('--payload-transfer', action='store_true',
+                        help='Add payload transfer time (path bandwidth, link contention) to latency')
     args = parser.parse_args()
-    run_simulation(hours=args.sim_hours, rph=args.reqs_per_hour, seed=args.seed)
+    run_simulation(hours=args.sim_hours, rph=args.reqs_per_hour, seed=args.seed,
+                   request_log=args.request_log, output_format=args.output_format,
+                   checkpoint_every=args.checkpoint_every, resume=args.resume,
+                   carbon_series=args.carbon_series, interpolate_carbon=args.interpolate_carbon,
+                   arrival_model=args.arrivals, metric_cubes=not args.no_metric_cubes,
+                   payload_transfer=args.payload_transfer)
@@ -0,0 +1,17 @@
+"""
+snapshots.py — Read-only arrays for lock-free published snapshots.
+
+telemetry.LatencyTelemetry and router.RouterCore publish state by swapping in a
+new NamedTuple of arrays (read-copy-update): readers take no locks, so nothing
+may mutate an array once it is published.  frozen_array makes the private,
+read-only copy every published field is built from.
+"""
+
+import numpy as np
+
+
+def frozen_array(arr):
+    """A float copy of arr with writes disabled, safe to share with lock-free readers."""
+    arr = np.array(arr, dtype=float)
+    arr.flags.writeable = False
+    return arr
@@ -0,0 +1,112 @@
+"""
+storage.py — Table output backends for simulation results and traces.
+
+CSV stays the human-readable default.  For large per-hour / per-request tables
+two typed, compressed columnar backends are available:
+
+  npz      NumPy .npz archive, one compressed array per column plus a JSON
+           manifest (column names, dtypes, index column) stored alongside.
+  parquet  Apache Parquet via pandas, when pyarrow or fastparquet is installed
+           (falls back to npz otherwise).
+
+Writers take a path *stem* (no extension); readers auto-detect which backend a
+table was written with, preferring the most recently written file.
+"""
+
+import importlib.util
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TABLE_FORMATS = ('csv', 'npz', 'parquet')
+FORMAT_SUFFIXES = {'csv': '.csv', 'npz': '.npz', 'parquet': '.parquet'}
+MANIFEST_KEY = '__manifest__'
+
+
+def parquet_available():
+    return any(importlib.util.find_spec(m) is not None for m in ('pyarrow', 'fastparquet'))
+
+
+def resolve_format(fmt):
+    if fmt not in TABLE_FORMATS:
+        raise ValueError(f"Unknown output format '{fmt}', expected one of {TABLE_FORMATS}")
+    if fmt == 'parquet' and not parquet_available():
+        print("[WARN] Parquet requested but neither pyarrow nor fastparquet is installed; writing npz")
+        return 'npz'
+    return fmt
+
+
+def _column_array(col):
+    if pd.api.types.is_numeric_dtype(col) or pd.api.types.is_bool_dtype(col):
+        return col.to_numpy()
+    # Strings are stored as fixed-width unicode so the archive never needs pickle
+    return col.astype(str).to_numpy(dtype=str)
+
+
+def _write_npz(df, path, index, index_label):
+    if index:
+        df = df.reset_index(names=index_label or df.index.name or 'index')
+    names = [str(c) for c in df.columns]
+    # Column names such as 'Avg Carbon (gCO2eq/kWh)' are not safe archive member
+    # names, so arrays are stored positionally and named through the manifest
+    arrays = {f'c{i}': _column_array(df[c]) for i, c in enumerate(df.columns)}
+    manifest = {
+        'columns': names,
+        'dtypes': {n: str(a.dtype) for n, a in zip(names, arrays.values())},
+        'index': (index_label or df.columns[0]) if index else None,
+        'rows': len(df),
+    }
+    arrays[MANIFEST_KEY] = np.array(json.dumps(manifest))
+    np.savez_compressed(path, **arrays)
+
+
+def _read_npz(path):
+    with np.load(path, allow_pickle=False) as data:
+        manifest = json.loads(str(data[MANIFEST_KEY]))
+        df = pd.DataFrame({name: data[f'c{i}'] for i, name in enumerate(manifest['columns'])})
+    if manifest['index'] is not None:
+        df = df.set_index(manifest['index'])
+    return df
+
+
+def write_table(df, stem, fmt='csv', index=False, index_label=None):
+    """Write df to <stem>.<ext> in the requested format and return the path written."""
+    fmt = resolve_format(fmt)
+    path = Path(str(stem) + FORMAT_SUFFIXES[fmt])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == 'csv':
+        df.to_csv(path, index=index, index_label=index_label, encoding='utf-8')
+    elif fmt == 'npz':
+        _write_npz(df, path, index, index_label)
+    else:
+        out = df.rename_axis(index_label) if index and index_label else df
+        out.to_parquet(path, index=index)
+    return path
+
+
+def find_table(stem):
+    """Return the newest existing file for a table stem across all backends, or None."""
+    stem = Path(stem)
+    if stem.suffix in FORMAT_SUFFIXES.values():
+        stem = stem.with_suffix('')
+    candidates = [Path(str(stem) + sfx) for sfx in FORMAT_SUFFIXES.values()]
+    existing = [p for p in candidates if p.exists()]
+    if not existing:
+        return None
+    return max(existing, key=lambda p: p.stat().st_mtime_ns)
+
+
+def read_table(path, index_col=None):
+    """Read a table written by write_table; the backend is picked from the suffix."""
+    path = Path(path)
+    if path.suffix == '.npz':
+        df = _read_npz(path)
+    elif path.suffix == '.parquet':
+        df = pd.read_parquet(path)
+    else:
+        return pd.read_csv(path, index_col=index_col, encoding='utf-8')
+    if index_col is not None and df.index.name != index_col:
+        df = df.set_index(index_col)
+    return df
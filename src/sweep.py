@@ -0,0 +1,338 @@
+"""
+sweep.py — Sharded run_simulation sweeps through a SQLite work queue.
+
+A coordinator expands the scenario grid (seeds x hybrid alpha sets x carbon
+series x load x duration) into one work item per run_simulation call and
+writes them to a SQLite queue file.  Any number of workers, on this host or on
+others that share the filesystem, then loop:
+
+  claim   one BEGIN IMMEDIATE transaction picks a pending item, or a running one
+          whose heartbeat is older than SWEEP_LEASE_S (its worker died), and
+          stamps it with a fresh lease token
+  run     run_simulation in a directory of the attempt's own, with checkpoints;
+          a re-claimed item first copies in the newest checkpoint an earlier
+          attempt left, so it resumes where that attempt stopped without the
+          two ever writing to the same place.  The heartbeat only renews the
+          attempt's own lease: once it finds the lease taken over, the attempt
+          stops at its next checkpoint
+  commit  INSERT OR IGNORE of the result tables keyed by the item, then mark it
+          done.  A result is committed at most once however many attempts
+          (say, a slow worker whose lease was taken over) finish it.
+
+Items that fail SWEEP_MAX_ATTEMPTS times are marked failed with the error.
+merge concatenates the committed results into the usual result tables, with
+the scenario parameters as leading columns, plus a seed-averaged summary.
+
+Run from src/:
+    python sweep.py init   --queue ../outputs/sweep.db --seeds 42 43 44 --reqs-per-hour 200 1000
+    python sweep.py worker --queue ../outputs/sweep.db      # start as many as you like
+    python sweep.py status --queue ../outputs/sweep.db
+    python sweep.py merge  --queue ../outputs/sweep.db
+Outputs: ../outputs/tables/sweep_results.csv
+         ../outputs/tables/sweep_per_workload_results.csv
+         ../outputs/tables/sweep_summary.csv
+
+SQLite locking needs a filesystem with working POSIX locks; on NFS that means
+a lock-capable mount (no `nolock`).
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+
+from config import (
+    SIMULATION_HOURS, REQUESTS_PER_HOUR, RANDOM_SEED, HYBRID_ALPHA_VALUES,
+    SIMULATION_CHECKPOINT_EVERY, SWEEP_LEASE_S, SWEEP_HEARTBEAT_S, SWEEP_MAX_ATTEMPTS,
+)
+from simulation import checkpoint_path, run_simulation
+from storage import TABLE_FORMATS, find_table, read_table, write_table
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    key         TEXT PRIMARY KEY,
+    params      TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',   -- pending | running | done | failed
+    worker      TEXT,
+    token       TEXT,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    heartbeat   REAL,
+    finished_at REAL,
+    error       TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    key          TEXT PRIMARY KEY REFERENCES items(key),
+    results      TEXT NOT NULL,
+    per_workload TEXT NOT NULL,
+    worker       TEXT NOT NULL,
+    seconds      REAL NOT NULL
+);
+"""
+
+
+def connect(queue_path):
+    con = sqlite3.connect(queue_path, timeout=60, isolation_level=None)
+    con.executescript(SCHEMA)
+    return con
+
+
+def item_key(params):
+    """Stable key for a scenario, so re-running init never duplicates items."""
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def build_grid(seeds=(RANDOM_SEED,), alpha_sets=(HYBRID_ALPHA_VALUES,), carbon_series=(None,),
+               rph_values=(REQUESTS_PER_HOUR,), hours_values=(SIMULATION_HOURS,), request_log=None):
+    """One run_simulation kwargs dict per scenario in the cross product."""
+    return [
+        {'seed': seed, 'alpha_values': list(alphas), 'carbon_series': cs, 'rph': rph,
+         'hours': hours, 'request_log': request_log}
+        for seed, alphas, cs, rph, hours in itertools.product(
+            seeds, alpha_sets, carbon_series, rph_values, hours_values)
+    ]
+
+
+def enqueue(queue_path, grid):
+    """Coordinator: add work items; existing items (same key) are left untouched."""
+    con = connect(queue_path)
+    with con:
+        con.execute('BEGIN IMMEDIATE')
+        before = con.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+        con.executemany('INSERT OR IGNORE INTO items (key, params) VALUES (?, ?)',
+                        [(item_key(p), json.dumps(p, sort_keys=True)) for p in grid])
+        added = con.execute('SELECT COUNT(*) FROM items').fetchone()[0] - before
+    con.close()
+    return added
+
+
+def claim(con, worker, lease_s=SWEEP_LEASE_S, max_attempts=SWEEP_MAX_ATTEMPTS):
+    """Atomically take the next pending or abandoned item; returns (key, params, token) or None."""
+    now = time.time()
+    with con:
+        con.execute('BEGIN IMMEDIATE')
+        # Abandoned items that used up their attempts are failed rather than retried
+        con.execute("""UPDATE items SET status = 'failed', error = 'lease expired after final attempt'
+                       WHERE status = 'running' AND heartbeat < ? AND attempts >= ?""",
+                    (now - lease_s, max_attempts))
+        row = con.execute("""SELECT key, params FROM items
+                             WHERE status = 'pending' OR (status = 'running' AND heartbeat < ?)
+                             ORDER BY rowid LIMIT 1""", (now - lease_s,)).fetchone()
+        if row is None:
+            return None
+        token = uuid.uuid4().hex
+        con.execute("""UPDATE items SET status = 'running', worker = ?, token = ?,
+                       attempts = attempts + 1, heartbeat = ? WHERE key = ?""",
+                    (worker, token, now, row[0]))
+    return row[0], json.loads(row[1]), token
+
+
+def _heartbeat(queue_path, key, token, stop, lost, interval_s):
+    con = connect(queue_path)
+    while not stop.wait(interval_s):
+        cur = con.execute("UPDATE items SET heartbeat = ? WHERE key = ? AND token = ? AND status = 'running'",
+                          (time.time(), key, token))
+        if cur.rowcount == 0:
+            # Another worker took the lease over, or the item was finished without us
+            lost.set()
+            break
+    con.close()
+
+
+def _resume_checkpoint(work_dir, key, run_dir):
+    """Copy the newest checkpoint left by an earlier attempt of key into run_dir, if there is one."""
+    target = Path(checkpoint_path(run_dir))
+    ckpts = [p for p in Path(work_dir, key).glob('*/checkpoints/simulation.ckpt.npz') if p != target]
+    for src in sorted(ckpts, key=lambda p: p.stat().st_mtime if p.exists() else 0, reverse=True):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            shutil.copyfile(src, f'{target}.tmp')
+        except FileNotFoundError:
+            continue    # that attempt finished or gave up meanwhile
+        os.replace(f'{target}.tmp', target)
+        return src
+    return None
+
+
+def commit(con, key, worker, results_df, workload_df, seconds):
+    """
+    Record an item's result tables.  Idempotent: the first committed result for a
+    key wins and later commits change nothing.  Returns True if this call's
+    result was the one kept.
+    """
+    with con:
+        con.execute('BEGIN IMMEDIATE')
+        cur = con.execute('INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?, ?)',
+                          (key, results_df.to_json(orient='split'), workload_df.to_json(orient='split'),
+                           worker, seconds))
+        con.execute("""UPDATE items SET status = 'done', finished_at = ?, error = NULL
+                       WHERE key = ? AND status != 'done'""", (time.time(), key))
+    return cur.rowcount == 1
+
+
+def fail(con, key, token, error, max_attempts=SWEEP_MAX_ATTEMPTS):
+    """Put a failed attempt back in the queue, or mark the item failed after max_attempts."""
+    with con:
+        con.execute("""UPDATE items SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                       error = ? WHERE key = ? AND token = ? AND status = 'running'""",
+                    (max_attempts, error, key, token))
+
+
+def run_worker(queue_path, work_dir=None, max_items=None, lease_s=SWEEP_LEASE_S,
+               heartbeat_s=SWEEP_HEARTBEAT_S, max_attempts=SWEEP_MAX_ATTEMPTS,
+               checkpoint_every=SIMULATION_CHECKPOINT_EVERY):
+    """Claim, run and commit items until the queue has nothing claimable; returns items run."""
+    if work_dir is None:
+        work_dir = str(Path(queue_path).resolve().parent / 'sweep_runs')
+    worker = f'{socket.gethostname()}:{os.getpid()}'
+    con = connect(queue_path)
+    done = 0
+    while max_items is None or done < max_items:
+        claimed = claim(con, worker, lease_s, max_attempts)
+        if claimed is None:
+            break
+        key, params, token = claimed
+        run_dir = f'{work_dir}/{key}/{token}'
+        resumed = _resume_checkpoint(work_dir, key, run_dir)
+        stop, lost = threading.Event(), threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(queue_path, key, token, stop, lost, heartbeat_s),
+                                daemon=True)
+        beat.start()
+        t0 = time.perf_counter()
+        try:
+            results_df, _, _ = run_simulation(output_dir=run_dir, checkpoint_every=checkpoint_every,
+                                              resume=resumed is not None, metric_cubes=False,
+                                              cancel=lost, **params)
+            workload_df = read_table(find_table(f'{run_dir}/tables/per_workload_results'))
+        except Exception as e:
+            stop.set()
+            beat.join()
+            shutil.rmtree(run_dir, ignore_errors=True)
+            if lost.is_set():
+                print(f"[WARN] {worker} item {key} lost its lease; attempt stopped")
+                continue
+            fail(con, key, token, f'{type(e).__name__}: {e}', max_attempts)
+            print(f"[WARN] {worker} item {key} failed: {e}")
+            continue
+        stop.set()
+        beat.join()
+        kept = commit(con, key, worker, results_df, workload_df, time.perf_counter() - t0)
+        shutil.rmtree(run_dir, ignore_errors=True)
+        try:
+            os.rmdir(f'{work_dir}/{key}')     # only once no other attempt has a directory there
+        except OSError:
+            pass
+        print(f"[i] {worker} item {key} {'committed' if kept else 'already committed elsewhere'}")
+        done += 1
+    con.close()
+    return done
+
+
+def queue_status(queue_path):
+    con = connect(queue_path)
+    df = pd.read_sql_query("""SELECT status AS Status, COUNT(*) AS Items, SUM(attempts) AS Attempts
+                              FROM items GROUP BY status ORDER BY status""", con)
+    con.close()
+    return df
+
+
+def merge_results(queue_path, output_dir=None, output_format='csv'):
+    """Concatenate committed results into sweep result tables plus a seed-averaged summary."""
+    if output_dir is None:
+        output_dir = str(Path(__file__).parent.parent / 'outputs')
+    os.makedirs(f'{output_dir}/tables', exist_ok=True)
+    con = connect(queue_path)
+    rows = con.execute("""SELECT items.params, results.results, results.per_workload
+                          FROM results JOIN items USING (key) ORDER BY items.rowid""").fetchall()
+    con.close()
+    if not rows:
+        raise ValueError(f"No committed results in {queue_path}")
+
+    def scenario(params):
+        return {
+            'Seed': params['seed'],
+            'Hours': params['hours'],
+            'Requests/Hour': params['rph'],
+            'Alpha Set': ' '.join(f'{a:g}' for a in params['alpha_values']),
+            'Carbon Series': params['carbon_series'] or 'synthetic',
+        }
+
+    def framed(params, payload):
+        df = pd.read_json(StringIO(payload), orient='split')
+        for i, (col, val) in enumerate(scenario(params).items()):
+            df.insert(i, col, val)
+        return df
+
+    results_df = pd.concat([framed(json.loads(p), r) for p, r, _ in rows], ignore_index=True)
+    workload_df = pd.concat([framed(json.loads(p), w) for p, _, w in rows], ignore_index=True)
+
+    group = ['Hours', 'Requests/Hour', 'Alpha Set', 'Carbon Series', 'Policy']
+    metrics = ['Avg Latency (ms)', 'P95 Latency (ms)', 'SLO Violation Rate (%)',
+               'Avg Carbon (gCO2eq/kWh)', 'Carbon Reduction']
+    summary = results_df.groupby(group, sort=False)[metrics].agg(['mean', 'std'])
+    summary.columns = [f'{m} {stat}' for m, stat in summary.columns]
+    summary = summary.round(3).reset_index()
+    summary.insert(len(group), 'Seeds', results_df.groupby(group, sort=False)['Seed'].nunique().to_numpy())
+
+    write_table(results_df, f'{output_dir}/tables/sweep_results', output_format)
+    write_table(workload_df, f'{output_dir}/tables/sweep_per_workload_results', output_format)
+    write_table(summary, f'{output_dir}/tables/sweep_summary', output_format)
+    return results_df, workload_df, summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest='command', required=True)
+    default_queue = str(Path(__file__).parent.parent / 'outputs' / 'sweep.db')
+
+    p_init = sub.add_parser('init', help='Shard the scenario grid into the queue')
+    p_init.add_argument('--queue', default=default_queue)
+    p_init.add_argument('--seeds', type=int, nargs='+', default=[RANDOM_SEED])
+    p_init.add_argument('--alpha-sets', nargs='+', default=[','.join(map(str, HYBRID_ALPHA_VALUES))],
+                        help='Comma-separated hybrid alpha lists, one per scenario, e.g. 0.5,0.7 0.3')
+    p_init.add_argument('--carbon-series', nargs='+', default=[None],
+                        help='Carbon series files (topologies) to sweep; default synthetic')
+    p_init.add_argument('--reqs-per-hour', type=int, nargs='+', default=[REQUESTS_PER_HOUR])
+    p_init.add_argument('--sim-hours', type=int, nargs='+', default=[SIMULATION_HOURS])
+    p_init.add_argument('--request-log', default=None)
+
+    p_worker = sub.add_parser('worker', help='Claim and run items until the queue drains')
+    p_worker.add_argument('--queue', default=default_queue)
+    p_worker.add_argument('--work-dir', default=None)
+    p_worker.add_argument('--max-items', type=int, default=None)
+    p_worker.add_argument('--lease', type=float, default=SWEEP_LEASE_S)
+    p_worker.add_argument('--heartbeat', type=float, default=SWEEP_HEARTBEAT_S)
+
+    p_status = sub.add_parser('status', help='Item counts by status')
+    p_status.add_argument('--queue', default=default_queue)
+
+    p_merge = sub.add_parser('merge', help='Write merged sweep tables')
+    p_merge.add_argument('--queue', default=default_queue)
+    p_merge.add_argument('--output-format', choices=TABLE_FORMATS, default='csv')
+
+    args = parser.parse_args()
+    if args.command == 'init':
+        os.makedirs(os.path.dirname(os.path.abspath(args.queue)), exist_ok=True)
+        alpha_sets = [[float(a) for a in s.split(',') if a] for s in args.alpha_sets]
+        carbon = [None if c in (None, 'synthetic') else os.path.abspath(c) for c in args.carbon_series]
+        log = None if args.request_log is None else os.path.abspath(args.request_log)
+        grid = build_grid(args.seeds, alpha_sets, carbon, args.reqs_per_hour, args.sim_hours, log)
+        print(f"[i] {enqueue(args.queue, grid)} new item(s) queued ({len(grid)} in grid)")
+    elif args.command == 'worker':
+        n = run_worker(args.queue, args.work_dir, args.max_items, args.lease, args.heartbeat)
+        print(f"[i] Worker finished after {n} item(s)")
+    elif args.command == 'status':
+        print(queue_status(args.queue).to_string(index=False))
+    else:
+        _, _, summary = merge_results(args.queue, output_format=args.output_format)
+        print(summary.to_string(index=False))
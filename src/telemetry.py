@@ -0,0 +1,197 @@
+"""
+telemetry.py — Live per-path latency telemetry with an EWMA-updated latency matrix.
+
+Routing normally reads the static LATENCY_MATRIX.  LatencyTelemetry instead keeps,
+for every (user location, region) path, an exponentially weighted mean latency
+and a tracked TELEMETRY_TAIL_QUANTILE latency, fed by observed samples from the
+simulator or from a replay file.
+
+Concurrency model:
+  writers   any number of threads call record() / record_batch(); batches go onto
+            a queue.SimpleQueue, so writers never contend on the estimator state.
+  publisher publish() drains the queue, folds all pending samples into the
+            estimates with bincount reductions and swaps in a new LatencySnapshot.
+  readers   snapshot() returns the current LatencySnapshot.  Snapshots are
+            immutable (read-only arrays), and replacing the reference is atomic,
+            so readers take no locks and always see a consistent matrix.
+
+Run from src/:  python telemetry.py
+Outputs: ../outputs/tables/telemetry_results.csv
+"""
+
+import queue
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    REGIONS, USER_LOCATIONS, SIMULATION_HOURS, REQUESTS_PER_HOUR, RANDOM_SEED,
+    TELEMETRY_EWMA_ALPHA, TELEMETRY_TAIL_QUANTILE, TELEMETRY_PROBES_PER_PATH,
+)
+from experiment import (
+    experiment_dirs, experiment_kwargs, experiment_parser, policy_metrics, sample_requests, write_results,
+)
+from network import PathLatencyModel
+from policies import select_regions_batch
+from snapshots import frozen_array
+from storage import read_table
+
+
+class LatencySnapshot(NamedTuple):
+    version: int
+    mean: np.ndarray      # (users, regions) EWMA latency in ms, read-only
+    tail: np.ndarray      # (users, regions) tracked tail latency in ms, read-only
+    samples: np.ndarray   # (users, regions) samples folded in so far, read-only
+
+
+class LatencyTelemetry:
+    """EWMA mean / tail latency per path, published as immutable snapshots."""
+
+    def __init__(self, initial_latency, initial_buffer=9.0, ewma_alpha=TELEMETRY_EWMA_ALPHA,
+                 tail_quantile=TELEMETRY_TAIL_QUANTILE):
+        initial_latency = np.asarray(initial_latency, dtype=float)
+        self.shape = initial_latency.shape
+        self.ewma_alpha = ewma_alpha
+        self.tail_quantile = tail_quantile
+        self._pending = queue.SimpleQueue()
+        self._publish_lock = threading.Lock()
+        self._snapshot = LatencySnapshot(
+            0, frozen_array(initial_latency), frozen_array(initial_latency + initial_buffer),
+            frozen_array(np.zeros(self.shape)))
+
+    def snapshot(self):
+        """Current snapshot; safe to call from any thread without locking."""
+        return self._snapshot
+
+    def record(self, user_code, region, latency_ms):
+        self.record_batch(np.array([user_code]), np.array([region]), np.array([latency_ms]))
+
+    def record_batch(self, user_codes, regions, latencies_ms):
+        """Queue observed latencies; applied on the next publish()."""
+        self._pending.put((np.asarray(user_codes), np.asarray(regions),
+                           np.asarray(latencies_ms, dtype=float)))
+
+    def _drain(self):
+        batches = []
+        while True:
+            try:
+                batches.append(self._pending.get_nowait())
+            except queue.Empty:
+                break
+        return batches
+
+    def publish(self):
+        """Fold pending samples into the estimates and atomically swap in a new snapshot."""
+        with self._publish_lock:   # serializes publishers only; writers and readers never block
+            batches = self._drain()
+            old = self._snapshot
+            if not batches:
+                return old
+            users = np.concatenate([b[0] for b in batches])
+            regions = np.concatenate([b[1] for b in batches])
+            lat = np.concatenate([b[2] for b in batches])
+            n_paths = self.shape[0] * self.shape[1]
+            path = np.ravel_multi_index((users, regions), self.shape)
+
+            counts = np.bincount(path, minlength=n_paths)
+            sums = np.bincount(path, weights=lat, minlength=n_paths)
+            seen = counts > 0
+            # k samples folded at once carry weight 1 - (1 - a)^k, the weight k sequential
+            # EWMA steps would give; the batch mean stands in for their ordering
+            w = 1 - (1 - self.ewma_alpha) ** counts
+            batch_mean = np.where(seen, sums / np.maximum(counts, 1), 0.0)
+            mean = old.mean.ravel() * (1 - w) + batch_mean * w
+
+            # Per-path batch quantile via one sort: order by (path, latency), index into each run
+            order = np.lexsort((lat, path))
+            starts = np.r_[0, np.cumsum(counts)[:-1]]
+            pos = starts + np.floor(self.tail_quantile * np.maximum(counts - 1, 0)).astype(int)
+            batch_tail = np.where(seen, lat[order][np.minimum(pos, len(lat) - 1)], 0.0)
+            tail = old.tail.ravel() * (1 - w) + batch_tail * w
+
+            self._snapshot = LatencySnapshot(
+                old.version + 1, frozen_array(mean.reshape(self.shape)),
+                frozen_array(np.maximum(tail, mean).reshape(self.shape)),
+                frozen_array(old.samples + counts.reshape(self.shape)))
+            return self._snapshot
+
+
+def replay_latency_file(telemetry, path, batch_size=100_000):
+    """
+    Feed a recorded latency table (columns user_location, region, latency_ms; any
+    format storage.read_table understands) into telemetry, publishing per batch.
+    """
+    df = read_table(path)
+    users = pd.Categorical(df['user_location'], categories=USER_LOCATIONS).codes
+    regions = pd.Categorical(df['region'], categories=REGIONS).codes
+    if (users < 0).any() or (regions < 0).any():
+        raise ValueError(f"Latency replay file {path} has unknown user_location or region values")
+    lat = df['latency_ms'].to_numpy(dtype=float)
+    for lo in range(0, len(df), batch_size):
+        telemetry.record_batch(users[lo:lo + batch_size], regions[lo:lo + batch_size],
+                               lat[lo:lo + batch_size])
+        telemetry.publish()
+    return telemetry.snapshot()
+
+
+def run_telemetry_experiment(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOUR,
+                             seed=RANDOM_SEED, request_log=None, output_format='csv',
+                             probes_per_path=TELEMETRY_PROBES_PER_PATH):
+    """
+    Constrained Hybrid on the static matrix vs. on live telemetry, in a world whose
+    paths follow network.PathLatencyModel (heavy tails and congestion episodes).
+    Telemetry learns hour by hour from routed requests plus periodic probes.
+    """
+    output_dir = experiment_dirs(output_dir)
+    inputs = sample_requests(hours, rph, seed, request_log)
+    req_hours, user_codes, n = inputs['req_hours'], inputs['user_codes'], inputs['n']
+    lat_lookup, inference_ms, slo = inputs['lat_lookup'], inputs['inference_ms'], inputs['slo']
+    cis, static_lats = inputs['cis'], inputs['lats']
+    world = PathLatencyModel(lat_lookup, inputs['hours'], seed=seed)
+
+    order = np.argsort(req_hours, kind='stable')
+    bounds = np.r_[0, np.cumsum(np.bincount(req_hours, minlength=inputs['hours']))]
+    probe_u, probe_r = np.divmod(np.repeat(np.arange(lat_lookup.size), probes_per_path), lat_lookup.shape[1])
+
+    rows = []
+    for label, live in [('Constrained Hybrid (static matrix)', False),
+                        ('Constrained Hybrid (live telemetry)', True)]:
+        telemetry = LatencyTelemetry(lat_lookup)
+        net_rng = np.random.default_rng(seed + 4)
+        probe_rng = np.random.default_rng(seed + 5)
+        latencies = np.zeros(n)
+        idx = np.zeros(n, dtype=int)
+        for h in range(inputs['hours']):
+            sl = order[bounds[h]:bounds[h + 1]]
+            if live:
+                snap = telemetry.snapshot()
+                lats = snap.mean[user_codes[sl]]
+                buffer = (snap.tail - snap.mean)[user_codes[sl]]
+            else:
+                lats, buffer = static_lats[sl], 9
+            idx[sl] = select_regions_batch('constrained', lats, cis[sl], None, slo[sl],
+                                           inference_ms[sl], jitter_buffer=buffer)
+            network = world.sample(net_rng, user_codes[sl], idx[sl], req_hours[sl])
+            latencies[sl] = network + inference_ms[sl]
+            probes = world.sample(probe_rng, probe_u, probe_r, np.full(len(probe_u), h))
+            telemetry.record_batch(user_codes[sl], idx[sl], network)
+            telemetry.record_batch(probe_u, probe_r, probes)
+            telemetry.publish()
+
+        rows.append({
+            'Policy': label,
+            **policy_metrics(inputs, idx, latencies, percentiles=(95, 99)),
+            'Snapshots Published': telemetry.snapshot().version,
+        })
+
+    return write_results(rows, output_dir, 'telemetry_results', output_format)
+
+
+if __name__ == '__main__':
+    parser = experiment_parser()
+    parser.add_argument('--probes-per-path', type=int, default=TELEMETRY_PROBES_PER_PATH)
+    args = parser.parse_args()
+    df = run_telemetry_experiment(**experiment_kwargs(args), probes_per_path=args.probes_per_path)
+    print(df.to_string(index=False))
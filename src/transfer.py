@@ -0,0 +1,177 @@
+"""
+transfer.py — Payload transfer latency with per-path bandwidth and region link contention.
+
+Every workload used to pay the same network latency for a region, although a
+ResNet-50 request ships an image of a few hundred KB (300 KB median) and a
+BERT request a few KB.
+Each request now carries lognormal request/response payloads (per workload,
+`request_kb_*` / `response_kb_*` in config.WORKLOADS), and moving them costs
+
+    transfer_ms = (ss_rounds(request_kb) + ss_rounds(response_kb)) * RTT
+                  + 8 * (request_kb + response_kb) / rate_mbps
+
+  ss_rounds  extra TCP slow-start round trips beyond the first window
+             (TCP_INIT_CWND_KB, window doubling each round), so a large
+             payload costs more on a long path, not only a slow one
+  rate_mbps  min(path bandwidth (PATH_BANDWIDTH_MATRIX),
+                 free share of the region's ingress link)
+
+Each region's link (REGION_LINK_CAPACITY_GBPS) is shared by all traffic routed
+there.  Its hourly utilization rho is the routed payload volume, with each
+simulated request standing for TRANSFER_TRAFFIC_SCALE real ones.  A flow gets
+capacity * max(1 - rho, LINK_MIN_FREE_SHARE), as under processor sharing.
+
+The transfer-aware Constrained Hybrid adds the expected transfer time (median
+payloads, last hour's utilization) to its SLO check.
+
+Run from src/:  python transfer.py
+Outputs: ../outputs/tables/transfer_results.csv
+"""
+
+import numpy as np
+
+from config import (
+    SIMULATION_HOURS, REQUESTS_PER_HOUR, RANDOM_SEED, REGIONS, USER_LOCATIONS,
+    PATH_BANDWIDTH_MATRIX, CONTINENT_OF,
+    REGION_LINK_CAPACITY_GBPS, TCP_INIT_CWND_KB, TRANSFER_TRAFFIC_SCALE, LINK_MIN_FREE_SHARE,
+)
+from experiment import (
+    experiment_dirs, experiment_kwargs, experiment_parser, policy_metrics, sample_requests, served_latency,
+    write_results,
+)
+from policies import select_regions_batch
+
+
+def slow_start_rounds(size_kb, init_cwnd_kb=TCP_INIT_CWND_KB):
+    """Round trips beyond the first needed to send size_kb with a doubling window."""
+    return np.maximum(0, np.ceil(np.log2(np.asarray(size_kb) / init_cwnd_kb + 1)) - 1)
+
+
+class TransferModel:
+    """Per-path bandwidth and per-region link capacity for payload transfer times."""
+
+    def __init__(self, rtt, bandwidth_mbps=None, link_capacity_gbps=REGION_LINK_CAPACITY_GBPS,
+                 traffic_scale=TRANSFER_TRAFFIC_SCALE):
+        self.rtt = np.asarray(rtt, dtype=float)
+        if bandwidth_mbps is None:
+            bandwidth_mbps = np.array([[PATH_BANDWIDTH_MATRIX.loc[u, r] for r in REGIONS]
+                                       for u in USER_LOCATIONS])
+        self.bandwidth = np.asarray(bandwidth_mbps, dtype=float)
+        self.capacity_mbps = 1000.0 * np.array([link_capacity_gbps[r] for r in REGIONS])
+        self.traffic_scale = traffic_scale
+
+    def utilization(self, regions, payload_kb, seconds=3600.0):
+        """(regions,) link utilization from the payloads routed to each region in a window."""
+        mbits = np.bincount(regions, weights=8e-3 * np.asarray(payload_kb), minlength=len(REGIONS))
+        return self.traffic_scale * mbits / seconds / self.capacity_mbps
+
+    def rate_mbps(self, user_codes, regions, rho=None):
+        """Per-flow throughput on each request's path given region link utilization rho."""
+        rate = self.bandwidth[user_codes, regions]
+        if rho is not None:
+            free = self.capacity_mbps * np.maximum(1 - rho, LINK_MIN_FREE_SHARE)
+            rate = np.minimum(rate, free[regions])
+        return rate
+
+    def transfer_ms(self, user_codes, regions, request_kb, response_kb, rho=None):
+        """Transfer time (ms) for each request's payloads on its chosen path."""
+        rounds = slow_start_rounds(request_kb) + slow_start_rounds(response_kb)
+        rate = self.rate_mbps(user_codes, regions, rho)
+        return rounds * self.rtt[user_codes, regions] + 8 * (request_kb + response_kb) / rate
+
+    def expected_transfer_ms(self, user_codes, request_kb, response_kb, rho=None):
+        """(N, regions) transfer time estimate for every candidate region."""
+        n_regions = len(REGIONS)
+        users = np.repeat(np.asarray(user_codes), n_regions)
+        regions = np.tile(np.arange(n_regions), len(user_codes))
+        est = self.transfer_ms(users, regions, np.repeat(request_kb, n_regions),
+                               np.repeat(response_kb, n_regions), rho)
+        return est.reshape(-1, n_regions)
+
+    def expected_transfer_table(self, request_kb, response_kb, rho=None):
+        """(workloads, users, regions) transfer estimate for per-workload payload sizes (e.g. medians)."""
+        n_users = self.rtt.shape[0]
+        users = np.tile(np.arange(n_users), len(request_kb))
+        est = self.expected_transfer_ms(users, np.repeat(request_kb, n_users), np.repeat(response_kb, n_users), rho)
+        return est.reshape(len(request_kb), n_users, -1)
+
+    def hourly_transfer_ms(self, req_hours, user_codes, regions, request_kb, response_kb):
+        """Transfer time per request under its hour's realized link utilization, for routed traffic."""
+        req_hours = np.asarray(req_hours)
+        transfer = np.zeros(len(req_hours))
+        for h in np.unique(req_hours):
+            sl = np.flatnonzero(req_hours == h)
+            rho = self.utilization(regions[sl], request_kb[sl] + response_kb[sl])
+            transfer[sl] = self.transfer_ms(user_codes[sl], regions[sl], request_kb[sl], response_kb[sl], rho)
+        return transfer
+
+
+def run_transfer_experiment(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOUR,
+                            seed=RANDOM_SEED, request_log=None, output_format='csv',
+                            traffic_scale=TRANSFER_TRAFFIC_SCALE):
+    """
+    Route hour by hour so link utilization feeds back: each hour's transfers see
+    that hour's realized utilization, and the transfer-aware policy plans with
+    the previous hour's.
+    """
+    output_dir = experiment_dirs(output_dir)
+    batch = sample_requests(hours, rph, seed, request_log)
+    req_hours, user_codes, wl_codes, n = batch['req_hours'], batch['user_codes'], batch['wl_codes'], batch['n']
+    lats, cis, slo, inference_ms = batch['lats'], batch['cis'], batch['slo'], batch['inference_ms']
+    table = batch['table']
+    model = TransferModel(batch['lat_lookup'], traffic_scale=traffic_scale)
+    request_kb, response_kb = table.sample_payloads(wl_codes, np.random.default_rng(seed + 8))
+    payload_kb = request_kb + response_kb
+    median_req = table.request_kb_median[wl_codes]
+    median_resp = table.response_kb_median[wl_codes]
+
+    order = np.argsort(req_hours, kind='stable')
+    bounds = np.r_[0, np.cumsum(np.bincount(req_hours, minlength=batch['hours']))]
+    image = table.codes['resnet50']
+    user_continent = np.array([CONTINENT_OF[u] for u in USER_LOCATIONS])
+    region_continent = np.array([CONTINENT_OF[r] for r in REGIONS])
+
+    rows = []
+    for label, ptype, aware in [('Latency-First', 'latency_first', False),
+                                ('Carbon-First', 'carbon_first', False),
+                                ('Constrained Hybrid (transfer-blind)', 'constrained', False),
+                                ('Constrained Hybrid (transfer-aware)', 'constrained', True)]:
+        idx = np.zeros(n, dtype=int)
+        transfer = np.zeros(n)
+        rho_prev = np.zeros(len(REGIONS))
+        peak_rho = np.zeros(len(REGIONS))
+        for h in range(batch['hours']):
+            sl = order[bounds[h]:bounds[h + 1]]
+            expected = 0
+            if aware:
+                expected = model.expected_transfer_ms(user_codes[sl], median_req[sl], median_resp[sl], rho_prev)
+            idx[sl] = select_regions_batch(ptype, lats[sl], cis[sl], None, slo[sl], inference_ms[sl],
+                                           transfer_ms=expected)
+            rho = model.utilization(idx[sl], payload_kb[sl])
+            transfer[sl] = model.transfer_ms(user_codes[sl], idx[sl], request_kb[sl], response_kb[sl], rho)
+            peak_rho = np.maximum(peak_rho, rho)
+            rho_prev = rho
+
+        latencies = served_latency(batch, idx) + transfer
+        img = wl_codes == image
+        offloaded = region_continent[idx] != user_continent[user_codes]
+        rows.append({
+            'Policy': label,
+            **policy_metrics(batch, idx, latencies),
+            'Avg Transfer (ms)': round(np.mean(transfer), 1),
+            'ResNet-50 Avg Transfer (ms)': round(np.mean(transfer[img]), 1) if img.any() else 0.0,
+            'ResNet-50 SLO Violation Rate (%)': round(100 * np.mean(latencies[img] > slo[img]), 2) if img.any() else 0.0,
+            'ResNet-50 Cross-Continent (%)': round(100 * np.mean(offloaded[img]), 1) if img.any() else 0.0,
+            'Peak Link Utilization': round(peak_rho.max(), 2),
+        })
+
+    return write_results(rows, output_dir, 'transfer_results', output_format, baseline='Latency-First')
+
+
+if __name__ == '__main__':
+    parser = experiment_parser()
+    parser.add_argument('--traffic-scale', type=float, default=TRANSFER_TRAFFIC_SCALE,
+                        help='Real requests each simulated request stands for on a region link')
+    args = parser.parse_args()
+    df = run_transfer_experiment(**experiment_kwargs(args), traffic_scale=args.traffic_scale)
+    print(df.to_string(index=False))
@@ -0,0 +1,206 @@
+"""
+variance.py — Variance reduction for policy-comparison estimates.
+
+run_simulation reseeds default_rng(seed) per policy, which only lines the
+random streams up while every policy consumes draws in the same order.  Here
+every request's randomness is drawn up front, as standard normals for
+inference time and network jitter, and the same arrays are fed to every
+policy, so request i sees identical noise whatever region it is routed to.
+
+Sampling modes (all except `independent` use common random numbers):
+
+  independent            every policy gets its own request mix and noise
+  crn                    one shared request mix and noise stream
+  antithetic             crn, with the second half of every hour mirroring the
+                         first: user/workload uniforms 1 - u, noise -z
+  stratified             crn, with the user x workload mix allocated to every
+                         hour in exact proportion (largest remainder) instead
+                         of being drawn at random
+  stratified_antithetic  stratified, with antithetic noise pairs inside each
+                         (hour, user, workload) stratum
+
+For each mode the experiment repeats the run VR_REPLICATIONS times and reports
+the variance of the difference estimator (policy minus Latency-First) for the
+headline metrics, the variance reduction against `independent`, and how many
+requests that mode needs to reach a VR_TARGET_HALF_WIDTH confidence interval.
+Replications vary the request randomness only; the carbon trace is fixed.
+
+Run from src/:  python variance.py
+Outputs: ../outputs/tables/variance_reduction.csv
+"""
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    SIMULATION_HOURS, REQUESTS_PER_HOUR, RANDOM_SEED, USER_LOCATIONS, USER_DISTRIBUTION,
+    NETWORK_JITTER_MEAN, NETWORK_JITTER_STD,
+    VR_REPLICATIONS, VR_CONFIDENCE_Z, VR_TARGET_HALF_WIDTH,
+)
+from experiment import experiment_dirs, experiment_kwargs, experiment_parser, sample_requests, write_results
+from policies import get_policy_configs, select_regions_batch
+
+VR_MODES = ('independent', 'crn', 'antithetic', 'stratified', 'stratified_antithetic')
+BASELINE_POLICY = 'Latency-First'
+
+
+def stratified_mix(hours, rph, user_probs, workload_probs):
+    """
+    Per-hour (user, workload) codes with every stratum allocated its proportional
+    share of rph by largest remainder, so the mix is exact rather than sampled.
+    """
+    p = np.outer(user_probs, workload_probs).ravel()
+    quota = rph * p
+    counts = np.floor(quota).astype(int)
+    short = rph - counts.sum()
+    counts[np.argsort(-(quota - counts), kind='stable')[:short]] += 1
+    users, workloads = np.divmod(np.repeat(np.arange(len(p)), counts), len(workload_probs))
+    return (np.repeat(np.arange(hours), rph), np.tile(users, hours).astype(np.int8),
+            np.tile(workloads, hours).astype(np.int8))
+
+
+def _categorical(u, probs):
+    """Inverse-CDF category draw, so mirrored uniforms give mirrored categories."""
+    cdf = np.cumsum(probs)
+    return np.minimum(np.searchsorted(cdf / cdf[-1], u, side='right'), len(probs) - 1).astype(np.int8)
+
+
+def _paired_normals(n_streams, groups, rng):
+    """
+    Standard normals where consecutive requests of the same group form antithetic
+    pairs (z, -z); an odd request out at the end of a group keeps its own draw.
+    """
+    z = rng.standard_normal((n_streams, len(groups)))
+    start = np.r_[True, groups[1:] != groups[:-1]]
+    rank = np.arange(len(groups)) - np.maximum.accumulate(np.where(start, np.arange(len(groups)), 0))
+    odd = np.flatnonzero(rank % 2 == 1)
+    z[:, odd] = -z[:, odd - 1]
+    return z
+
+
+def draw_request_streams(mode, hours, rph, rng, table, replay=None):
+    """
+    Pre-drawn per-request streams for one replication: (req_hours, user_codes,
+    wl_codes, z_inference, z_jitter).  With a replayed log the attributes are the
+    log's, and stratification has nothing to act on.
+    """
+    antithetic = mode in ('antithetic', 'stratified_antithetic')
+    stratified = mode in ('stratified', 'stratified_antithetic')
+    user_probs = [USER_DISTRIBUTION[u] for u in USER_LOCATIONS]
+    if replay is not None:
+        req_hours, user_codes, wl_codes = replay
+    elif stratified:
+        req_hours, user_codes, wl_codes = stratified_mix(hours, rph, user_probs, table.probability)
+    else:
+        req_hours = np.repeat(np.arange(hours), rph)
+        u = rng.random((2, len(req_hours)))
+        if antithetic:
+            # Each hour's second half mirrors its first: uniforms 1 - u
+            half = rph // 2
+            u = u.reshape(2, hours, rph)
+            u[:, :, half:2 * half] = 1 - u[:, :, :half]
+            u = u.reshape(2, -1)
+        user_codes = _categorical(u[0], user_probs)
+        wl_codes = _categorical(u[1], table.probability)
+
+    n = len(req_hours)
+    if not antithetic:
+        z_inf, z_jit = rng.standard_normal((2, n))
+    elif stratified or replay is not None:
+        # Pair requests inside each (hour, user, workload) run of the ordered arrays
+        order = np.lexsort((wl_codes, user_codes, req_hours))
+        groups = (np.asarray(req_hours)[order] * len(USER_LOCATIONS) + user_codes[order]) * len(table.ids) \
+            + wl_codes[order]
+        z = np.empty((2, n))
+        z[:, order] = _paired_normals(2, groups, rng)
+        z_inf, z_jit = z
+    else:
+        half = rph // 2
+        z = rng.standard_normal((2, hours, rph))
+        z[:, :, half:2 * half] = -z[:, :, :half]
+        z_inf, z_jit = z.reshape(2, -1)
+    return req_hours, user_codes, wl_codes, z_inf, z_jit
+
+
+def evaluate_policy(ptype, alpha, streams, ci_arr, lat_lookup, table):
+    """(avg latency, SLO violation %, avg carbon) for one policy on pre-drawn streams."""
+    req_hours, user_codes, wl_codes, z_inf, z_jit = streams
+    inference_ms = table.inference_from_normals(wl_codes, z_inf)
+    jitter = np.maximum(0, NETWORK_JITTER_MEAN + NETWORK_JITTER_STD * z_jit)
+    slo = table.slo(wl_codes)
+    lats = lat_lookup[user_codes].astype(float)
+    cis = ci_arr[req_hours]
+    idx = select_regions_batch(ptype, lats, cis, alpha, slo, inference_ms)
+    rows_n = np.arange(len(idx))
+    latencies = np.maximum(1.0, lats[rows_n, idx] + inference_ms + jitter)
+    return np.array([latencies.mean(), 100 * np.mean(latencies > slo), cis[rows_n, idx].mean()])
+
+
+def run_variance_experiment(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOUR,
+                            seed=RANDOM_SEED, request_log=None, output_format='csv',
+                            replications=VR_REPLICATIONS, modes=VR_MODES):
+    output_dir = experiment_dirs(output_dir)
+    # Only the request attributes, carbon trace and latency table are shared; every
+    # replication draws its own noise streams below
+    inputs = sample_requests(hours, rph, seed, request_log)
+    ci_arr, lat_lookup, table = inputs['ci_arr'], inputs['lat_lookup'], inputs['table']
+    replay = None
+    if request_log is not None:
+        replay = (inputs['req_hours'], inputs['user_codes'], inputs['wl_codes'])
+    policies = get_policy_configs()
+    labels = [label for label, _, _ in policies]
+    base = labels.index(BASELINE_POLICY)
+    metrics = list(VR_TARGET_HALF_WIDTH)
+
+    rows = []
+    for mode in modes:
+        # (replications, policies, metrics)
+        est = np.zeros((replications, len(policies), len(metrics)))
+        for r in range(replications):
+            rng = np.random.default_rng([seed, r])
+            shared = None if mode == 'independent' else draw_request_streams(
+                mode, inputs['hours'], rph, rng, table, replay)
+            for p, (_, ptype, alpha) in enumerate(policies):
+                streams = shared or draw_request_streams(mode, inputs['hours'], rph, rng, table, replay)
+                est[r, p] = evaluate_policy(ptype, alpha, streams, ci_arr, lat_lookup, table)
+        n_requests = len(streams[0])
+        diff = est - est[:, base:base + 1]
+        for p, label in enumerate(labels):
+            if p == base:
+                continue
+            for m, metric in enumerate(metrics):
+                # Differences that no longer depend on the sampled randomness leave only float noise
+                var = round(float(diff[:, p, m].var(ddof=1)), 9)
+                half_width = VR_TARGET_HALF_WIDTH[metric]
+                rows.append({
+                    'Mode': mode,
+                    'Policy': label,
+                    'Metric': metric,
+                    'Mean Difference': round(diff[:, p, m].mean(), 3),
+                    'Estimator Variance': var,
+                    'CI Half-Width': round(VR_CONFIDENCE_Z * np.sqrt(var), 4),
+                    # Var scales as 1/n, so n * Var is the per-request variance
+                    'Requests for Target': int(np.ceil(n_requests * var * (VR_CONFIDENCE_Z / half_width) ** 2)),
+                })
+
+    vr_df = pd.DataFrame(rows)
+    ref = vr_df[vr_df['Mode'] == 'independent'].set_index(['Policy', 'Metric'])['Estimator Variance']
+    if len(ref):
+        keyed = vr_df.set_index(['Policy', 'Metric']).index
+        num, den = ref.reindex(keyed).to_numpy(), vr_df['Estimator Variance'].to_numpy()
+        # A ratio with a zero variance on either side is undefined (NaN), not a
+        # reduction; independent against itself is 1.0 by definition
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where((num == 0) | (den == 0), np.nan, num / den)
+        ratio[(vr_df['Mode'] == 'independent').to_numpy()] = 1.0
+        vr_df['Variance Reduction (x)'] = ratio.round(1)
+    return write_results(vr_df, output_dir, 'variance_reduction', output_format)
+
+
+if __name__ == '__main__':
+    parser = experiment_parser()
+    parser.add_argument('--replications', type=int, default=VR_REPLICATIONS)
+    parser.add_argument('--modes', nargs='+', choices=VR_MODES, default=list(VR_MODES))
+    args = parser.parse_args()
+    df = run_variance_experiment(**experiment_kwargs(args), replications=args.replications, modes=args.modes)
+    print(df.to_string(index=False))
@@ -0,0 +1,198 @@
+"""
+warm_pool.py — Regional model warm pools and cold-start latency.
+
+The base simulation assumes every model is resident in every region.  Here each
+region holds a set of loaded models bounded by REGION_MODEL_MEMORY_GB.  A request
+that lands on a region without its model pays the workload's `cold_start_ms`
+(or the remaining load time if a load is already in flight).  Models are evicted
+LRU under memory pressure and, with WARM_POOL_EVICTION = 'ttl', also unloaded
+after WARM_POOL_TTL_S seconds idle.  Each simulated request stands for
+WARM_POOL_TRAFFIC_SCALE real ones, so a simulated gap between a model's
+requests is that many times longer than the real one; idle time is the gap
+divided by the scale, as otherwise sampling sparsity alone would unload models.
+
+Every standard policy is replayed against the warm pools, alongside the
+placement-aware hybrid policy, which keeps requests on warm regions and spends
+a background model load on a cold region only when its carbon saving is worth it.
+
+Run from src/:  python warm_pool.py
+Outputs: ../outputs/tables/cold_start_results.csv
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from config import (
+    REGIONS, WORKLOADS, REGION_MODEL_MEMORY_GB, WARM_POOL_EVICTION, WARM_POOL_TTL_S, WARM_POOL_TRAFFIC_SCALE,
+    SIMULATION_HOURS, REQUESTS_PER_HOUR, RANDOM_SEED,
+    get_workload_list,
+)
+from experiment import experiment_dirs, experiment_kwargs, experiment_parser, sample_requests, write_results
+from policies import get_policy_configs, select_region, placement_aware_hybrid
+
+
+class WarmPool:
+    """Loaded-model state for every region, keyed by workload id."""
+
+    def __init__(self, eviction=WARM_POOL_EVICTION, ttl_s=WARM_POOL_TTL_S,
+                 memory_gb=None, prewarm=True, traffic_scale=WARM_POOL_TRAFFIC_SCALE):
+        if eviction not in ('lru', 'ttl'):
+            raise ValueError(f"Unknown eviction mode: {eviction}")
+        self.eviction = eviction
+        self.ttl_s = ttl_s
+        self.traffic_scale = traffic_scale
+        memory_gb = memory_gb or REGION_MODEL_MEMORY_GB
+        self.capacity_gb = np.array([memory_gb[r] for r in REGIONS], dtype=float)
+        self.used_gb = np.zeros(len(REGIONS))
+        # Per region: wid -> last-use time, kept in LRU order (oldest first)
+        self.last_used = [OrderedDict() for _ in REGIONS]
+        # Per region: wid -> time at which an in-flight load completes
+        self.ready_at = [{} for _ in REGIONS]
+        self.loads = 0
+        self.evictions = 0
+        if prewarm:
+            for r in range(len(REGIONS)):
+                for wid in get_workload_list():
+                    if self.used_gb[r] + WORKLOADS[wid]['model_memory_gb'] <= self.capacity_gb[r]:
+                        self._load(r, wid, 0.0, 0.0)
+
+    def _load(self, r, wid, t, ready_at):
+        self.last_used[r][wid] = t
+        self.ready_at[r][wid] = ready_at
+        self.used_gb[r] += WORKLOADS[wid]['model_memory_gb']
+
+    def _unload(self, r, wid):
+        del self.last_used[r][wid]
+        del self.ready_at[r][wid]
+        self.used_gb[r] -= WORKLOADS[wid]['model_memory_gb']
+        self.evictions += 1
+
+    def _expire(self, r, t):
+        if self.eviction != 'ttl':
+            return
+        lru = self.last_used[r]
+        while lru:
+            wid, last = next(iter(lru.items()))
+            if (t - last) / self.traffic_scale <= self.ttl_s:
+                break
+            self._unload(r, wid)
+
+    def is_warm(self, r, wid, t):
+        """True when wid is loaded in region r and its load has completed by t."""
+        self._expire(r, t)
+        return wid in self.last_used[r] and self.ready_at[r][wid] <= t
+
+    def warm_mask(self, wid, t):
+        return np.array([self.is_warm(r, wid, t) for r in range(len(REGIONS))])
+
+    def access(self, r, wid, t):
+        """Serve wid in region r at time t (seconds); returns the cold-start delay in ms."""
+        self._expire(r, t)
+        lru = self.last_used[r]
+        if wid not in lru and not self.prewarm(r, wid, t):
+            raise ValueError(f"Model {wid} ({WORKLOADS[wid]['model_memory_gb']} GB) does not fit in "
+                             f"{REGIONS[r]} ({self.capacity_gb[r]} GB)")
+        lru.move_to_end(wid)
+        lru[wid] = t
+        return max(0.0, (self.ready_at[r][wid] - t) * 1000.0)
+
+    def prewarm(self, r, wid, t):
+        """
+        Start loading wid in region r at time t unless it is already loaded.
+        Returns False, evicting nothing, when the model is larger than the region's memory.
+        """
+        self._expire(r, t)
+        lru = self.last_used[r]
+        if wid in lru:
+            return True
+        need = WORKLOADS[wid]['model_memory_gb']
+        if need > self.capacity_gb[r]:
+            return False
+        while lru and self.used_gb[r] + need > self.capacity_gb[r]:
+            self._unload(r, next(iter(lru)))
+        self._load(r, wid, t, t + WORKLOADS[wid]['cold_start_ms'] / 1000.0)
+        self.loads += 1
+        return True
+
+
+def run_warm_pool_experiment(output_dir=None, hours=SIMULATION_HOURS, rph=REQUESTS_PER_HOUR,
+                             seed=RANDOM_SEED, request_log=None, output_format='csv',
+                             eviction=WARM_POOL_EVICTION, ttl_s=WARM_POOL_TTL_S,
+                             traffic_scale=WARM_POOL_TRAFFIC_SCALE):
+    output_dir = experiment_dirs(output_dir)
+    # Pools evolve in time, so requests are replayed in arrival order
+    batch = sample_requests(hours, rph, seed, request_log, time_order=True)
+    req_times, wl_codes, total_requests = batch['req_times'], batch['wl_codes'], batch['n']
+    lats_all, cis_all, slo, jitter = batch['lats'], batch['cis'], batch['slo'], batch['jitter']
+    inference_all = batch['inference_ms']
+    workload_ids = get_workload_list()
+
+    policy_configs = get_policy_configs()
+    policy_configs.append(('Placement-Aware Hybrid', 'placement', None))
+
+    rows = []
+    for label, ptype, alpha in policy_configs:
+        pool = WarmPool(eviction=eviction, ttl_s=ttl_s, traffic_scale=traffic_scale)
+
+        latencies = np.zeros(total_requests)
+        cold_delays = np.zeros(total_requests)
+        carbons_out = np.zeros(total_requests)
+        slo_violations = 0
+
+        for i in range(total_requests):
+            t = req_times[i]
+            wid = workload_ids[wl_codes[i]]
+            lats = lats_all[i]
+            cis = cis_all[i]
+            inference_ms = inference_all[i]
+            slo_threshold = slo[i]
+
+            if ptype == 'placement':
+                idx, prewarm = placement_aware_hybrid(lats, cis, slo_threshold, inference_ms,
+                                                      pool.warm_mask(wid, t), WORKLOADS[wid]['cold_start_ms'])
+                if prewarm is not None:
+                    pool.prewarm(prewarm, wid, t)
+            else:
+                idx = select_region(ptype, lats, cis, alpha, slo_threshold, inference_ms)
+
+            cold_ms = pool.access(idx, wid, t)
+            total_lat = max(1.0, lats[idx] + inference_ms + jitter[i] + cold_ms)
+            latencies[i] = total_lat
+            cold_delays[i] = cold_ms
+            carbons_out[i] = cis[idx]
+            if total_lat > slo_threshold:
+                slo_violations += 1
+
+        warm_only = latencies - cold_delays
+        p99 = np.percentile(latencies, 99)
+        p99_warm = np.percentile(warm_only, 99)
+        rows.append({
+            'Policy': label,
+            'Cold Starts': int(np.count_nonzero(cold_delays)),
+            'Cold Start Rate (%)': round(100 * np.mean(cold_delays > 0), 3),
+            'Model Loads': pool.loads,
+            'Evictions': pool.evictions,
+            'Avg Latency (ms)': round(np.mean(latencies), 1),
+            'P95 Latency (ms)': round(np.percentile(latencies, 95), 1),
+            'P99 Latency (ms)': round(p99, 1),
+            'P99 Latency, No Cold Start (ms)': round(p99_warm, 1),
+            'P99 Cold-Start Penalty (ms)': round(p99 - p99_warm, 1),
+            'Max Latency (ms)': round(np.max(latencies), 1),
+            'SLO Violation Rate (%)': round(100 * slo_violations / total_requests, 2),
+            'Avg Carbon (gCO2eq/kWh)': round(np.mean(carbons_out), 1),
+        })
+
+    return write_results(rows, output_dir, 'cold_start_results', output_format)
+
+
+if __name__ == '__main__':
+    parser = experiment_parser()
+    parser.add_argument('--eviction', choices=('lru', 'ttl'), default=WARM_POOL_EVICTION)
+    parser.add_argument('--ttl-s', type=float, default=WARM_POOL_TTL_S)
+    parser.add_argument('--traffic-scale', type=float, default=WARM_POOL_TRAFFIC_SCALE,
+                        help='Real requests each simulated request stands for')
+    args = parser.parse_args()
+    df = run_warm_pool_experiment(**experiment_kwargs(args), eviction=args.eviction, ttl_s=args.ttl_s,
+                                  traffic_scale=args.traffic_scale)
+    print(df.to_string(index=False))
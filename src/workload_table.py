@@ -0,0 +1,168 @@
+"""
+workload_table.py — Struct-of-arrays workload table and bulk inference sampling.
+
+config.sample_inference_time does a WORKLOADS dict lookup, a scalar rng.normal
+call and a Python max per request.  WorkloadTable compiles WORKLOADS once into
+NumPy arrays indexed by integer workload code (the same codes used by
+simulation.prepare_inputs), so inference times and SLOs for millions of
+requests come from a single call.
+
+Each workload may pick its inference-time distribution with `inference_dist`:
+
+  normal     N(inference_mean_ms, inference_std_ms)            (default)
+  lognormal  moment-matched to inference_mean_ms / inference_std_ms
+  empirical  profiled histogram in `inference_histogram_ms`:
+             {'edges': [...], 'counts': [...]}, sampled uniformly within bins
+
+All samples are floored at 1 ms like sample_inference_time.  When every workload
+is normal the whole batch is one rng.normal call; otherwise one call per
+distribution family (and per empirical workload).
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from config import WORKLOADS
+
+INFERENCE_DISTRIBUTIONS = ('normal', 'lognormal', 'empirical')
+
+
+def histogram_from_samples(samples_ms, bins=50):
+    """Build an `inference_histogram_ms` entry from profiled latencies."""
+    counts, edges = np.histogram(np.asarray(samples_ms, dtype=float), bins=bins)
+    return {'edges': edges.tolist(), 'counts': counts.tolist()}
+
+
+class WorkloadTable:
+    """WORKLOADS compiled to per-field arrays indexed by workload code."""
+
+    def __init__(self, workloads=WORKLOADS):
+        self.ids = list(workloads)
+        self.codes = {wid: i for i, wid in enumerate(self.ids)}
+
+        def col(key):
+            return np.array([workloads[w][key] for w in self.ids], dtype=float)
+
+        self.mean_ms = col('inference_mean_ms')
+        self.std_ms = col('inference_std_ms')
+        self.slo_ms = col('slo_threshold_ms')
+        self.probability = col('probability')
+        self.cold_start_ms = col('cold_start_ms')
+        self.model_memory_gb = col('model_memory_gb')
+        self.request_kb_median = col('request_kb_median')
+        self.request_kb_sigma = col('request_kb_sigma')
+        self.response_kb_median = col('response_kb_median')
+        self.response_kb_sigma = col('response_kb_sigma')
+
+        dists = [workloads[w].get('inference_dist', 'normal') for w in self.ids]
+        unknown = set(dists) - set(INFERENCE_DISTRIBUTIONS)
+        if unknown:
+            raise ValueError(f"Unknown inference_dist {sorted(unknown)}; expected {INFERENCE_DISTRIBUTIONS}")
+        self.dist = np.array([INFERENCE_DISTRIBUTIONS.index(d) for d in dists], dtype=np.int8)
+        self.all_normal = bool((self.dist == 0).all())
+
+        sigma2 = np.log1p((self.std_ms / self.mean_ms) ** 2)
+        self.log_sigma = np.sqrt(sigma2)
+        self.log_mu = np.log(self.mean_ms) - sigma2 / 2
+
+        self.hist_edges = {}
+        self.hist_cdf = {}
+        for i, wid in enumerate(self.ids):
+            if dists[i] != 'empirical':
+                continue
+            hist = workloads[wid].get('inference_histogram_ms')
+            if hist is None:
+                raise ValueError(f"Workload {wid} uses empirical inference_dist without inference_histogram_ms")
+            counts = np.asarray(hist['counts'], dtype=float)
+            self.hist_edges[i] = np.asarray(hist['edges'], dtype=float)
+            self.hist_cdf[i] = np.cumsum(counts) / counts.sum()
+
+    def encode(self, workload_ids):
+        """Workload id strings -> int8 codes."""
+        return pd.Categorical(workload_ids, categories=self.ids).codes
+
+    def sample_workloads(self, n, rng):
+        """Draw n workload codes from the configured traffic mix."""
+        return rng.choice(len(self.ids), size=n, p=self.probability).astype(np.int8)
+
+    def _sample_empirical(self, w, k, rng):
+        edges, cdf = self.hist_edges[w], self.hist_cdf[w]
+        u = rng.random(k)
+        b = np.minimum(np.searchsorted(cdf, u, side='right'), len(cdf) - 1)
+        return edges[b] + rng.random(k) * (edges[b + 1] - edges[b])
+
+    def sample_inference(self, wl_codes, rng):
+        """Inference time (ms) for every request code in one bulk draw."""
+        wl_codes = np.asarray(wl_codes)
+        if self.all_normal:
+            return np.maximum(1.0, rng.normal(self.mean_ms[wl_codes], self.std_ms[wl_codes]))
+
+        out = np.empty(len(wl_codes))
+        dist = self.dist[wl_codes]
+        normal = dist == 0
+        if normal.any():
+            c = wl_codes[normal]
+            out[normal] = rng.normal(self.mean_ms[c], self.std_ms[c])
+        lognormal = dist == 1
+        if lognormal.any():
+            c = wl_codes[lognormal]
+            out[lognormal] = rng.lognormal(self.log_mu[c], self.log_sigma[c])
+        for w in self.hist_cdf:
+            mask = wl_codes == w
+            if mask.any():
+                out[mask] = self._sample_empirical(w, int(mask.sum()), rng)
+        return np.maximum(1.0, out)
+
+    def inference_from_normals(self, wl_codes, z):
+        """
+        Map pre-drawn standard normals z to inference times, so callers control the
+        random stream (common random numbers, antithetic pairs).  Empirical
+        workloads use a tanh approximation of the normal CDF, which keeps
+        Phi(-z) = 1 - Phi(z) exact so antithetic pairs stay antithetic.
+        """
+        wl_codes = np.asarray(wl_codes)
+        out = self.mean_ms[wl_codes] + self.std_ms[wl_codes] * z
+        if not self.all_normal:
+            dist = self.dist[wl_codes]
+            lognormal = dist == 1
+            out[lognormal] = np.exp(self.log_mu[wl_codes[lognormal]]
+                                    + self.log_sigma[wl_codes[lognormal]] * z[lognormal])
+            for w in self.hist_cdf:
+                mask = wl_codes == w
+                if mask.any():
+                    zm = z[mask]
+                    u = 0.5 * (1 + np.tanh(np.sqrt(2 / np.pi) * (zm + 0.044715 * zm ** 3)))
+                    edges, cdf = self.hist_edges[w], self.hist_cdf[w]
+                    b = np.minimum(np.searchsorted(cdf, u, side='right'), len(cdf) - 1)
+                    lo = np.r_[0.0, cdf][b]
+                    frac = (u - lo) / np.maximum(cdf[b] - lo, 1e-12)
+                    out[mask] = edges[b] + frac * (edges[b + 1] - edges[b])
+        return np.maximum(1.0, out)
+
+    def inference_quantile(self, wl_codes, q):
+        """The q-quantile of each request's inference-time distribution, known before it runs."""
+        wl_codes = np.asarray(wl_codes)
+        z = NormalDist().inv_cdf(q)
+        per_workload = np.maximum(1.0, self.mean_ms + self.std_ms * z)
+        lognormal = self.dist == 1
+        per_workload[lognormal] = np.exp(self.log_mu[lognormal] + self.log_sigma[lognormal] * z)
+        for w in self.hist_cdf:
+            edges, cdf = self.hist_edges[w], self.hist_cdf[w]
+            per_workload[w] = np.interp(q, np.r_[0.0, cdf], edges)
+        return per_workload[wl_codes]
+
+    def sample_payloads(self, wl_codes, rng):
+        """Lognormal (request_kb, response_kb) payload sizes for every request code."""
+        wl_codes = np.asarray(wl_codes)
+        req = rng.lognormal(np.log(self.request_kb_median[wl_codes]), self.request_kb_sigma[wl_codes])
+        resp = rng.lognormal(np.log(self.response_kb_median[wl_codes]), self.response_kb_sigma[wl_codes])
+        return req, resp
+
+    def slo(self, wl_codes):
+        return self.slo_ms[np.asarray(wl_codes)]
+
+    def sample(self, wl_codes, rng):
+        """(inference_ms, slo_ms) arrays for every request code."""
+        return self.sample_inference(wl_codes, rng), self.slo(wl_codes)
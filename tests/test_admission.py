@@ -0,0 +1,45 @@
+import numpy as np
+
+from admission import DOWNGRADED, SERVED, SHED, route_with_admission
+from config import REGIONS
+
+
+def scenario(per_bin, bins=10, inference=30.0, downgrade=np.nan):
+    n = per_bin * bins
+    req_times = np.sort(np.random.default_rng(0).uniform(0, bins * 60.0, n))
+    lats = np.tile(np.linspace(20, 60, len(REGIONS)), (n, 1))
+    cis = np.tile(np.linspace(400, 50, len(REGIONS)), (n, 1))
+    return (req_times, lats, cis, np.full(n, 100.0), np.full(n, inference), np.full(n, downgrade),
+            np.ones(len(REGIONS)))
+
+
+def route(args, **kwargs):
+    return route_with_admission('latency_first', None, *args, traffic_scale=100, bin_s=60, **kwargs)
+
+
+def test_nothing_is_shed_below_capacity():
+    # 10 requests x 3 s of work a minute fit in the fastest region's one 60 s server
+    idx, outcome, served_ms, queue_ms = route(scenario(per_bin=10))
+    assert (outcome == SERVED).all() and (idx >= 0).all()
+    assert (queue_ms == 0).all()
+    np.testing.assert_array_equal(idx, 0)
+
+
+def test_overload_is_shed_at_the_edge():
+    args = scenario(per_bin=500)
+    idx, outcome, _, queue_ms = route(args)
+    shed = outcome == SHED
+    assert shed.any() and (idx[shed] == -1).all() and (queue_ms[shed] == 0).all()
+    assert (idx[~shed] >= 0).all()
+
+    # Without admission control the same load is all served, behind a long queue
+    idx_all, outcome_all, _, queue_all = route(args, admission=False)
+    assert (outcome_all == SERVED).all() and (idx_all >= 0).all()
+    assert queue_all.max() > queue_ms.max()
+
+
+def test_cheaper_model_is_served_instead_of_shedding():
+    idx, outcome, served_ms, _ = route(scenario(per_bin=500, inference=60.0, downgrade=10.0))
+    down = outcome == DOWNGRADED
+    assert down.any() and (served_ms[down] == 10.0).all() and (idx[down] >= 0).all()
+    assert (served_ms[outcome == SERVED] == 60.0).all()
@@ -0,0 +1,36 @@
+import numpy as np
+
+from arrivals import arrival_rates, draw_bursts, generate_arrivals
+from config import ARRIVAL_BIN_S, USER_DISTRIBUTION, USER_LOCATIONS
+
+HOURS, RPH = 48, 2000
+
+
+def test_arrivals_are_sorted_and_inside_the_horizon():
+    times, users, _ = generate_arrivals(HOURS, RPH, seed=1)
+    assert len(times) == len(users)
+    assert (np.diff(times) >= 0).all()
+    assert times.min() >= 0 and times.max() < HOURS * 3600
+    assert users.min() >= 0 and users.max() < len(USER_LOCATIONS)
+
+
+def test_mean_rate_matches_the_input_rate():
+    # The diurnal factor averages to 1 over whole days, so without bursts the mean is rph
+    times, users, bursts = generate_arrivals(HOURS, RPH, seed=2, bursts_per_day=0)
+    assert len(bursts) == 0
+    expected = HOURS * RPH
+    assert abs(len(times) - expected) < 4 * np.sqrt(expected)
+    shares = np.bincount(users, minlength=len(USER_LOCATIONS)) / len(users)
+    np.testing.assert_allclose(shares, [USER_DISTRIBUTION[u] for u in USER_LOCATIONS], atol=0.01)
+
+    # Per hour the count follows the diurnal rate, not a flat rph
+    hourly = np.bincount((times // 3600).astype(int), minlength=HOURS)
+    rates = arrival_rates(HOURS, RPH).sum(axis=1).reshape(HOURS, -1).mean(axis=1)
+    assert np.corrcoef(hourly, rates)[0, 1] > 0.9
+
+
+def test_bursts_add_their_expected_volume():
+    times, _, bursts = generate_arrivals(HOURS, RPH, seed=3, bursts_per_day=4)
+    assert len(bursts) and bursts.equals(draw_bursts(HOURS, np.random.default_rng(3), 4))
+    expected = arrival_rates(HOURS, RPH, bursts).sum() * ARRIVAL_BIN_S / 3600
+    assert abs(len(times) - expected) < 4 * np.sqrt(expected)
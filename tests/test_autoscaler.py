@@ -0,0 +1,36 @@
+import numpy as np
+
+from autoscaler import plan_replicas, queueing_delay_ms
+from config import AUTOSCALE_INTERVAL_S, AUTOSCALE_WAIT_BUDGET_MS, REPLICA_IDLE_POWER_W
+
+
+def forecast(seed=3, intervals=24, regions=5):
+    rng = np.random.default_rng(seed)
+    busy = rng.uniform(500, 6000, (intervals, regions))
+    service = rng.uniform(20, 80, (intervals, regions))
+    carbon = rng.uniform(20, 600, (intervals, regions))
+    demand = 1000 * busy / service
+    return busy, service, carbon, demand
+
+
+def idle_emissions(replicas, carbon):
+    return (replicas * AUTOSCALE_INTERVAL_S / 3600 * REPLICA_IDLE_POWER_W * carbon).sum()
+
+
+def test_carbon_aware_meets_the_budget_with_no_more_emissions_than_slo():
+    busy, service, carbon, demand = forecast()
+    slo = plan_replicas('slo', busy, service, carbon, demand_fc=demand)
+    green = plan_replicas('carbon-aware', busy, service, carbon, demand_fc=demand)
+    wait = queueing_delay_ms(busy, green, AUTOSCALE_INTERVAL_S, service)
+    mean_wait = (demand * wait).sum(axis=1) / demand.sum(axis=1)
+    assert (mean_wait <= AUTOSCALE_WAIT_BUDGET_MS + 1e-9).all()
+    assert idle_emissions(green, carbon) < idle_emissions(slo, carbon)
+
+
+def test_carbon_aware_puts_headroom_in_the_cleaner_region():
+    busy = np.full((1, 5), 3000.0)
+    service = np.full((1, 5), 50.0)
+    carbon = np.array([[500.0, 50.0, 300.0, 200.0, 400.0]])
+    replicas = plan_replicas('carbon-aware', busy, service, carbon)[0]
+    assert replicas.argmax() == 1 and replicas.argmin() == 0
+    assert (replicas == plan_replicas('slo', busy, service, carbon)[0]).sum() < 5
@@ -0,0 +1,73 @@
+import numpy as np
+
+from cache import ResponseCache, cache_aware_region, simulate_caches
+from config import REGIONS
+from policies import get_policy_configs, select_region
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(capacity=2, eviction='lru')
+    assert cache.insert('a') is None and cache.insert('b') is None
+    assert cache.lookup('a')
+    assert cache.insert('c') == 'b'
+    assert cache.insert('d') == 'a'
+    assert 'c' in cache and 'd' in cache
+
+
+def test_lfu_evicts_least_frequent_then_oldest():
+    cache = ResponseCache(capacity=3, eviction='lfu')
+    for key in 'abc':
+        cache.insert(key)
+    cache.lookup('a')
+    cache.lookup('a')
+    cache.lookup('c')
+    assert cache.insert('d') == 'b'       # b is the only key never hit
+    assert cache.insert('e') == 'd'       # d (1 use) before c (2 uses)
+    cache.lookup('e')
+    assert cache.insert('f') == 'c'       # c and e tie at 2 uses; c is older
+    assert not cache.lookup('b')
+
+
+def test_zero_capacity_caches_nothing():
+    cache = ResponseCache(capacity=0)
+    assert cache.insert('a') == 'a' and not cache.lookup('a')
+
+
+def test_cache_aware_moves_to_equally_good_warm_region():
+    # Regions 0 and 1 are equally near and green, except that region 1 is greener
+    # for the first request, which warms its cache for the one key
+    lats = np.full((3, len(REGIONS)), 500.0)
+    lats[:, :2] = 20.0
+    cis = np.full((3, len(REGIONS)), 900.0)
+    cis[:, :2] = 100.0
+    cis[0, 1] = 50.0
+    popularity = [np.array([1.0])]
+    wl, keys = np.zeros(3, dtype=int), np.zeros(3, dtype=int)
+    slo, inference = np.full(3, 200.0), np.full(3, 30.0)
+    args = ('carbon_first', None, lats, cis, slo, inference, wl, keys, popularity)
+    blind, blind_hit = simulate_caches(*args)
+    aware, aware_hit = simulate_caches(*args, cache_aware=True)
+    assert blind.tolist() == [1, 0, 0] and blind_hit.tolist() == [False, False, True]
+    assert aware.tolist() == [1, 1, 1] and aware_hit.tolist() == [False, True, True]
+
+
+def test_cache_aware_objectives_reduce_to_policies_when_cold():
+    rng = np.random.default_rng(0)
+    cold = np.zeros(len(REGIONS))
+    for _ in range(50):
+        lats, cis = rng.uniform(10, 200, len(REGIONS)), rng.uniform(20, 500, len(REGIONS))
+        for _, ptype, alpha in get_policy_configs():
+            if ptype != 'latency_first':
+                assert cache_aware_region(ptype, alpha, lats, cis, 150.0, 40.0, cold) == \
+                    select_region(ptype, lats, cis, alpha, 150.0, 40.0)
+
+
+def test_constrained_prefers_warm_region_with_lower_expected_carbon():
+    lats = np.array([20.0, 50.0, 300.0, 300.0, 300.0])
+    cis = np.array([100.0, 150.0, 20.0, 20.0, 20.0])
+    h = np.array([0.0, 0.5, 0.0, 0.0, 0.0])
+    assert select_region('constrained', lats, cis, None, 100.0, 40.0) == 0
+    # Half of region 1's requests hit, so it costs 0.5 * 150 < 100 per unit of inference
+    assert cache_aware_region('constrained', None, lats, cis, 100.0, 40.0, h) == 1
+    # ...but not if the expected response time would break the SLO
+    assert cache_aware_region('constrained', None, lats, cis, 75.0, 40.0, h) == 0
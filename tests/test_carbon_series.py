@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from carbon_series import CarbonSeries, align_to_run, resample
+from config import REGIONS
+from simulation import prepare_inputs
+
+
+def _series(values, step_s, start_s=0.0):
+    return CarbonSeries(np.repeat(np.asarray(values, dtype=float)[:, None], len(REGIONS), axis=1), step_s, start_s)
+
+
+def test_at_buckets_by_step_and_clamps():
+    series = _series([10, 20, 30], 300, start_s=1000)
+    t = np.array([0, 1000, 1299.9, 1300, 1899, 1900, 99999])
+    assert series.at(t)[:, 0].tolist() == [10, 10, 10, 20, 30, 30, 30]
+
+
+def test_at_interpolates_between_midpoints():
+    series = _series([10, 20], 600)
+    assert series.at(np.array([300, 600, 900]), interpolate=True)[:, 0].tolist() == [10, 15, 20]
+
+
+def test_from_samples_uses_gcd_step():
+    series = CarbonSeries.from_samples([0, 600, 900], np.array([[1.0], [2.0], [3.0]]), regions=['R'])
+    assert series.step_s == 300
+    assert series.at(np.array([0, 599, 600, 899, 900]))[:, 0].tolist() == [1, 1, 2, 2, 3]
+
+
+def test_resample_mean_to_coarser_step():
+    hourly = resample(_series(np.arange(12), 300), 3600, 'mean')
+    assert len(hourly) == 1 and hourly.values[0, 0] == pytest.approx(5.5)
+
+
+def test_align_to_run_keeps_offset_from_origin():
+    aligned = align_to_run(_series([1, 2], 3600, start_s=50_000), origin_s=40_000)
+    assert aligned.start_s == 10_000
+
+
+def test_replayed_log_meets_carbon_of_its_own_time(tmp_path):
+    # Carbon from midnight, one value per hour; requests from 14:00 onwards
+    midnight = 1_767_225_600.0
+    carbon = pd.DataFrame({'timestamp': midnight + 3600.0 * np.arange(24)})
+    for r in REGIONS:
+        carbon[r] = 100.0 + np.arange(24)
+    carbon_path = tmp_path / 'carbon.csv'
+    carbon.to_csv(carbon_path, index=False)
+
+    log = tmp_path / 'requests.jsonl'
+    stamps = midnight + 14 * 3600 + np.array([0, 1800, 3600, 5400])
+    log.write_text(''.join(json.dumps({'timestamp': t, 'user_location': 'EU', 'workload': 'bert_base'}) + '\n'
+                           for t in stamps))
+
+    inputs = prepare_inputs(request_log=str(log), carbon_series=str(carbon_path))
+    assert inputs['req_times'].tolist() == (stamps - midnight).tolist()
+    assert inputs['carbon'].at(inputs['req_times'])[:, 0].tolist() == [114, 114, 115, 115]
+    assert inputs['ci_arr'][inputs['req_hours'], 0].tolist() == [114, 114, 115, 115]
@@ -0,0 +1,53 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from simulation import checkpoint_path, run_simulation
+from timeseries import load_metric_cubes
+
+PARAMS = {'hours': 4, 'rph': 50, 'seed': 7}
+
+
+def run_interrupted(output_dir, **kwargs):
+    """Run to completion, cancelling at every checkpoint and resuming; returns (result, interruptions)."""
+    cancel = threading.Event()
+    cancel.set()
+    interruptions = 0
+    while True:
+        try:
+            return run_simulation(output_dir=output_dir, checkpoint_every=60, resume=True, cancel=cancel,
+                                  **PARAMS, **kwargs), interruptions
+        except InterruptedError:
+            interruptions += 1
+
+
+@pytest.mark.parametrize('payload_transfer', [False, True])
+def test_resumed_run_matches_uninterrupted(tmp_path, payload_transfer):
+    ref_dir, dir_ = str(tmp_path / 'ref'), str(tmp_path / 'resumed')
+    run_simulation(output_dir=ref_dir, checkpoint_every=0, payload_transfer=payload_transfer, **PARAMS)
+    (results, _, detailed), interruptions = run_interrupted(dir_, payload_transfer=payload_transfer)
+
+    # 200 requests: three mid-policy checkpoints and one at the end of each of the seven policies
+    assert interruptions == 7 * 4
+    for name in ('simulation_results', 'per_workload_results'):
+        with open(f'{ref_dir}/tables/{name}.csv', 'rb') as a, open(f'{dir_}/tables/{name}.csv', 'rb') as b:
+            assert a.read() == b.read(), name
+    pd.testing.assert_frame_equal(load_metric_cubes(dir_), load_metric_cubes(ref_dir))
+    assert ('Avg Transfer (ms)' in results.columns) == payload_transfer
+    assert set(detailed) == set(results['Policy'])
+    assert not (tmp_path / 'resumed' / 'checkpoints').exists()
+
+
+def test_checkpoint_from_other_run_is_refused(tmp_path):
+    out = str(tmp_path / 'out')
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(InterruptedError):
+        run_simulation(output_dir=out, checkpoint_every=60, cancel=cancel, **PARAMS)
+    with pytest.raises(ValueError, match='different run'):
+        run_simulation(output_dir=out, checkpoint_every=60, resume=True, **{**PARAMS, 'seed': 8})
+    # Without resume the stale checkpoint is ignored and replaced
+    run_simulation(output_dir=out, checkpoint_every=60, metric_cubes=False, **{**PARAMS, 'seed': 8})
+    assert not (tmp_path / 'out' / 'checkpoints').exists()
+    assert checkpoint_path(out).endswith('simulation.ckpt.npz')
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from config import REGIONS
+from faults import FaultSchedule
+
+EU, US_WEST, OTHER = REGIONS.index('EU-North'), REGIONS.index('US-West'), REGIONS.index('US-East')
+
+
+def schedule():
+    return FaultSchedule([
+        {'region': 'EU-North', 'start_h': 1, 'end_h': 2, 'kind': 'outage', 'severity': 1.0},
+        {'region': 'US-West', 'start_h': 1, 'end_h': 2, 'kind': 'latency', 'severity': 50.0},
+        {'region': 'US-East', 'start_h': 2.5, 'end_h': 2.6, 'kind': 'capacity', 'severity': 0.3},
+    ], hours=3, bin_s=10)
+
+
+def test_outage_is_detected_late_and_drained_for_the_holddown():
+    unhealthy, _ = schedule().health_view(detection_s=60, holddown_s=300)
+    # Outage bins 360..719; 60 s to detect, then 300 s drained after it ends
+    np.testing.assert_array_equal(np.flatnonzero(unhealthy[:, EU]), np.arange(366, 750))
+    # A capacity loss below FAULT_UNHEALTHY_REJECT never marks the region unhealthy
+    assert not unhealthy[:, OTHER].any()
+
+
+def test_latency_inflation_shows_after_detection_without_holddown():
+    _, extra = schedule().health_view(detection_s=60, holddown_s=300)
+    np.testing.assert_array_equal(np.flatnonzero(extra[:, US_WEST]), np.arange(366, 720))
+    assert (extra[366:720, US_WEST] == 50.0).all()
+    assert not np.delete(extra, US_WEST, axis=1).any()
+
+
+def test_blip_shorter_than_detection_is_never_seen():
+    blip = FaultSchedule([{'region': 'EU-North', 'start_h': 1, 'end_h': 1 + 30 / 3600,
+                           'kind': 'outage', 'severity': 1.0}], hours=2, bin_s=10)
+    unhealthy, _ = blip.health_view(detection_s=60, holddown_s=300)
+    assert blip.reject[:, EU].sum() == 3 and not unhealthy.any()
+
+
+def test_unknown_kind_is_refused():
+    with pytest.raises(ValueError, match='Unknown fault kind'):
+        FaultSchedule([{'region': 'EU-North', 'start_h': 0, 'end_h': 1, 'kind': 'flood', 'severity': 1}])
@@ -0,0 +1,22 @@
+import numpy as np
+
+from hedging import run_hedging_experiment
+from policies import hedged_constrained_hybrid
+
+
+def test_hedge_goes_to_fastest_region_only_if_strictly_faster():
+    lats = np.array([20.0, 60.0, 40.0])
+    cis = np.array([400.0, 30.0, 200.0])
+    primary, hedge = hedged_constrained_hybrid(lats, cis, slo_threshold=200, inference_ms=50)
+    assert (primary, hedge) == (1, 0)
+    # Only the fastest region meets the SLO, so there is nothing faster to hedge to
+    primary, hedge = hedged_constrained_hybrid(lats, cis, slo_threshold=80, inference_ms=50)
+    assert (primary, hedge) == (0, None)
+
+
+def test_unhedgeable_requests_are_never_duplicated(tmp_path):
+    df = run_hedging_experiment(output_dir=str(tmp_path), hours=4, rph=50, hedge_delays=[0])
+    hedged = df.iloc[-1]
+    assert 0 < hedged['Hedgeable (%)'] < 100
+    assert hedged['Hedge Rate (%)'] <= hedged['Hedgeable (%)']
+    assert (tmp_path / 'tables' / 'hedging_results.csv').exists()
@@ -0,0 +1,67 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import ingest
+from config import USER_LOCATIONS, get_workload_list
+
+
+def write_log(path, records):
+    path.write_text(''.join(json.dumps(r) + '\n' for r in records), encoding='utf-8')
+
+
+def record(ts, user=0, workload=0):
+    return {'timestamp': ts, 'user_location': USER_LOCATIONS[user], 'workload': get_workload_list()[workload]}
+
+
+def test_cache_is_built_once_and_reused(tmp_path, monkeypatch):
+    log = tmp_path / 'requests.jsonl'
+    write_log(log, [record('2026-01-01T00:00:00Z', 1, 2), record('2026-01-01T00:01:00.5Z', 0, 1)])
+    times, users, wls = ingest.load_request_log(log)
+    assert (tmp_path / 'requests.jsonl.cache' / 'manifest.json').exists()
+    np.testing.assert_array_equal(times, [1_767_225_600.0, 1_767_225_660.5])
+    np.testing.assert_array_equal(users, [1, 0])
+    np.testing.assert_array_equal(wls, [2, 1])
+
+    def fail(*args, **kwargs):
+        raise AssertionError('cache rebuilt for an unchanged log')
+    monkeypatch.setattr(ingest, 'convert_request_log', fail)
+    cached = ingest.load_request_log(log)
+    assert isinstance(cached[0], np.memmap)
+    np.testing.assert_array_equal(cached[0], times)
+
+
+def test_cache_is_rebuilt_when_log_grows(tmp_path):
+    log = tmp_path / 'requests.jsonl'
+    write_log(log, [record(100.0)])
+    assert len(ingest.load_request_log(log)[0]) == 1
+    write_log(log, [record(100.0), record(200.0, 2, 1)])
+    times, users, _ = ingest.load_request_log(log)
+    np.testing.assert_array_equal(times, [100.0, 200.0])
+    np.testing.assert_array_equal(users, [0, 2])
+
+
+def test_cache_is_rebuilt_when_only_mtime_changes(tmp_path):
+    log = tmp_path / 'requests.jsonl'
+    write_log(log, [record(100.0)])
+    ingest.load_request_log(log)
+    # Same size, different content: only the modification time gives it away
+    write_log(log, [record(300.0)])
+    st = os.stat(log)
+    os.utime(log, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    np.testing.assert_array_equal(ingest.load_request_log(log)[0], [300.0])
+
+
+def test_uncached_load_matches_and_rejects_unknown_fields(tmp_path):
+    log = tmp_path / 'requests.jsonl'
+    write_log(log, [record(float(t), t % len(USER_LOCATIONS)) for t in range(50)])
+    cached = ingest.load_request_log(log)
+    direct = ingest.load_request_log(log, use_cache=False, block_bytes=256)
+    for a, b in zip(cached, direct):
+        np.testing.assert_array_equal(a, b)
+
+    write_log(log, [{'timestamp': 0, 'user_location': 'Mars', 'workload': get_workload_list()[0]}])
+    with pytest.raises(ValueError, match='unknown user_location'):
+        ingest.load_request_log(log)
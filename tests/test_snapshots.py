@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from config import LATENCY_MATRIX, REGIONS
+from router import RouterCore
+from snapshots import frozen_array
+from telemetry import LatencyTelemetry
+
+
+def latency_table():
+    return LATENCY_MATRIX[REGIONS].to_numpy(dtype=float)
+
+
+def test_frozen_array_copies_and_refuses_writes():
+    src = np.array([1, 2, 3])
+    arr = frozen_array(src)
+    src[0] = 99
+    assert arr.dtype == float and arr[0] == 1.0
+    with pytest.raises(ValueError):
+        arr[0] = 5.0
+
+
+def test_telemetry_snapshot_survives_later_samples():
+    lat = latency_table()
+    telemetry = LatencyTelemetry(lat)
+    first = telemetry.snapshot()
+    before = first.mean.copy(), first.tail.copy(), first.samples.copy()
+    for field in first[1:]:
+        with pytest.raises(ValueError):
+            field[0, 0] = -1.0
+
+    telemetry.record_batch(np.zeros(20, dtype=int), np.zeros(20, dtype=int), np.full(20, 500.0))
+    telemetry.record(1, 2, 300.0)
+    second = telemetry.publish()
+    assert second.version == first.version + 1
+    assert second.mean[0, 0] > lat[0, 0] and second.samples[0, 0] == 20
+    for field, old in zip(first[1:], before):
+        np.testing.assert_array_equal(field, old)
+
+
+def test_router_state_survives_swaps():
+    lat = latency_table()
+    carbon = np.linspace(50, 400, len(REGIONS))
+    router = RouterCore(lat, carbon)
+    state = router.state()
+    carbon[:] = 0.0                       # the caller's array is not shared
+    assert (state.carbon > 0).all()
+    with pytest.raises(ValueError):
+        state.carbon[0] = 0.0
+
+    telemetry = LatencyTelemetry(lat)
+    telemetry.record_batch(np.zeros(5, dtype=int), np.zeros(5, dtype=int), np.full(5, 900.0))
+    telemetry.publish()
+    router.telemetry = telemetry
+    router.update_carbon(np.full(len(REGIONS), 10.0))
+    swapped = router.sync_telemetry()
+    assert swapped.version == state.version + 2
+    np.testing.assert_array_equal(state.carbon, np.linspace(50, 400, len(REGIONS)))
+    np.testing.assert_array_equal(state.latency, lat)
+    assert swapped.latency[0, 0] > lat[0, 0]
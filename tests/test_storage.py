@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import storage
+from storage import find_table, parquet_available, read_table, write_table
+
+
+def results_frame():
+    return pd.DataFrame({
+        'Policy': ['Latency-First', 'Hybrid (α=0.7)', 'Constrained Hybrid'],
+        'Avg Carbon (gCO2eq/kWh)': [271.6, 184.7, 123.4],
+        'Requests': np.array([493, 221, 290], dtype=np.int32),
+        'Interpolated': [False, True, False],
+    })
+
+
+def hourly_frame():
+    return pd.DataFrame({'US-East': [380.5, 401.25], 'EU-North': [25.0, 24.5]},
+                        index=pd.RangeIndex(2, name='hour'))
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'npz',
+                                 pytest.param('parquet', marks=pytest.mark.skipif(
+                                     not parquet_available(), reason='needs pyarrow or fastparquet'))])
+def test_round_trip(tmp_path, fmt):
+    df = results_frame()
+    path = write_table(df, tmp_path / 'tables' / 'results', fmt)
+    assert path.suffix == storage.FORMAT_SUFFIXES[fmt]
+    pd.testing.assert_frame_equal(read_table(path), df, check_dtype=fmt != 'csv')
+
+    hourly = hourly_frame()
+    path = write_table(hourly, tmp_path / 'data' / 'traces', fmt, index=True, index_label='hour')
+    back = read_table(path, index_col='hour')
+    pd.testing.assert_frame_equal(back, hourly, check_index_type=False)
+
+
+def test_npz_keeps_dtypes_without_pickle(tmp_path):
+    path = write_table(results_frame(), tmp_path / 'results', 'npz')
+    with np.load(path, allow_pickle=False) as data:
+        assert storage.MANIFEST_KEY in data.files
+    back = read_table(path)
+    assert back['Requests'].dtype == np.int32
+    assert back['Interpolated'].dtype == bool
+
+
+def test_parquet_falls_back_to_npz(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'parquet_available', lambda: False)
+    path = write_table(results_frame(), tmp_path / 'results', 'parquet')
+    assert path.suffix == '.npz'
+    pd.testing.assert_frame_equal(read_table(path), results_frame())
+
+
+def test_find_table_prefers_newest_backend(tmp_path):
+    stem = tmp_path / 'results'
+    assert find_table(stem) is None
+    csv = write_table(results_frame(), stem, 'csv')
+    npz = write_table(results_frame(), stem, 'npz')
+    os.utime(csv, ns=(0, 0))
+    assert find_table(stem) == npz
+    assert find_table(csv) == npz
+    with pytest.raises(ValueError, match='Unknown output format'):
+        write_table(results_frame(), stem, 'xlsx')
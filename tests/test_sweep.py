@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+import sweep
+from simulation import run_simulation
+
+PARAMS = {'seed': 7, 'alpha_values': [0.5], 'carbon_series': None, 'rph': 40, 'hours': 3, 'request_log': None}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    path = str(tmp_path / 'sweep.db')
+    sweep.enqueue(path, [PARAMS])
+    return path
+
+
+def _item(queue_path):
+    con = sweep.connect(queue_path)
+    row = con.execute('SELECT status, attempts, token FROM items').fetchone()
+    con.close()
+    return row
+
+
+def test_expired_lease_is_retried_and_committed_once(queue, tmp_path):
+    con = sweep.connect(queue)
+    key, _, dead_token = sweep.claim(con, 'dead-worker')
+    assert sweep.claim(con, 'other', lease_s=3600) is None     # lease still held
+
+    assert sweep.run_worker(queue, str(tmp_path / 'runs'), lease_s=0.0) == 1
+    status, attempts, token = _item(queue)
+    assert (status, attempts) == ('done', 2) and token != dead_token
+
+    # The abandoned attempt failing late must not put the done item back in the queue
+    sweep.fail(con, key, dead_token, 'late failure')
+    assert _item(queue)[0] == 'done'
+    results, _, _ = sweep.merge_results(queue, str(tmp_path / 'merged'))
+    assert len(results) == len(run_simulation(output_dir=str(tmp_path / 'ref'), metric_cubes=False,
+                                              **PARAMS)[0])
+    con.close()
+
+
+def test_retry_resumes_from_abandoned_attempt_checkpoint(queue, tmp_path):
+    work_dir = tmp_path / 'runs'
+    con = sweep.connect(queue)
+    key, params, dead_token = sweep.claim(con, 'dead-worker')
+    con.close()
+    cancel = threading.Event()
+    cancel.set()
+    dead_dir = str(work_dir / key / dead_token)
+    with pytest.raises(InterruptedError):
+        run_simulation(output_dir=dead_dir, checkpoint_every=50, metric_cubes=False, cancel=cancel, **params)
+
+    run_dir = str(work_dir / key / 'retry')
+    assert sweep._resume_checkpoint(str(work_dir), key, run_dir) is not None
+    resumed, _, _ = run_simulation(output_dir=run_dir, checkpoint_every=50, resume=True,
+                                   metric_cubes=False, **params)
+    fresh, _, _ = run_simulation(output_dir=str(tmp_path / 'fresh'), metric_cubes=False, **params)
+    assert resumed.equals(fresh)
+    # The abandoned attempt's directory is left alone
+    assert (work_dir / key / dead_token / 'checkpoints' / 'simulation.ckpt.npz').exists()
+    assert not (work_dir / key / 'retry' / 'checkpoints' / 'simulation.ckpt.npz').exists()
+
+
+def test_heartbeat_notices_lost_lease(queue):
+    con = sweep.connect(queue)
+    key, _, stale_token = sweep.claim(con, 'slow-worker')
+    sweep.claim(con, 'new-worker', lease_s=0.0)
+    con.close()
+    stop, lost = threading.Event(), threading.Event()
+    beat = threading.Thread(target=sweep._heartbeat, args=(queue, key, stale_token, stop, lost, 0.01))
+    beat.start()
+    assert lost.wait(5)
+    stop.set()
+    beat.join()
+
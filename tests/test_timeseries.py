@@ -0,0 +1,28 @@
+import numpy as np
+
+from timeseries import segment_quantiles
+
+QS = (0.0, 0.5, 0.95, 0.99, 1.0)
+
+
+def test_matches_percentile_per_segment():
+    rng = np.random.default_rng(5)
+    n_cells = 40
+    # Cells 0 and 1 stay empty, cells 2 and 3 get a single value each
+    cell = np.r_[2, 3, rng.integers(4, n_cells, 2000)]
+    values = rng.lognormal(3, 1, len(cell))
+    out = segment_quantiles(cell, values, n_cells, QS)
+
+    assert out.shape == (n_cells, len(QS))
+    assert np.isnan(out[:2]).all()
+    np.testing.assert_array_equal(out[2], np.full(len(QS), values[0]))
+    np.testing.assert_array_equal(out[3], np.full(len(QS), values[1]))
+    for c in range(2, n_cells):
+        seg = values[cell == c]
+        if len(seg):
+            np.testing.assert_allclose(out[c], np.percentile(seg, [100 * q for q in QS]))
+
+
+def test_no_values_gives_all_nan():
+    out = segment_quantiles(np.array([], dtype=int), np.array([]), 3, QS)
+    assert out.shape == (3, len(QS)) and np.isnan(out).all()
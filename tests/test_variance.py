@@ -0,0 +1,13 @@
+import numpy as np
+
+from variance import run_variance_experiment
+
+
+def test_variance_reduction_is_never_infinite(tmp_path):
+    df = run_variance_experiment(output_dir=str(tmp_path), hours=4, rph=20, replications=4)
+    vr = df['Variance Reduction (x)']
+    assert not np.isinf(vr).any()
+    assert (vr[df['Mode'] == 'independent'] == 1.0).all()
+    # Stratification fixes the mix, so some differences stop varying at all
+    zero = (df['Estimator Variance'] == 0) & (df['Mode'] != 'independent')
+    assert zero.any() and vr[zero].isna().all()
@@ -0,0 +1,39 @@
+import numpy as np
+
+from config import REGIONS
+from policies import placement_aware_hybrid
+from warm_pool import WarmPool
+
+
+def test_prewarm_refuses_model_larger_than_region():
+    pool = WarmPool(eviction='lru', memory_gb={r: 1.0 for r in REGIONS})
+    loaded = dict(pool.last_used[0])
+    assert not pool.prewarm(0, 'bert_large', 10.0)       # 1.35 GB never fits in 1 GB
+    assert dict(pool.last_used[0]) == loaded and pool.evictions == 0
+
+
+def test_prewarm_evicts_least_recently_used():
+    pool = WarmPool(eviction='lru', memory_gb={r: 1.85 for r in REGIONS})
+    assert list(pool.last_used[0]) == ['bert_base', 'bert_large']
+    pool.access(0, 'bert_base', 5.0)
+    assert pool.prewarm(0, 'resnet50', 6.0)
+    assert list(pool.last_used[0]) == ['bert_base', 'resnet50'] and pool.evictions == 1
+
+
+def test_placement_counts_cold_start_and_falls_back_to_warm_region():
+    lats = np.array([10.0, 80.0, 150.0])
+    cis = np.array([300.0, 200.0, 20.0])
+    warm = np.array([False, True, False])
+    # Region 0 meets the SLO only while warm; region 1 is the only warm one but too far
+    idx, prewarm = placement_aware_hybrid(lats, cis, 60, 20, warm, cold_start_ms=1800)
+    assert idx == 1 and prewarm == 0
+
+
+def test_ttl_counts_idle_time_at_real_traffic_scale():
+    # A simulated gap of ttl_s * traffic_scale is ttl_s of real idle time
+    pool = WarmPool(eviction='ttl', ttl_s=100, traffic_scale=10)
+    pool.access(0, 'bert_base', 0.0)
+    assert pool.is_warm(0, 'bert_base', 1000.0)
+    assert not pool.is_warm(0, 'bert_base', 1000.1)
+    unscaled = WarmPool(eviction='ttl', ttl_s=100, traffic_scale=1)
+    assert not unscaled.is_warm(0, 'bert_base', 100.1)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from config import NETWORK_JITTER_MEAN, NETWORK_JITTER_STD, get_slo_threshold, sample_inference_time
+from workload_table import WorkloadTable
+
+SEED = 11
+
+
+def test_inference_from_normals_matches_per_request_draws():
+    table = WorkloadTable()
+    wl_codes = table.sample_workloads(500, np.random.default_rng(SEED))
+
+    # The per-request loop interleaves one inference and one jitter draw per request
+    rng = np.random.default_rng(SEED)
+    expected_inf, expected_jit = np.zeros(len(wl_codes)), np.zeros(len(wl_codes))
+    for i, w in enumerate(wl_codes):
+        expected_inf[i] = sample_inference_time(table.ids[w], rng=rng)
+        expected_jit[i] = max(0, rng.normal(NETWORK_JITTER_MEAN, NETWORK_JITTER_STD))
+
+    z = np.random.default_rng(SEED).standard_normal((len(wl_codes), 2))
+    np.testing.assert_allclose(table.inference_from_normals(wl_codes, z[:, 0]), expected_inf)
+    np.testing.assert_allclose(np.maximum(0, NETWORK_JITTER_MEAN + NETWORK_JITTER_STD * z[:, 1]), expected_jit)
+
+
+def test_bulk_sample_matches_sequential_draws():
+    table = WorkloadTable()
+    wl_codes = table.sample_workloads(500, np.random.default_rng(SEED))
+    rng = np.random.default_rng(SEED)
+    expected = [sample_inference_time(table.ids[w], rng=rng) for w in wl_codes]
+
+    inference_ms, slo_ms = table.sample(wl_codes, np.random.default_rng(SEED))
+    np.testing.assert_allclose(inference_ms, expected)
+    assert inference_ms.min() >= 1.0
+    np.testing.assert_array_equal(slo_ms, [get_slo_threshold(table.ids[w]) for w in wl_codes])